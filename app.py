@@ -1,22 +1,63 @@
-from gui import DataVisualizationApp
-from file_handler import get_file_path
-import tkinter as tk
-from tkinter import messagebox, ttk
 import sys
-import customtkinter as ctk
+from startup_profile import StartupProfile
+
+# Замер импортов включается до импорта остальных модулей приложения
+startup = StartupProfile()
+if "--profile-startup" in sys.argv:
+    startup.install()
+
+with startup.stage("imports"):
+    from gui import DataVisualizationApp
+    from file_handler import get_file_path
+    from cache_manager import CacheManager
+    from stream_source import StreamSource
+    import tkinter as tk
+    from tkinter import messagebox, ttk
+    import customtkinter as ctk
 
 
 if __name__ == "__main__":
     try:
-        file_path, demo_mode, demo_args = get_file_path()
+        with startup.stage("arguments"):
+            file_path, demo_mode, demo_args, args = get_file_path()
+
+        cache = CacheManager(args.cache_dir, args.cache_size)
+        if args.purge_cache:
+            cache.purge()
+        if args.no_cache:
+            cache = None
 
-        root = ctk.CTk()
+        with startup.stage("window"):
+            root = ctk.CTk()
         root.title("Data Visualization App")
         try:
-            if demo_mode:
-                app = DataVisualizationApp(root, demo_mode=demo_mode, demo_args=demo_args)
-            else:
-                app = DataVisualizationApp(root, file_path=file_path)
+            with startup.stage("application"):
+                if args.stream:
+                    source = StreamSource(args.stream, args.ring_size)
+                    # Окно показывается сразу, первая запись источника ждётся в фоне
+                    app = DataVisualizationApp(root, source=source, flag_view=args.flag_view, background=True)
+                    app.load_manager.when_loaded(lambda: app.stream_manager.start(args.refresh_ms))
+                elif demo_mode:
+                    app = DataVisualizationApp(root, demo_mode=demo_mode, demo_args=demo_args, flag_view=args.flag_view,
+                                               background=True, demo_save=args.demo_save,
+                                               time_from=args.time_from, time_to=args.time_to)
+                else:
+                    # Дописываемые строки добавляются ко всем столбцам, поэтому слежение без ленивой загрузки;
+                    # кэш дописываемого файла устаревает сразу, а запись могла бы не совпасть с размером файла
+                    app = DataVisualizationApp(root, file_path=file_path, cache=None if args.follow else cache,
+                                               flag_view=args.flag_view, follow=args.follow,
+                                               background=True, lazy=args.lazy and not args.follow,
+                                               memory_budget=args.memory_budget,
+                                               time_from=args.time_from, time_to=args.time_to)
+                    if args.follow:
+                        # Слежение - после загрузки, с того места, где остановилось её чтение
+                        app.load_manager.when_loaded(lambda: app.tail_manager.start(args.refresh_ms, args.autoscroll))
+
+            app.render_scheduler.verbose = args.count_draws
+            app.trace_manager.profile_actions = args.profile_actions
+            app.trace_manager.export_path = args.trace
+            app.trace_manager.export_format = args.trace_format
+            app.trace_manager.set_stats_visible(args.stats)
 
             if sys.platform == "win32":
                 root.iconbitmap("images/lines.ico")
@@ -24,6 +65,9 @@ if __name__ == "__main__":
                 icon = tk.PhotoImage(file="images/lines.png")
                 root.iconphoto(False, icon) # False - для всех окон приложения
 
+            if startup.enabled:
+                # Отчёт - когда окно показано и цикл событий впервые свободен
+                root.after_idle(lambda: startup.report(app.trace_manager))
             root.mainloop()
         except Exception as e:
             messagebox.showerror("Application Error", str(e))
@@ -0,0 +1,201 @@
+"""
+Пакетная отрисовка файлов данных в PNG/PDF/SVG без окна - те же классификация столбцов
+и раскладка осей, что и в приложении, на Agg. Файлы отрисовываются параллельно в пуле процессов.
+
+    python batch_render.py logs/*.csv --out reports --format pdf --jobs 8
+    python batch_render.py "logs/**/*.xlsx" --columns Voltage F-CHARGE --theme dark --dpi 150
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import matplotlib
+matplotlib.use("Agg")
+
+import pandas as pd
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+from config_manager import PlainVar
+from gui import DataVisualizationApp
+
+
+class HeadlessApp(DataVisualizationApp):
+    """
+    Приложение без окна: фигура заданного размера на холсте Agg, высота «экрана» - высота фигуры
+    в пикселях. Тулбар, иконки и обработка событий не создаются, перерисовку выполняет сохранение в файл
+    """
+    var_type = PlainVar
+
+    def __init__(self, file_path, size=(16, 9), dpi=100, theme=None, columns=None, flag_view="auto",
+                 time_from=None, time_to=None, config_file="settings.ini"):
+        self.size = size
+        self.dpi = dpi
+        self.theme_name = theme
+        self.columns = columns
+        self.timings = {}
+        self.started = time.perf_counter()
+        # С выбором столбцов читаются только они, если формат это позволяет
+        super().__init__(None, file_path=file_path, flag_view=flag_view, lazy=columns is not None,
+                         time_from=time_from, time_to=time_to, config_file=config_file)
+
+    def setup_ui(self):
+        self.timings["load"] = time.perf_counter() - self.started
+        start = time.perf_counter()
+        if self.theme_name:
+            self.theme = self.theme_name
+        if self.columns is not None:
+            self.select_columns(self.columns)
+        self.create_figure()
+        self.show_data()
+        self.render_scheduler.prepare()
+        self.timings["plot"] = time.perf_counter() - start
+
+    def select_columns(self, names):
+        loader = self.data_loader
+        missing = [name for name in names if name not in loader.all_columns()]
+        if missing:
+            print(f"{os.path.basename(self.file_path)}: no columns {', '.join(missing)}")
+        self.selected_columns = {kind: [col for col in cols if col in names] for kind, cols in
+                                 (("flags", loader.flag_columns), ("numerics", loader.numeric_columns),
+                                  ("percents", loader.percent_columns), ("bools", loader.bool_columns))}
+        loader.ensure_columns([col for cols in self.selected_columns.values() for col in cols])
+
+    def screen_height(self):
+        return self.size[1] * self.dpi
+
+    def new_figure(self):
+        # Без pyplot: фигуры не копятся в его реестре между файлами
+        return Figure(figsize=self.size, dpi=self.dpi,
+                      facecolor=self.light_bg_color if self.theme == "light" else self.dark_bg_color)
+
+    def new_canvas(self):
+        return FigureCanvasAgg(self.fig)
+
+    def connect_events(self):
+        # Мыши, клавиатуры и быстрого перетаскивания нет - обработчики не нужны
+        self.render_scheduler.connect()
+
+    def save(self, out_path):
+        start = time.perf_counter()
+        # Легенда - анимированный артист для быстрого перетаскивания; в файл она должна попасть
+        with self.blit_manager.static():
+            self.fig.savefig(out_path, dpi=self.dpi, facecolor=self.fig.get_facecolor())
+        self.timings["save"] = time.perf_counter() - start
+
+
+def render_file(file_path, out_path, options):
+    """Отрисовка одного файла в процессе пула; ошибки возвращаются в результате, а не прерывают пакет"""
+    result = {"file": file_path, "out": out_path, "rows": 0, "error": None}
+    start = time.perf_counter()
+    app = None
+    try:
+        app = HeadlessApp(file_path, **options)
+        result["rows"] = len(app.data_loader.x_values)
+        app.save(out_path)
+        result.update(app.timings)
+    except Exception as e:
+        result["error"] = str(e)
+    finally:
+        if app is not None:
+            app.data_loader.cleanup()
+    result["total"] = time.perf_counter() - start
+    return result
+
+
+def expand_inputs(patterns):
+    """Файлы и шаблоны (в том числе **) в список файлов без повторов, в порядке аргументов"""
+    files = []
+    for pattern in patterns:
+        matches = sorted(glob.glob(pattern, recursive=True)) if glob.has_magic(pattern) else [pattern]
+        if not matches:
+            print(f"No files match {pattern}")
+        files += [path for path in matches if path not in files]
+    return files
+
+
+def output_path(file_path, out_dir, fmt, used):
+    """<out>/<имя файла>.<формат>; одноимённые файлы из разных папок получают номер"""
+    stem = os.path.splitext(os.path.basename(file_path))[0]
+    name, n = f"{stem}.{fmt}", 1
+    while name in used:
+        n += 1
+        name = f"{stem}_{n}.{fmt}"
+    used.add(name)
+    return os.path.join(out_dir, name)
+
+
+def parse_size(text):
+    try:
+        width, height = (float(value) for value in text.lower().split("x"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected WIDTHxHEIGHT in inches, got {text!r}")
+    return width, height
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Render data files to images without a window")
+    parser.add_argument("inputs", nargs="+", help="Data files or glob patterns (quote ** patterns)")
+    parser.add_argument("--out", default=".", help="Output directory")
+    parser.add_argument("--format", choices=("png", "pdf", "svg"), default="png")
+    parser.add_argument("--dpi", type=int, default=100)
+    parser.add_argument("--size", type=parse_size, default=(16, 9), metavar="WxH",
+                        help="Figure size in inches, e.g. 16x9")
+    parser.add_argument("--theme", choices=("light", "dark"), default=None,
+                        help="Color theme (default - the one from settings.ini)")
+    parser.add_argument("--columns", nargs="+", default=None,
+                        help="Columns to plot (default - all); with CSV only these columns are read")
+    parser.add_argument("--flag-view", choices=("auto", "strips", "matrix"), default="auto")
+    parser.add_argument("--from", dest="time_from", type=pd.Timestamp, default=None,
+                        help="Plot only rows at or after this time")
+    parser.add_argument("--to", dest="time_to", type=pd.Timestamp, default=None,
+                        help="Plot only rows at or before this time")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count(),
+                        help="Number of worker processes (1 - render in this process)")
+    args = parser.parse_args()
+
+    files = expand_inputs(args.inputs)
+    if not files:
+        sys.exit(1)
+    os.makedirs(args.out, exist_ok=True)
+    used = set()
+    jobs = [(path, output_path(path, args.out, args.format, used)) for path in files]
+    options = {"size": args.size, "dpi": args.dpi, "theme": args.theme, "columns": args.columns,
+               "flag_view": args.flag_view, "time_from": args.time_from, "time_to": args.time_to}
+    workers = max(1, min(args.jobs or 1, len(jobs)))
+
+    print(f"{'file':<40}{'rows':>10}{'load, s':>9}{'plot, s':>9}{'save, s':>9}{'total, s':>10}")
+    start = time.perf_counter()
+    if workers == 1:
+        results = (render_file(path, out, options) for path, out in jobs)
+    else:
+        pool = ProcessPoolExecutor(max_workers=workers)
+        results = as_completed([pool.submit(render_file, path, out, options) for path, out in jobs])
+        results = (future.result() for future in results)
+
+    done = []
+    for result in results:
+        done.append(result)
+        name = os.path.basename(result["file"])
+        if result["error"]:
+            print(f"{name:<40}  error: {result['error']}")
+            continue
+        print(f"{name:<40}{result['rows']:>10}{result['load']:>9.2f}{result['plot']:>9.2f}"
+              f"{result['save']:>9.2f}{result['total']:>10.2f}")
+    if workers > 1:
+        pool.shutdown()
+    elapsed = time.perf_counter() - start
+
+    rendered = [result for result in done if not result["error"]]
+    rows = sum(result["rows"] for result in rendered)
+    print(f"{len(rendered)} of {len(done)} files in {elapsed:.2f} s with {workers} process(es): "
+          f"{len(rendered) / elapsed:.2f} files/s, {rows / elapsed:.0f} rows/s")
+    if len(rendered) != len(done):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""
+Сравнение времени загрузки одного и того же набора данных из CSV и XLSX.
+
+    python benchmarks/load_formats.py --rows 50000 --signals 12
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from demo_rand import RandomDemoGenerator
+from file_handler import DataLoader
+
+
+def time_load(file_path, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        loader = DataLoader(root=None, file_path=file_path)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, len(loader.df)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CSV vs XLSX load benchmark")
+    parser.add_argument("--rows", type=int, default=50000)
+    parser.add_argument("--signals", type=int, default=12)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    df = RandomDemoGenerator(rows=args.rows, cols=args.signals).generate_data()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        paths = {
+            "csv": os.path.join(tmp_dir, "bench.csv"),
+            "xlsx": os.path.join(tmp_dir, "bench.xlsx"),
+        }
+        df.to_csv(paths["csv"], index=False)
+        df.to_excel(paths["xlsx"], index=False)
+
+        print(f"{'format':<8}{'size, MB':>10}{'load, s':>10}{'rows/s':>12}")
+        results = {}
+        for fmt, path in paths.items():
+            seconds, rows = time_load(path, args.repeat)
+            results[fmt] = seconds
+            size_mb = os.path.getsize(path) / 1024 / 1024
+            print(f"{fmt:<8}{size_mb:>10.1f}{seconds:>10.3f}{rows / seconds:>12.0f}")
+        print(f"CSV is {results['xlsx'] / results['csv']:.1f}x faster than XLSX")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""
+Имитатор стенда: воспроизводит данные BatteryDemoGenerator построчным протоколом
+с заданной частотой (записей в секунду) в stdin PandoRa или в локальный сокет.
+
+    python benchmarks/stream_simulator.py --rate 100 | python app.py --stream -
+    python app.py --stream tcp://127.0.0.1:5555
+    python benchmarks/stream_simulator.py --rate 1000 --connect tcp://127.0.0.1:5555
+
+С --measure приёмник (StreamSource) запускается в этом же процессе, что позволяет
+измерить устойчивую пропускную способность приёма и потери без GUI:
+
+    python benchmarks/stream_simulator.py --measure --rate 0 --duration 10
+
+Если отправка не успевает за частотой дольше --max-lag секунд, опоздавшие записи
+отбрасываются и учитываются как потерянные (как у стенда, который не ждёт приёмник)
+"""
+import argparse
+import os
+import socket
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from demo_batt import BatteryDemoGenerator
+from stream_source import LineProtocol, StreamSource
+
+
+def make_bodies(cycles):
+    """Тексты значений каждой строки демо-данных: метка времени подставляется при отправке"""
+    df = BatteryDemoGenerator().generate_data(cycles=cycles)
+    columns = []
+    for name in df.columns[1:]:
+        if df[name].dtype == bool:
+            columns.append((name, ["true" if v else "false" for v in df[name]]))
+        else:
+            columns.append((name, [f"{v:.6g}" for v in df[name]]))
+    return [LineProtocol.format("", [(name, values[i]) for name, values in columns])[:-1]
+            for i in range(len(df))]
+
+
+def connect(address):
+    if address.startswith("tcp://"):
+        host, _, port = address[len("tcp://"):].rpartition(":")
+        sock = socket.create_connection((host or "127.0.0.1", int(port)))
+    elif address.startswith("unix://"):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.connect(address[len("unix://"):])
+    else:
+        raise ValueError(f"Unknown address: {address}")
+    return sock.makefile("w", encoding="utf-8")
+
+
+def replay(out, bodies, rate, duration, batch, max_lag):
+    """Отправляет записи пачками по расписанию rate (0 - без ограничения); возвращает (отправлено, потеряно, с)"""
+    sent = dropped = 0
+    start = time.perf_counter()
+    while True:
+        elapsed = time.perf_counter() - start
+        if duration and elapsed >= duration:
+            break
+        if rate:
+            due = int(elapsed * rate) - sent - dropped
+            late = due - int(max_lag * rate)
+            if late > 0:
+                dropped += late
+                due -= late
+            if due <= 0:
+                time.sleep(min(batch / rate, 0.01))
+                continue
+            count = min(due, batch)
+        else:
+            count = batch
+        now = time.time()
+        lines = []
+        for k in range(count):
+            i = sent + dropped + k
+            stamp = now - (count - 1 - k) / rate if rate else now
+            lines.append(f"{stamp:.3f}{bodies[i % len(bodies)]}\n")
+        out.write("".join(lines))
+        sent += count
+    out.flush()
+    return sent, dropped, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Battery bench simulator for PandoRa stream mode")
+    parser.add_argument("--rate", type=float, default=100, help="Samples per second (0 - as fast as possible)")
+    parser.add_argument("--duration", type=float, default=0, help="Seconds to run (0 - until interrupted)")
+    parser.add_argument("--connect", default=None, help="'tcp://HOST:PORT' or 'unix://PATH' (default: stdout)")
+    parser.add_argument("--cycles", type=int, default=3, help="Demo cycles to replay in a loop")
+    parser.add_argument("--batch", type=int, default=100, help="Samples per write")
+    parser.add_argument("--max-lag", type=float, default=1.0, help="Drop samples later than this, s")
+    parser.add_argument("--measure", action="store_true", help="Run the receiver in-process and report throughput")
+    parser.add_argument("--ring-size", type=int, default=None)
+    args = parser.parse_args()
+    if args.measure and not args.duration:
+        args.duration = 10
+
+    bodies = make_bodies(args.cycles)
+    source = None
+    if args.measure:
+        source = StreamSource("tcp://127.0.0.1:0", args.ring_size)
+        args.connect = source.open()
+        source.start()
+
+    out = connect(args.connect) if args.connect else sys.stdout
+    try:
+        sent, dropped, seconds = replay(out, bodies, args.rate, args.duration, args.batch, args.max_lag)
+    except (KeyboardInterrupt, BrokenPipeError):
+        return
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+    print(f"Sent {sent} samples in {seconds:.2f} s ({sent / seconds:.0f} samples/s), "
+          f"dropped {dropped} late samples", file=sys.stderr)
+    if source:
+        # Приёмник дочитывает то, что ещё лежит в буферах сокета
+        deadline = time.perf_counter() + 10
+        while source.stats()["received"] + source.malformed < sent and time.perf_counter() < deadline:
+            time.sleep(0.05)
+            source.flush()
+        stats = source.stats()
+        print(f"Received {stats['received']} samples ({stats['received'] / seconds:.0f} samples/s), "
+              f"lost {sent - stats['received']}, overwritten in ring {stats['overwritten']}, "
+              f"malformed {stats['malformed']}, ring {source.ring.memory_usage() / 1024 / 1024:.1f} MB",
+              file=sys.stderr)
+        source.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,248 @@
+"""
+Набор замеров производительности: загрузка, классификация столбцов, построение, отрисовка
+и взаимодействие на наборах данных разного размера (строки x числовые столбцы x флаги состояния).
+Данные создаются демо-генераторами с фиксированным зерном, отрисовка - на Agg без окна.
+
+    python benchmarks/suite.py --output results.json
+    python benchmarks/suite.py --scales small medium --baseline baseline.json --threshold 0.2
+
+Время стадии - лучшее из --repeat прогонов. Пиковая память стадии (tracemalloc, включая
+массивы numpy) измеряется отдельным прогоном, чтобы трассировка не искажала время.
+С --baseline результаты сравниваются с сохранённым файлом; при росте времени или памяти
+больше порога код выхода - 1
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import matplotlib
+matplotlib.use("Agg")
+
+import numpy as np
+import pandas as pd
+
+from batch_render import HeadlessApp
+from demo_batt import BatteryDemoGenerator
+from demo_synth import SyntheticDemoGenerator
+from file_handler import DataLoader
+
+# Имя -> (строки, числовые столбцы, флаги состояния); batt - демо-данные батареи как есть
+SCALES = {
+    "batt": None,
+    "small": (20000, 4, 4),
+    "medium": (200000, 8, 24),
+    "large": (500000, 16, 32),
+}
+PERCENTS = 2                                # Процентных столбцов и процессов в каждом наборе
+PROCESSES = 2
+DEFAULT_SCALES = ("batt", "small", "medium")
+STAGES = ("generate", "load", "classify", "plot", "draw", "click", "pan")
+START_TIME = pd.Timestamp("2025-01-01")     # Метки времени не зависят от момента запуска
+CLICKS = 5                                  # Кликов по флагу за прогон; время - среднее на клик
+MIN_SECONDS = 0.01                          # Более короткие стадии не считаются регрессией - это шум
+
+
+def generate(scale, seed):
+    if SCALES[scale] is not None:
+        rows, numeric, flags = SCALES[scale]
+        # Строка в секунду от START_TIME, как в журналах стенда; столбцы - ровно по mix
+        mix = (numeric, PERCENTS, PROCESSES, flags)
+        return SyntheticDemoGenerator(rows, sum(mix), seed=seed, mix=mix).generate_data()
+    random.seed(seed)
+    np.random.seed(seed)
+    df = BatteryDemoGenerator().generate_data()
+    first = df.columns[0]
+    return df.assign(**{first: df[first] - df[first].iloc[0] + START_TIME})
+
+
+class Run:
+    """Один прогон всех стадий для одного набора данных; measure - время или пиковая память стадии"""
+
+    def __init__(self, measure):
+        self.measure = measure
+        self.values = {}
+
+    def stage(self, name, func, count=1):
+        """Выполняет func; время делится на count - число одинаковых действий внутри"""
+        gc.collect()
+        if self.measure == "memory":
+            tracemalloc.reset_peak()
+            base = tracemalloc.get_traced_memory()[0]
+            result = func()
+            self.values[name] = (tracemalloc.get_traced_memory()[1] - base) / 1024 / 1024
+        else:
+            start = time.perf_counter()
+            result = func()
+            self.values[name] = (time.perf_counter() - start) / count
+        return result
+
+
+def redraw(app):
+    app.render_scheduler.prepare()
+    app.canvas.draw()
+
+
+def click_flags(app):
+    """Клики по первому флагу в CLICKS точках - с теми полями события, что FlagManager получает от matplotlib"""
+    x = app.data_loader.x_values
+    ax = app.flag_matrix.ax if app.flag_matrix is not None else app.flag_axes[0]
+    for xdata in np.linspace(x[0], x[-1], CLICKS + 2)[1:-1]:
+        app.plot_manager.reset_x_view()
+        # y 0.5 - первая строка матрицы или середина полосы
+        app.flag_manager.on_flag_click(SimpleNamespace(inaxes=ax, xdata=xdata, ydata=0.5))
+        redraw(app)
+
+
+def pan(app):
+    """Четверть данных и CLICKS сдвигов на половину видимого диапазона, каждый с полной перерисовкой"""
+    app.plot_manager.reset_x_view()
+    x0, x1 = app.ax_main.get_xlim()
+    width = (x1 - x0) / 4
+    app.ax_main.set_xlim(x0, x0 + width)
+    redraw(app)
+    for _ in range(CLICKS):
+        x0 += width / 2
+        app.ax_main.set_xlim(x0, x0 + width)
+        redraw(app)
+
+
+def run_scale(scale, seed, measure, tmp_dir):
+    run = Run(measure)
+    # Настройки по умолчанию, а не settings.ini текущей папки: результаты не зависят от пользователя
+    config_file = os.path.join(tmp_dir, "settings.ini")
+    df = run.stage("generate", lambda: generate(scale, seed))
+    path = os.path.join(tmp_dir, f"{scale}.csv")
+    if not os.path.exists(path):
+        df.to_csv(path, index=False)
+
+    loader = run.stage("load", lambda: DataLoader(root=None, file_path=path))
+
+    def classify():
+        # Путь форматов без потокового чтения (Excel, демо): готовый DataFrame -> типы столбцов
+        loader.df = df.copy()
+        loader.process_data()
+    run.stage("classify", classify)
+    rows = len(loader.x_values)
+    del loader
+
+    # Приложение загружает файл заново: время построения берётся без загрузки,
+    # а пиковая память - вместе с ней (данные и артисты занимают память одновременно)
+    app = run.stage("plot", lambda: HeadlessApp(path, config_file=config_file))
+    if measure == "time":
+        run.values["plot"] = app.timings["plot"]
+    run.stage("draw", lambda: app.canvas.draw())
+    if app.data_loader.flag_columns:
+        run.stage("click", lambda: click_flags(app), CLICKS)
+    run.stage("pan", lambda: pan(app), CLICKS + 1)
+    return rows, run.values
+
+
+def run_suite(scales, seed, repeat, memory):
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for scale in scales:
+            times = []
+            for _ in range(repeat):
+                rows, values = run_scale(scale, seed, "time", tmp_dir)
+                times.append(values)
+            result = {"rows": rows, "seconds": {stage: min(values[stage] for values in times)
+                                                for stage in STAGES if stage in times[0]}}
+            if memory:
+                tracemalloc.start()
+                _, result["peak_mb"] = run_scale(scale, seed, "memory", tmp_dir)
+                tracemalloc.stop()
+            results[scale] = result
+            print_scale(scale, result)
+    return results
+
+
+def print_scale(scale, result):
+    peaks = result.get("peak_mb", {})
+    print(f"{scale}: {result['rows']} rows")
+    for stage, seconds in result["seconds"].items():
+        peak = f"{peaks[stage]:>10.1f}" if stage in peaks else ""
+        print(f"  {stage:<10}{seconds * 1000:>10.1f} ms{peak}{' MB' if peak else ''}")
+
+
+def compare(results, baseline, threshold):
+    """Стадии, которые медленнее или тяжелее базовых больше чем на threshold; печатает сравнение"""
+    regressions = []
+    print(f"\n{'scale':<8}{'stage':<10}{'base, ms':>10}{'now, ms':>10}{'ratio':>8}{'base, MB':>10}{'now, MB':>10}")
+    for scale, result in results.items():
+        base = baseline.get("results", {}).get(scale)
+        if base is None:
+            print(f"{scale:<8}not in the baseline")
+            continue
+        for stage, seconds in result["seconds"].items():
+            base_seconds = base["seconds"].get(stage)
+            if base_seconds is None:
+                continue
+            ratio = seconds / base_seconds if base_seconds else float("inf")
+            peak, base_peak = result.get("peak_mb", {}).get(stage), base.get("peak_mb", {}).get(stage)
+            marks = []
+            if seconds > base_seconds * (1 + threshold) and seconds - base_seconds > MIN_SECONDS:
+                marks.append("time")
+            if peak is not None and base_peak is not None and peak > base_peak * (1 + threshold) and peak - base_peak > 1:
+                marks.append("memory")
+            memory = f"{base_peak:>10.1f}{peak:>10.1f}" if peak is not None and base_peak is not None else ""
+            print(f"{scale:<8}{stage:<10}{base_seconds * 1000:>10.1f}{seconds * 1000:>10.1f}{ratio:>8.2f}{memory}"
+                  f"{'  REGRESSION: ' + ', '.join(marks) if marks else ''}")
+            regressions += [(scale, stage, mark) for mark in marks]
+    return regressions
+
+
+def environment(args):
+    return {
+        "date": pd.Timestamp.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "matplotlib": matplotlib.__version__,
+        "seed": args.seed,
+        "repeat": args.repeat,
+        "scales": {scale: SCALES[scale] for scale in args.scales},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="PandoRa performance benchmark suite")
+    parser.add_argument("--scales", nargs="+", choices=list(SCALES), default=list(DEFAULT_SCALES))
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per scale; the best one is reported")
+    parser.add_argument("--no-memory", action="store_true", help="Skip the peak memory run")
+    parser.add_argument("--output", default=None, help="Write results to this JSON file")
+    parser.add_argument("--baseline", default=None, help="Compare with results saved earlier by --output")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="Allowed slowdown or memory growth against the baseline, 0.2 = 20%%")
+    args = parser.parse_args()
+
+    results = run_suite(args.scales, args.seed, max(args.repeat, 1), not args.no_memory)
+    report = {"environment": environment(args), "results": results}
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} regression(s) over {args.threshold:.0%}")
+            sys.exit(1)
+        print(f"No regressions over {args.threshold:.0%}")
+
+
+if __name__ == "__main__":
+    main()
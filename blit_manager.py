@@ -0,0 +1,303 @@
+import time
+from contextlib import contextmanager
+import numpy as np
+from matplotlib.colors import to_rgba
+from matplotlib.transforms import Bbox
+
+
+class BlitManager:
+    """
+    Быстрые кадры при перетаскивании графика. После каждой полной отрисовки запоминается
+    статический слой (всё, кроме анимированных артистов вроде легенды). Во время перетаскивания
+    содержимое осей берётся из этой картинки со сдвигом или растяжением, деления с подписями
+    сдвигаются вместе с ними и время от времени рисуются заново, данные из-за края картинки
+    дорисовываются без делений и подписей, а по отпусканию кнопки выполняется одна обычная полная отрисовка
+    """
+    SLOW_FRAME_MS = 30
+    EDGE_PX = 2
+    TICK_MS = 150           # Деления с подписями одной из осей рисуются заново не чаще, между этим - сдвигаются
+    REFRESH_BLANK = 0.02    # Содержимое оси обновляется, если вне её картинки оказалось больше этой доли оси
+    REFRESH_BUDGET_MS = 8   # Время кадра на обновление содержимого осей
+
+    def __init__(self, app):
+        self.app = app
+        self.animated = {}      # имя -> артист, который рисуется поверх статического слоя
+        self.background = None  # Статический слой последней полной отрисовки
+        self.overlays = []      # Картинки анимированных артистов на момент полной отрисовки
+        self.drag = None        # Состояние текущего перетаскивания
+        self.frame_times = []   # Время кадров последнего перетаскивания, с
+
+    def connect(self):
+        self.app.canvas.mpl_connect("draw_event", self.on_draw)
+
+    def add_animated(self, name, artist):
+        """Артист исключается из статического слоя и рисуется отдельно (предыдущий с тем же именем забывается)"""
+        artist.set_animated(True)
+        self.animated[name] = artist
+
+    @contextmanager
+    def static(self):
+        """Временно рисовать анимированных артистов как обычных - для сохранения в файл"""
+        artists = list(self.animated.values())
+        for artist in artists:
+            artist.set_animated(False)
+        try:
+            yield
+        finally:
+            for artist in artists:
+                artist.set_animated(True)
+
+    def on_draw(self, event):
+        """После полной отрисовки: запомнить статический слой и дорисовать анимированных артистов"""
+        canvas = self.app.canvas
+        renderer = canvas.get_renderer()
+        self.background = canvas.copy_from_bbox(self.app.fig.bbox)
+        self.overlays = []
+        for artist in self.animated.values():
+            if artist.figure is None or not artist.get_visible():
+                continue
+            self.app.fig.draw_artist(artist)
+            self.overlays.append(canvas.copy_from_bbox(artist.get_window_extent(renderer).padded(1)))
+
+    def blit_artists(self, artists):
+        """Статический слой с анимированными артистами и поверх - artists, без полной отрисовки"""
+        if self.background is None:
+            return
+        canvas = self.app.canvas
+        canvas.restore_region(self.background)
+        for overlay in self.overlays:
+            canvas.restore_region(overlay)
+        for artist in artists:
+            if artist.get_visible():
+                self.app.fig.draw_artist(artist)
+        canvas.blit(self.app.fig.bbox)
+
+    def begin_drag(self):
+        """False - статического слоя ещё нет, перетаскивание отрисовывается обычным способом"""
+        if self.background is None:
+            return False
+        app = self.app
+        flag_axes = [ax for ax in app.flag_axes if ax.get_visible()]
+        pixels = np.asarray(self.background)
+        pixels = pixels.view(np.uint32).reshape(pixels.shape[:2])
+        now = time.perf_counter()
+        decor = self.decoration_bbox(flag_axes)
+        box = app.ax_main.bbox
+        axes = [(ax, ax.transData.frozen(), self.color(ax.patch.get_facecolor())) for ax in [app.ax_main] + flag_axes]
+        self.drag = {
+            "axes": axes,
+            "frame": self.frame(axes, decor),
+            "pixels": pixels.copy(),    # Содержимое осей - из статического слоя или последнего обновления
+            # Полосы с делениями и подписями: полоса под осью сдвигается по x, слева и справа - по y
+            # своих осей. Для каждой - пределы оси и время последней отрисовки, а картинка у них
+            # общая, полосы не пересекаются
+            "tick_pixels": pixels.copy(),
+            "ticks": [{"axis": axis, "extents": extents, "transform": axis.axes.transData.frozen(),
+                       "view": tuple(axis.get_view_interval()), "time": now}
+                      for axis, extents in ((app.ax_main.xaxis, (decor.x0, decor.y0, decor.x1, box.y0)),
+                                            (app.ax_main.yaxis, (decor.x0, box.y0, box.x0, decor.y1)),
+                                            (app.ax_percent.yaxis, (box.x1, box.y0, decor.x1, decor.y1)))],
+            "ticks_time": now,
+        }
+        # Линии уже есть на картинке - прореживать их под каждый кадр незачем
+        app.lod_manager.suspended = True
+        self.frame_times = []
+        return True
+
+    def frame(self, axes, decor):
+        """
+        Неподвижная часть кадра: статический слой, где область делений залита цветом фона, а в осях
+        оставлены только их фон и рамки (spines рисуются один раз за перетаскивание)
+        """
+        app = self.app
+        app.canvas.restore_region(self.background)
+        self.fill(decor.extents, self.color(app.fig.get_facecolor()))
+        for ax, _, face in axes:
+            self.fill(ax.bbox.extents, face)
+        for ax in [ax for ax, _, _ in axes] + [app.ax_percent]:
+            for spine in ax.spines.values():
+                ax.draw_artist(spine)
+        pixels = np.asarray(app.canvas.buffer_rgba())
+        return pixels.view(np.uint32).reshape(pixels.shape[:2]).copy()
+
+    @staticmethod
+    def color(color):
+        """Цвет matplotlib как пиксель картинки холста (RGBA по байту)"""
+        return np.array([round(c * 255) for c in to_rgba(color)], dtype=np.uint8).view(np.uint32)[0]
+
+    def decoration_bbox(self, flag_axes):
+        """
+        Область основной оси с делениями и подписями - она собирается заново в каждом кадре.
+        Подписи флагов не меняются и остаются из статического слоя
+        """
+        app = self.app
+        renderer = app.canvas.get_renderer()
+        bbox = Bbox.union([Bbox.from_extents(0, 0, app.fig.bbox.width, app.ax_main.bbox.y1),
+                           app.ax_main.xaxis.get_tightbbox(renderer),
+                           app.ax_main.yaxis.get_tightbbox(renderer),
+                           app.ax_percent.yaxis.get_tightbbox(renderer)])
+        if flag_axes:
+            bbox.y1 = max(min(bbox.y1, min(ax.bbox.y0 for ax in flag_axes)), app.ax_main.bbox.y1)
+        return bbox
+
+    def drag_frame(self):
+        """
+        Кадр перетаскивания. Растеризация подписей делений - самая дорогая часть кадра, поэтому
+        раз в TICK_MS заново рисуются деления только одной оси - изменившейся и дольше всех не
+        рисованной, а между этим картинка делений сдвигается вместе с осью.
+        В остальных кадрах данные, которых не было на картинке, дорисовываются обновлением содержимого
+        осей, у которых пустая часть больше REFRESH_BLANK
+        """
+        start = time.perf_counter()
+        ticks = start - self.drag["ticks_time"] >= self.TICK_MS / 1000
+        if not ticks:
+            self.refresh()
+        self.compose(ticks)
+        self.frame_times.append(time.perf_counter() - start)
+
+    def compose(self, ticks):
+        """
+        Кадр из статического слоя; ticks - нарисовать заново деления одной оси, остальные - сдвинуть
+        их прошлую картинку. Фон и рамки осей не рисуются, а копируются из неподвижной части кадра
+        """
+        app = self.app
+        drag = self.drag
+        target, _ = self.region(app.fig.bbox.extents)
+        target[...] = drag["frame"]
+        redraw = None
+        if ticks:
+            changed = [strip for strip in drag["ticks"] if tuple(strip["axis"].get_view_interval()) != strip["view"]]
+            redraw = min(changed, key=lambda strip: strip["time"], default=None)
+        for strip in drag["ticks"]:
+            if strip is not redraw:
+                along_x = strip["axis"].axis_name == "x"
+                self.paste_transformed(drag["tick_pixels"], strip["extents"],
+                                       strip["axis"].axes.transData.inverted() + strip["transform"],
+                                       along_x=along_x, along_y=not along_x)
+        for ax, old_transform, _ in drag["axes"]:
+            self.paste_transformed(drag["pixels"], ax.bbox.padded(-self.EDGE_PX).extents,
+                                   ax.transData.inverted() + old_transform)
+        if redraw is not None:
+            axis = redraw["axis"]
+            axis.axes.draw_artist(axis)
+            target, region = self.region(redraw["extents"])
+            if region is not None:
+                drag["tick_pixels"][region] = target[region]
+            redraw.update(transform=axis.axes.transData.frozen(),
+                          view=tuple(axis.get_view_interval()), time=time.perf_counter())
+        if ticks:
+            drag["ticks_time"] = time.perf_counter()
+        for overlay in self.overlays:
+            app.canvas.restore_region(overlay)
+        app.canvas.blit(app.fig.bbox)
+
+    def blank_fraction(self, ax, old_transform):
+        """Доля оси, которой нет на картинке, из которой сдвигается её содержимое"""
+        box = ax.bbox
+        old = (ax.transData.inverted() + old_transform).transform([[box.x0, box.y0], [box.x1, box.y1]])
+        cover = 1.0
+        for i, lo, hi in ((0, box.x0, box.x1), (1, box.y0, box.y1)):
+            a, b = sorted(old[:, i])
+            if hi > lo:
+                cover *= max(min(b, hi) - max(a, lo), 0) / (hi - lo)
+        return 1.0 - cover
+
+    def refresh(self):
+        """
+        Содержимое осей с данными текущего вида посреди перетаскивания. Рисуются только линии и
+        области - без делений, подписей и рамок, поэтому это во много раз быстрее полной отрисовки.
+        Оси обновляются по одной, начиная с самой пустой, пока не истечёт REFRESH_BUDGET_MS -
+        остальные дождутся следующего кадра
+        """
+        app = self.app
+        drag = self.drag
+        start = time.perf_counter()
+        blank = [(self.blank_fraction(ax, old_transform), -i) for i, (ax, old_transform, _) in enumerate(drag["axes"])]
+        stale = [-i for fraction, i in sorted(blank, reverse=True) if fraction > self.REFRESH_BLANK]
+        if not stale:
+            return
+        lod_manager = app.lod_manager
+        lod_manager.suspended = False
+        lod_manager.refresh()
+        lod_manager.suspended = True
+        for i in stale:
+            ax, _, face = drag["axes"][i]
+            target, region = self.region(ax.bbox.extents)
+            if region is None:
+                continue
+            target[region] = face
+            # Процентная ось лежит поверх основной и рисуется после неё, как при полной отрисовке
+            for content_ax in [ax, app.ax_percent] if ax is app.ax_main else [ax]:
+                decorations = {content_ax.patch, content_ax.xaxis, content_ax.yaxis, *content_ax.spines.values()}
+                artists = [artist for artist in content_ax.get_children()
+                           if artist not in decorations and artist.get_visible() and not artist.get_animated()]
+                for artist in sorted(artists, key=lambda artist: artist.get_zorder()):
+                    content_ax.draw_artist(artist)
+            drag["pixels"][region] = target[region]
+            drag["axes"][i] = (ax, ax.transData.frozen(), face)
+            if time.perf_counter() - start >= self.REFRESH_BUDGET_MS / 1000:
+                break
+
+    def region(self, extents):
+        """Срезы строк и столбцов картинки холста для прямоугольника extents (пиксели холста) или None"""
+        target = np.asarray(self.app.canvas.buffer_rgba())
+        target = target.view(np.uint32).reshape(target.shape[:2])
+        height, width = target.shape
+        x0, y0, x1, y1 = (int(round(v)) for v in extents)
+        x0, y0, x1, y1 = max(x0, 0), max(y0, 0), min(x1, width), min(y1, height)
+        if x1 <= x0 or y1 <= y0:
+            return target, None
+        return target, (slice(height - y1, height - y0), slice(x0, x1))   # Строки идут сверху вниз
+
+    def fill(self, extents, color):
+        """Заливка прямоугольника extents (пиксели холста) пикселем color"""
+        target, region = self.region(extents)
+        if region is not None:
+            target[region] = color
+
+    def paste_transformed(self, pixels, extents, to_old, along_x=True, along_y=True):
+        """
+        Переносит прямоугольник extents (пиксели холста) из картинки pixels так, как изменились
+        пределы оси: для каждого пикселя - точка данных по текущим пределам и её пиксель на старой
+        картинке (to_old). Перемещение - сдвиг картинки, масштабирование правой кнопкой - растяжение.
+        along_x/along_y - по каким направлениям переносить, по остальным пиксели остаются на месте
+        """
+        target, region = self.region(extents)
+        if region is None:
+            return
+        height = pixels.shape[0]
+        rows, cols = (np.arange(s.start, s.stop) for s in region)
+        x0, x1 = cols[0], cols[-1] + 1
+        y0, y1 = height - rows[-1] - 1, height - rows[0]
+        src_cols, src_rows = cols, rows
+        if along_x:
+            old = to_old.transform(np.column_stack([cols + 0.5, np.full(len(cols), height - rows[0] - 0.5)]))
+            src_cols = np.floor(old[:, 0]).astype(int)
+        if along_y:
+            old = to_old.transform(np.column_stack([np.full(len(rows), x0 + 0.5), height - rows - 0.5]))
+            src_rows = height - 1 - np.floor(old[:, 1]).astype(int)
+        keep_cols = (src_cols >= x0) & (src_cols < x1)
+        keep_rows = (src_rows >= height - y1) & (src_rows < height - y0)
+        if not keep_cols.any() or not keep_rows.any():
+            return
+        # Отображение монотонное - попавшие в старую картинку пиксели идут подряд
+        c0, c1 = cols[keep_cols][[0, -1]]
+        r0, r1 = rows[keep_rows][[0, -1]]
+        target[r0:r1 + 1, c0:c1 + 1] = pixels[self.index(src_rows[keep_rows])][:, self.index(src_cols[keep_cols])]
+
+    @staticmethod
+    def index(src):
+        """Сдвиг (перемещение) - срез: копирование без промежуточных массивов, растяжение - массив индексов"""
+        if src[-1] - src[0] == len(src) - 1:
+            return slice(src[0], src[-1] + 1)
+        return src
+
+    def end_drag(self):
+        self.app.lod_manager.suspended = False
+        self.app.lod_manager.refresh()
+        self.drag = None
+        if self.frame_times:
+            times = np.array(self.frame_times) * 1000
+            slow = int((times > self.SLOW_FRAME_MS).sum())
+            print(f"Drag: {len(times)} frames, median {np.median(times):.1f} ms, "
+                  f"max {times.max():.1f} ms, over {self.SLOW_FRAME_MS} ms: {slow}")
@@ -0,0 +1,215 @@
+import hashlib
+import json
+import os
+import re
+import shutil
+import zipfile
+import numpy as np
+import pandas as pd
+from stream_reader import TimeFilter
+
+
+class CacheManager:
+    """Бинарный колоночный кэш разобранных файлов данных (.npz рядом с остальными записями кэша)"""
+    FORMAT_VERSION = 1
+    DEFAULT_DIR = os.path.join(os.path.expanduser("~"), ".cache", "pandora")
+    DEFAULT_MAX_SIZE_MB = 1024
+    HASH_CHUNK = 1 << 20
+    ENTRY_NAME = re.compile(r"[0-9a-f]{40}\.npz")     # Имя записи из entry_path - sha1 пути
+
+    def __init__(self, cache_dir=None, max_size_mb=None):
+        self.cache_dir = cache_dir or self.DEFAULT_DIR
+        self.max_size = int((max_size_mb or self.DEFAULT_MAX_SIZE_MB) * 1024 * 1024)
+
+    def entry_path(self, file_path):
+        """Имя записи кэша определяется абсолютным путём к исходному файлу"""
+        key = hashlib.sha1(os.path.abspath(file_path).encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, f"{key}.npz")
+
+    def file_hash(self, file_path):
+        digest = hashlib.blake2b(digest_size=16)
+        with open(file_path, "rb") as f:
+            for chunk in iter(lambda: f.read(self.HASH_CHUNK), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def _source_key(self, file_path, with_hash=True):
+        stat = os.stat(file_path)
+        key = {
+            "path": os.path.abspath(file_path),
+            "size": stat.st_size,
+            "mtime": stat.st_mtime_ns,
+        }
+        if with_hash:
+            key["hash"] = self.file_hash(file_path)
+        return key
+
+    def _is_valid(self, meta, file_path):
+        """Запись действительна, если совпадают путь и размер, а также mtime или хэш содержимого"""
+        if meta.get("version") != self.FORMAT_VERSION:
+            return False
+        source = meta.get("source", {})
+        current = self._source_key(file_path, with_hash=False)
+        if source.get("path") != current["path"] or source.get("size") != current["size"]:
+            return False
+        if source.get("mtime") == current["mtime"]:
+            return True
+        # Файл «потрогали», но содержимое могло не измениться
+        if source.get("hash") != self.file_hash(file_path):
+            return False
+        # Содержимое то же - новый mtime попадёт в запись, и следующие открытия хэш не считают
+        source["mtime"] = current["mtime"]
+        return True
+
+    def load(self, file_path, select=None, time_range=None):
+        """
+        Возвращает (df, columns) из кэша или None, если записи нет или она устарела.
+        columns - словарь списков numeric/percent/flag/bool столбцов,
+        select - читать только время и эти столбцы (остальные массивы .npz не распаковываются),
+        time_range - оставить только строки в диапазоне (начало, конец)
+        """
+        path = self.entry_path(file_path)
+        if not os.path.exists(path):
+            return None
+        try:
+            result = self.read(path, select, time_range, file_path)
+            if result is None:
+                self.remove(file_path)
+                return None
+            os.utime(path)  # Отметка для вытеснения давно не использованных записей
+            return result
+        except Exception as e:
+            print(f"Cache read error: {e}")
+            self.remove(file_path)
+            return None
+
+    def read(self, path, select=None, time_range=None, file_path=None):
+        """
+        Читает файл .npz формата кэша: (df, columns) или None, если формат другой версии или запись
+        устарела относительно исходного файла file_path. Без file_path файл читается как есть -
+        так открываются .npz, записанные генератором демо-данных
+        """
+        touched = False
+        with np.load(path, allow_pickle=False) as data:
+            meta = json.loads(str(data["meta"]))
+            if meta.get("version") != self.FORMAT_VERSION:
+                return None
+            if file_path is not None:
+                mtime = meta.get("source", {}).get("mtime")
+                if not self._is_valid(meta, file_path):
+                    return None
+                touched = meta["source"]["mtime"] != mtime
+            keep = None
+            if time_range:
+                time_filter = TimeFilter(time_range)
+                keep, _ = time_filter.apply(data["c0"])
+            names = [(i, name) for i, name in enumerate(meta["names"])
+                     if i == 0 or select is None or name in select]
+            df = pd.DataFrame({name: data[f"c{i}"] if keep is None else data[f"c{i}"][keep]
+                               for i, name in names}, copy=False)
+            if time_range:
+                row_bytes = sum(df[name].dtype.itemsize for _, name in names)
+                time_filter.report(row_bytes, 0.0)
+        if touched:
+            self.write_meta(path, meta)
+        return df, meta["columns"]
+
+    def write_meta(self, path, meta):
+        """Заменяет метаданные записи; массивы столбцов копируются в новый архив как есть"""
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            with zipfile.ZipFile(path) as src, zipfile.ZipFile(tmp_path, "w", allowZip64=True) as dst:
+                for info in src.infolist():
+                    if info.filename == "meta.npy":
+                        with dst.open("meta.npy", "w") as f:
+                            np.lib.format.write_array(f, np.array(json.dumps(meta)), allow_pickle=False)
+                        continue
+                    copy = zipfile.ZipInfo(info.filename, info.date_time)
+                    copy.compress_type = info.compress_type
+                    copy.file_size = info.file_size
+                    with src.open(info) as fin, dst.open(copy, "w") as fout:
+                        shutil.copyfileobj(fin, fout, self.HASH_CHUNK)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            print(f"Cache write error: {e}")
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def store(self, file_path, data_loader):
+        """Сохраняет метки времени и классифицированные столбцы загрузчика"""
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            self.write(self.entry_path(file_path), data_loader, self._source_key(file_path))
+            self.evict()
+        except Exception as e:
+            print(f"Cache write error: {e}")
+
+    def write(self, path, data_loader, source):
+        """Записывает данные загрузчика в .npz формата кэша; source - откуда данные (для проверки записи)"""
+        columns = {
+            "numeric_columns": list(data_loader.numeric_columns),
+            "percent_columns": list(data_loader.percent_columns),
+            "flag_columns": list(data_loader.flag_columns),
+            "bool_columns": list(data_loader.bool_columns),
+        }
+        time_col = str(data_loader.df.columns[0])
+        names = [time_col] + [col for col in data_loader.df.columns[1:]
+                              if any(col in cols for cols in columns.values())]
+        arrays = {"c0": data_loader.timestamps.to_numpy(dtype="datetime64[ns]")}
+        for i, name in enumerate(names[1:], start=1):
+            arrays[f"c{i}"] = data_loader.df[name].to_numpy()
+        meta = {
+            "version": self.FORMAT_VERSION,
+            "source": source,
+            "names": names,
+            "columns": columns,
+        }
+
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(f, meta=np.array(json.dumps(meta)), **arrays)
+        os.replace(tmp_path, path)
+
+    def entries(self):
+        """
+        Записи кэша (время изменения, размер, путь) - только файлы с именами из entry_path:
+        evict и purge не должны удалять другие .npz, если кэш указан в папку с данными
+        """
+        if not os.path.isdir(self.cache_dir):
+            return []
+        result = []
+        for name in os.listdir(self.cache_dir):
+            if self.ENTRY_NAME.fullmatch(name):
+                path = os.path.join(self.cache_dir, name)
+                stat = os.stat(path)
+                result.append((stat.st_mtime, stat.st_size, path))
+        return result
+
+    def evict(self):
+        """Удаляет самые давно использованные записи, пока кэш не уложится в max_size"""
+        entries = sorted(self.entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_size:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError as e:
+                print(f"Cache eviction error: {e}")
+
+    def remove(self, file_path):
+        path = self.entry_path(file_path)
+        if os.path.exists(path):
+            try:
+                os.remove(path)
+            except OSError as e:
+                print(f"Cache remove error: {e}")
+
+    def purge(self):
+        for _, _, path in self.entries():
+            try:
+                os.remove(path)
+            except OSError as e:
+                print(f"Cache purge error: {e}")
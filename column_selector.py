@@ -141,8 +141,8 @@ class ColumnSelector:
 
         # Заполняем данными
         for col in columns:
-            unique_values = self.data_loader.df[col].nunique()
-            tree.insert("", tk.END, values=("✓" if unique_values > 1 else "", col))
+            varies = self.data_loader.column_varies(col)
+            tree.insert("", tk.END, values=("✓" if varies else "", col))
 
         # Привязываем обработчики
         tree.bind("<Button-1>", lambda e: self.on_tree_click(e, tree))
@@ -177,6 +177,9 @@ class ColumnSelector:
         else:
             selection['percents'] = []
 
+        # В ленивом режиме данные столбцов загружаются при первом выборе
+        self.data_loader.ensure_columns([col for cols in selection.values() for col in cols])
+
         self.on_apply_callback(selection)
         self.close_window()
 
@@ -0,0 +1,39 @@
+from collections import OrderedDict
+
+
+class ColumnStore:
+    """Ленивая загрузка столбцов DataLoader по требованию с вытеснением давно не используемых"""
+    DEFAULT_BUDGET_MB = 512
+
+    def __init__(self, data_loader, read_columns, budget_mb=None):
+        """read_columns(select) -> (df, columns): кэш или потоковый читатель исходного файла"""
+        self.data_loader = data_loader
+        self.read_columns = read_columns
+        self.budget = int((budget_mb or self.DEFAULT_BUDGET_MB) * 1024 * 1024)
+        self.loaded = OrderedDict()     # имя столбца -> занимаемые байты, от давно не используемых к свежим
+
+    def ensure(self, names):
+        """Загружает недостающие столбцы из names и вытесняет лишние под бюджет памяти"""
+        known = set(self.data_loader.all_columns())
+        names = [name for name in names if name in known]
+        missing = [name for name in names if name not in self.loaded]
+        if missing:
+            df, _ = self.read_columns(missing)
+            for name in missing:
+                self.loaded[name] = self.data_loader.add_column(name, df[name].to_numpy())
+        for name in names:
+            self.loaded.move_to_end(name)
+        self.evict(keep=set(names))
+
+    def evict(self, keep=()):
+        total = sum(self.loaded.values())
+        for name in list(self.loaded):
+            if total <= self.budget:
+                break
+            if name in keep:
+                continue
+            total -= self.loaded.pop(name)
+            self.data_loader.drop_column(name)
+
+    def memory_usage(self):
+        return sum(self.loaded.values())
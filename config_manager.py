@@ -3,6 +3,18 @@ import os
 import tkinter as tk
 
 
+class PlainVar:
+    """Флаг с интерфейсом tk.BooleanVar (get/set) - для отрисовки без окна, где переменные Tk не создать"""
+    def __init__(self, value=False):
+        self.value = value
+
+    def get(self):
+        return self.value
+
+    def set(self, value):
+        self.value = value
+
+
 class ConfigManager:
     def __init__(self, config_file="settings.ini"):
         self.config_file = config_file
@@ -109,14 +121,14 @@ class ConfigManager:
             self.config.add_section(section)
         self.config.set(section, option, str(value))
 
-    def load_app_config(self, app):
-        """Загружает все конфигурационные параметры в приложение"""
+    def load_app_config(self, app, var_type=tk.BooleanVar):
+        """Загружает все конфигурационные параметры в приложение; var_type - тип переключателей (без окна - PlainVar)"""
         # Параметры отображения
         app.font_size = self.getint("Display", "font_size")
         app.theme = self.get("Display", "theme")
-        app.show_time_only = tk.BooleanVar(value=self.getboolean("Display", "show_time_only"))
-        app.show_vertical_lines = tk.BooleanVar(value=self.getboolean("Display", "show_vertical_lines"))
-        app.lock_percent_scale = tk.BooleanVar(value=self.getboolean("Display", "lock_percent_scale"))
+        app.show_time_only = var_type(value=self.getboolean("Display", "show_time_only"))
+        app.show_vertical_lines = var_type(value=self.getboolean("Display", "show_vertical_lines"))
+        app.lock_percent_scale = var_type(value=self.getboolean("Display", "lock_percent_scale"))
 
         # Параметры флагов
         app.flag_color = self.get("Flags", "flag_color")
@@ -124,7 +136,7 @@ class ConfigManager:
         app.flag_bg_color = self.get("Flags", "flag_bg_color")
         app.flag_bg_alpha = self.getfloat("Flags", "flag_bg_alpha")
         app.flag_height_px = self.getint("Flags", "flag_height_px")
-        app.show_flag_background = tk.BooleanVar(value=self.getboolean("Flags", "show_flag_background"))
+        app.show_flag_background = var_type(value=self.getboolean("Flags", "show_flag_background"))
         app.legend_bold = self.getboolean("Flags", "legend_bold")
 
         # Параметры процессов
@@ -0,0 +1,88 @@
+import pandas as pd
+from matplotlib.lines import Line2D
+from matplotlib.transforms import blended_transform_factory
+
+
+class CursorManager:
+    """
+    Перекрестие под мышью и значения всех отображаемых столбцов в ближайшем отсчёте.
+    Перекрестие рисуется поверх статического слоя BlitManager, без полной перерисовки
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.enabled = True
+        self.vline = None       # Через основную ось и все оси флагов
+        self.hline = None       # Только по основной оси
+        self.index = None       # (отсчёт, версия данных), для которых показаны значения
+
+    def connect(self):
+        canvas = self.app.canvas
+        canvas.mpl_connect("motion_notify_event", self.on_move)
+        canvas.mpl_connect("figure_leave_event", lambda event: self.hide())
+
+    def toggle(self):
+        self.enabled = not self.enabled
+        if not self.enabled:
+            self.hide()
+
+    def create_lines(self):
+        fig = self.app.fig
+        color = self.app.light_fg_color if self.app.theme == "light" else self.app.dark_fg_color
+        style = dict(color=color, linewidth=0.8, linestyle=":", animated=True)
+        self.vline = Line2D([0, 0], [0, 1], transform=blended_transform_factory(self.app.ax_main.transData,
+                                                                                 fig.transFigure), **style)
+        self.hline = Line2D([0, 1], [0, 0], transform=self.app.ax_main.get_yaxis_transform(), **style)
+        fig.add_artist(self.vline)
+        self.app.ax_main.add_artist(self.hline)
+
+    def on_move(self, event):
+        app = self.app
+        axes = [app.ax_main, app.ax_percent] + [ax for ax in app.flag_axes if ax.get_visible()]
+        if not self.enabled or app.blit_manager.drag is not None:
+            return
+        if event.inaxes not in axes or event.xdata is None or len(app.data_loader.x_values) == 0:
+            self.hide()
+            return
+        if self.vline is None or self.vline.figure is not app.fig:
+            self.create_lines()
+
+        index = app.data_loader.nearest_index(event.xdata)
+        x = app.data_loader.x_values[index]
+        # Вертикаль - по ближайшему отсчёту, от низа основной оси до верха верхней оси флагов
+        top = max(ax.get_position().y1 for ax in axes)
+        self.vline.set_data([x, x], [app.ax_main.get_position().y0, top])
+        self.hline.set_visible(event.inaxes in (app.ax_main, app.ax_percent))
+        if self.hline.get_visible():
+            _, y = app.ax_main.transData.inverted().transform((event.x, event.y))
+            self.hline.set_ydata([y, y])
+        self.vline.set_visible(True)
+        app.blit_manager.blit_artists([self.vline, self.hline])
+
+        # В потоковом режиме под тем же индексом после обновления уже другая запись
+        if (index, app.data_loader.data_version) != self.index:
+            self.index = (index, app.data_loader.data_version)
+            app.readout_label.config(text=self.readout(index))
+
+    def hide(self):
+        if self.vline is None or not self.vline.get_visible():
+            return
+        self.vline.set_visible(False)
+        self.hline.set_visible(False)
+        self.app.blit_manager.blit_artists([])
+
+    def readout(self, index):
+        """Метка времени и значения отображаемых столбцов в строке index (выбор - как у графика)"""
+        loader = self.app.data_loader
+        selected = getattr(self.app, 'selected_columns', {})
+        timestamp = pd.Timestamp(loader.timestamps.iloc[index])
+        parts = [timestamp.strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]]
+        for group, columns, fmt in (('numerics', loader.numeric_columns, "{:.6g}"),
+                                    ('percents', loader.percent_columns, "{:.6g}"),
+                                    ('flags', loader.flag_columns, "{:d}"),
+                                    ('bools', loader.bool_columns, "{:d}")):
+            for col in selected.get(group, columns):
+                if col in columns and col in loader.df.columns:
+                    value = loader.df[col].iloc[index]
+                    parts.append(f"{col}: " + fmt.format(int(value) if fmt == "{:d}" else value))
+        return "   ".join(parts)
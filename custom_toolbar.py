@@ -1,4 +1,61 @@
+from contextlib import nullcontext
 from matplotlib.backends.backend_tkagg import NavigationToolbar2Tk
 
 class CustomToolbar(NavigationToolbar2Tk):
-    toolitems = [t for t in NavigationToolbar2Tk.toolitems if t[0] != "Subplots"]
\ No newline at end of file
+    toolitems = [t for t in NavigationToolbar2Tk.toolitems if t[0] != "Subplots"]
+
+    def __init__(self, canvas, window, blit_manager=None, trace_manager=None):
+        self.blit_manager = blit_manager
+        self.trace_manager = trace_manager
+        self.fast_drag = False
+        super().__init__(canvas, window)
+
+    def action(self, name):
+        """Замер действия кнопки; перерисовка после него замеряется отдельно (draw)"""
+        return self.trace_manager.span(f"action:{name}") if self.trace_manager is not None else nullcontext()
+
+    def home(self, *args):
+        with self.action("home"):
+            super().home(*args)
+
+    def back(self, *args):
+        with self.action("back"):
+            super().back(*args)
+
+    def forward(self, *args):
+        with self.action("forward"):
+            super().forward(*args)
+
+    def release_zoom(self, event):
+        with self.action("zoom"):
+            super().release_zoom(event)
+
+    def press_pan(self, event):
+        super().press_pan(event)
+        self.fast_drag = (self._pan_info is not None and self.blit_manager is not None
+                          and self.blit_manager.begin_drag())
+
+    def drag_pan(self, event):
+        # Вместо draw_idle() на каждое движение мыши - кадр из сохранённого статического слоя
+        if not self.fast_drag:
+            return super().drag_pan(event)
+        if event.buttons != {self._pan_info.button}:
+            self.release_pan(None)
+            return
+        for ax in self._pan_info.axes:
+            ax.drag_pan(self._pan_info.button, event.key, event.x, event.y)
+        self.blit_manager.drag_frame()
+
+    def release_pan(self, event):
+        with self.action("pan"):
+            if self.fast_drag:
+                self.fast_drag = False
+                self.blit_manager.end_drag()
+            super().release_pan(event)
+
+    def save_figure(self, *args):
+        with self.action("save"):
+            if self.blit_manager is None:
+                return super().save_figure(*args)
+            with self.blit_manager.static():
+                return super().save_figure(*args)
@@ -1,18 +1,24 @@
 import pandas as pd
 import numpy as np
-from datetime import datetime, timedelta
+from datetime import datetime
 from scipy.signal import savgol_filter      # Реализация фильтра Савицкого-Голея
 
 
 class BatteryDemoGenerator:
-    def __init__(self):
+    """
+    Демо-данные батареи: циклы заряд - пауза - разряд - пауза со старением от цикла к циклу.
+    Кривые одного цикла считаются один раз и повторяются на все циклы массивами, поэтому
+    месяц данных с шагом 1 с строится за секунды. Шаг отсчётов задаётся sample_interval
+    """
+    def __init__(self, sample_interval=10):
         # Основные параметры батареи
         self.initial_voltage = 10800
         self.full_charge_voltage = 12600
         self.full_discharge_voltage = 9000
         self.max_current = 3000
         self.nominal_capacity = 5000  # мАч
-        self.sample_interval = 10  # секунд
+        self.sample_interval = sample_interval  # секунд
+        self.smooth_seconds = 510  # Окно сглаживания кривых: 51 отсчёт при шаге 10 с
 
         # Параметры старения
         self.capacity_degradation = 0.998  # 0.2% потери за цикл
@@ -24,6 +30,14 @@ class BatteryDemoGenerator:
         self.heat_coeff = 0.0002
         self.cooling_coeff = 0.0001
 
+    def _smooth(self, values):
+        """Фильтр Савицкого-Голея с окном smooth_seconds при любом шаге (нечётное и не длиннее кривой)"""
+        window = int(round(self.smooth_seconds / self.sample_interval)) | 1
+        window = min(window, len(values) if len(values) % 2 else len(values) - 1)
+        if window <= 3:     # Окно должно быть длиннее степени полинома
+            return values
+        return savgol_filter(values, window_length=window, polyorder=3)
+
     def _generate_charge_curve(self, duration_hours):
         """Генерирует кривые заряда с нелинейными участками"""
         steps = int(duration_hours * 3600 / self.sample_interval)
@@ -37,10 +51,7 @@ class BatteryDemoGenerator:
         current = self.max_current * np.exp(-x * 3)
 
         # Сглаживание кривых
-        voltage = savgol_filter(voltage, window_length=51, polyorder=3)
-        current = savgol_filter(current, window_length=51, polyorder=3)
-
-        return voltage, current
+        return self._smooth(voltage), self._smooth(current)
 
     def _generate_discharge_curve(self, duration_hours):
         """Генерирует кривые разряда с ускорением на низких напряжениях"""
@@ -57,10 +68,7 @@ class BatteryDemoGenerator:
         current[cutoff:] = np.linspace(-self.max_current, 0, steps - cutoff)
 
         # Сглаживание
-        voltage = savgol_filter(voltage, window_length=51, polyorder=3)
-        current = savgol_filter(current, window_length=51, polyorder=3)
-
-        return voltage, current
+        return self._smooth(voltage), self._smooth(current)
 
     def _calculate_temperature(self, current, last_temp, elapsed):
         """Расчет температуры с учетом теплообмена"""
@@ -69,11 +77,29 @@ class BatteryDemoGenerator:
         new_temp = last_temp + temp_change
         return np.clip(new_temp, self.ambient_temp, self.max_temp)
 
-    def generate_cycle(self, cycle_num):
-        """Генерирует один полный цикл с учетом старения"""
+    def _temperature_curve(self, current):
+        """
+        Температура по отсчётам цикла: t[i] = clip(t[i-1] + изменение[i]) от температуры среды.
+        Пока верхний предел не достигнут, превышение над средой - накопленная сумма изменений
+        минус её минимум на пройденном отрезке (нижний предел сбрасывает накопление).
+        Если предел достигнут - расчёт по отсчётам
+        """
+        elapsed = np.arange(len(current)) * self.sample_interval
+        power_loss = (current / 1000) ** 2 * (1.0 + 0.01 * elapsed / 3600)  # Рост сопротивления
+        change = power_loss * self.heat_coeff - self.cooling_coeff
+        change[:1] = 0      # Цикл начинается с температуры среды
+        total = np.cumsum(change)
+        temperature = self.ambient_temp + total - np.minimum.accumulate(total)
+        if len(temperature) and temperature.max() > self.max_temp:
+            temperature[0] = self.ambient_temp
+            for i in range(1, len(current)):
+                temperature[i] = self._calculate_temperature(current[i], temperature[i - 1], elapsed[i])
+        return temperature
+
+    def _cycle_curves(self):
+        """Кривые одного цикла без старения - одинаковы для всех циклов"""
         # Заряд (2 часа)
         charge_v, charge_i = self._generate_charge_curve(2)
-        charge_steps = len(charge_v)
 
         # Пауза после заряда (2 часа)
         pause_steps = int(2 * 3600 / self.sample_interval)
@@ -82,7 +108,6 @@ class BatteryDemoGenerator:
 
         # Разряд (2 часа)
         discharge_v, discharge_i = self._generate_discharge_curve(2)
-        discharge_steps = len(discharge_v)
 
         # Пауза после разряда (5 часов)
         final_pause_steps = int(5 * 3600 / self.sample_interval)
@@ -93,95 +118,50 @@ class BatteryDemoGenerator:
         voltage = np.concatenate([charge_v, pause_v, discharge_v, final_pause_v])
         current = np.concatenate([charge_i, pause_i, discharge_i, final_pause_i])
 
-        # Рассчитываем температуру
-        temperature = [self.ambient_temp]
-        for i in range(1, len(current)):
-            temp = self._calculate_temperature(
-                current[i], temperature[-1], i * self.sample_interval
-            )
-            temperature.append(temp)
-
-        # Эффект старения
-        current_capacity = self.nominal_capacity * (self.capacity_degradation ** cycle_num)
-        max_error = 5 * (self.internal_resistance_growth ** cycle_num)
-
-        # Режимы работы (числовые 0/1)
-        charge_state = (current > 50).astype(int)
-        discharge_state = (current < -50).astype(int)
-
-        # Флаги состояния (булевы)
-        fc_flag = (np.array(voltage) >= self.full_charge_voltage - 5) & (np.abs(current) < 5)
-        fd_flag = (np.array(voltage) <= self.full_discharge_voltage + 5) & (np.abs(current) < 5)
-
         return {
             'voltage': voltage,
             'current': current,
-            'temperature': temperature[:len(voltage)],
-            'capacity': current_capacity,
-            'max_error': max_error,
-            'fc_flag': fc_flag,
-            'fd_flag': fd_flag,
-            'charge_state': charge_state,
-            'discharge_state': discharge_state,
-            'steps': len(voltage)
-        }
-
-    def generate_data(self, cycles=3):
-        """Генерирует полный набор данных"""
-        data = {
-            'Timestamp': [],
-            'Voltage': [],
-            'Current': [],
-            'Temperature': [],
-            'Capacity': [],
-            'Max Error': [],
-            'Remaining Capacity': [],
-            'FC': [],
-            'FD': [],
-            'F-CHARGE': [],
-            'F-DISCHARGE': []
+            'temperature': self._temperature_curve(current),
+            # Режимы работы (числовые 0/1)
+            'charge_state': (current > 50).astype(int),
+            'discharge_state': (current < -50).astype(int),
+            # Флаги состояния (булевы)
+            'fc_flag': (voltage >= self.full_charge_voltage - 5) & (np.abs(current) < 5),
+            'fd_flag': (voltage <= self.full_discharge_voltage + 5) & (np.abs(current) < 5),
+            # Доля остаточной емкости по напряжению
+            'remaining': np.interp(voltage, [self.full_discharge_voltage, self.full_charge_voltage], [0, 1]),
         }
 
-        start_time = datetime.now()
-        elapsed = 0
-
-        for cycle in range(cycles):
-            cycle_data = self.generate_cycle(cycle)
-            cycle_length = cycle_data['steps']
-
-            # Генерация временных меток
-            cycle_timestamps = [
-                start_time + timedelta(seconds=elapsed + i * self.sample_interval)
-                for i in range(cycle_length)
-            ]
-            data['Timestamp'].extend(cycle_timestamps)
-            elapsed += cycle_length * self.sample_interval
-
-            # Заполнение данных
-            data['Voltage'].extend(cycle_data['voltage'])
-            data['Current'].extend(cycle_data['current'])
-            data['Temperature'].extend(cycle_data['temperature'])
-            data['Capacity'].extend([cycle_data['capacity']] * cycle_length)
-            data['Max Error'].extend([cycle_data['max_error']] * cycle_length)
-
-            # Расчет остаточной емкости
-            remaining_cap = np.interp(
-                cycle_data['voltage'],
-                [self.full_discharge_voltage, self.full_charge_voltage],
-                [0, cycle_data['capacity']]
-            )
-            data['Remaining Capacity'].extend(remaining_cap)
-
-            # Флаги состояния (числовые 0/1)
-            data['FC'].extend(cycle_data['fc_flag'])
-            data['FD'].extend(cycle_data['fd_flag'])
-
-            # Режимы работы (булевы)
-            data['F-CHARGE'].extend(cycle_data['charge_state'])
-            data['F-DISCHARGE'].extend(cycle_data['discharge_state'])
-
-        # Создаем DataFrame, гарантируя одинаковую длину всех массивов
-        df = pd.DataFrame(data)
+    def generate_data(self, cycles=3, start_time=None):
+        """Генерирует полный набор данных: кривые цикла повторяются cycles раз, старение - по номеру цикла"""
+        cycle = self._cycle_curves()
+        steps = len(cycle['voltage'])
+        tile = lambda values: np.tile(values, cycles)
+
+        # Эффект старения - одно значение на цикл
+        numbers = np.arange(cycles)
+        capacity = np.repeat(self.nominal_capacity * self.capacity_degradation ** numbers, steps)
+        max_error = np.repeat(5 * self.internal_resistance_growth ** numbers, steps)
+
+        # Временные метки с шагом sample_interval от начала
+        start_time = pd.Timestamp(start_time if start_time is not None else datetime.now())
+        timestamps = start_time + pd.to_timedelta(np.arange(steps * cycles) * self.sample_interval, unit="s")
+
+        df = pd.DataFrame({
+            'Timestamp': timestamps,
+            'Voltage': tile(cycle['voltage']),
+            'Current': tile(cycle['current']),
+            'Temperature': tile(cycle['temperature']),
+            'Capacity': capacity,
+            'Max Error': max_error,
+            'Remaining Capacity': tile(cycle['remaining']) * capacity,
+            # Флаги состояния (булевы)
+            'FC': tile(cycle['fc_flag']),
+            'FD': tile(cycle['fd_flag']),
+            # Режимы работы (числовые 0/1)
+            'F-CHARGE': tile(cycle['charge_state']),
+            'F-DISCHARGE': tile(cycle['discharge_state'])
+        })
 
         # Добавляем процентные данные
         df['Health %'] = 100 * (df['Voltage'] - self.full_discharge_voltage) / \
@@ -0,0 +1,256 @@
+import json
+import os
+import time
+import zipfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from scipy.signal import lfilter
+from cache_manager import CacheManager
+
+
+def csv_text(chunk):
+    """Текст куска CSV - в процессе пула: форматирование чисел дольше их генерации"""
+    return len(chunk), chunk.to_csv(header=False, index=False, lineterminator="\n")
+
+
+def ordered_map(pool, func, items, depth):
+    """pool.map в исходном порядке, но не больше depth кусков в работе - память ограничена"""
+    pending = deque()
+    for item in items:
+        pending.append(pool.submit(func, item))
+        if len(pending) >= depth:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+class SyntheticDemoGenerator:
+    """
+    Воспроизводимые синтетические данные любого размера. Каждый столбец - отдельный поток
+    случайных чисел от общего зерна, значения выдаются кусками с переносом состояния между ними,
+    поэтому данные не зависят от размера куска, а память ограничена одним куском.
+    Имена столбцов - по тем же правилам, по которым их классифицирует process_data:
+    Value_N - числовые, PRC N % - процентные, F-Process_N - процессы (0/1), State_N - флаги состояния
+    """
+    KINDS = ("numeric", "percent", "process", "state")
+    START = pd.Timestamp("2025-01-01")
+    CHUNK_CELLS = 4_000_000         # Значений в одном куске строк - около 32 МБ на float64
+    EXCEL_MAX_ROWS = 1_048_575      # Строк данных на листе Excel (без заголовка)
+    AR = 0.999                      # Память числовых сигналов: каждый отсчёт - 0.999 предыдущего плюс шум
+
+    def __init__(self, rows, cols, seed=0, toggle_rate=0.001, jitter=0.0, interval=1.0, mix=(4, 1, 1, 4)):
+        """
+        cols - число столбцов данных без метки времени, делится между типами пропорционально mix
+        (числовые, процентные, процессы, флаги состояния); toggle_rate - вероятность смены значения
+        флага на строке; jitter - случайное отклонение шага времени, доля interval (секунды)
+        """
+        if rows < 1 or cols < 1:
+            raise ValueError("Rows and columns must be positive")
+        if not 0 <= toggle_rate <= 1:
+            raise ValueError("Toggle rate must be between 0 and 1")
+        if not 0 <= jitter < 1:
+            raise ValueError("Jitter must be at least 0 and less than 1")
+        if interval <= 0 or len(mix) != len(self.KINDS) or min(mix) < 0 or sum(mix) <= 0:
+            raise ValueError("Interval and column mix must be positive")
+        self.rows = rows
+        self.seed = seed
+        self.toggle_rate = toggle_rate
+        self.jitter = jitter
+        self.interval = interval
+        self.mix = tuple(mix)
+
+        counts = [cols * weight // sum(mix) for weight in mix]
+        counts[mix.index(max(mix))] += cols - sum(counts)
+        self.kinds = ["time"] + [kind for kind, count in zip(self.KINDS, counts) for _ in range(count)]
+        self.names = ["Timestamp"]
+        for kind, count in zip(self.KINDS, counts):
+            self.names += [self.column_name(kind, i + 1) for i in range(count)]
+        self.seeds = np.random.SeedSequence(seed).spawn(len(self.names))
+
+    @staticmethod
+    def column_name(kind, n):
+        return {"numeric": f"Value_{n}", "percent": f"PRC{n} %",
+                "process": f"F-Process_{n}", "state": f"State_{n}"}[kind]
+
+    def default_chunk_rows(self):
+        return max(1000, self.CHUNK_CELLS // len(self.names))
+
+    def sizes(self, chunk_rows, rows):
+        for start in range(0, rows, chunk_rows):
+            yield min(chunk_rows, rows - start)
+
+    # Потоки значений столбцов
+
+    def stream(self, i, chunk_rows, rows=None):
+        """Куски значений столбца i - каждый раз с начала его потока"""
+        rng = np.random.default_rng(self.seeds[i])
+        sizes = self.sizes(chunk_rows, rows or self.rows)
+        kind = self.kinds[i]
+        if kind == "time":
+            return self._time_stream(rng, sizes)
+        if kind == "numeric":
+            return self._numeric_stream(rng, sizes)
+        if kind == "percent":
+            return self._percent_stream(rng, sizes)
+        # Процессы в файле - числа 0/1, флаги состояния - True/False
+        return self._flag_stream(rng, sizes, np.int8 if kind == "process" else bool)
+
+    def _time_stream(self, rng, sizes):
+        # Целые наносекунды: сумма шагов не зависит от того, как строки разбиты на куски
+        step = int(round(self.interval * 1e9))
+        start = np.datetime64(self.START, "ns")
+        offset = 0
+        for n in sizes:
+            if self.jitter:
+                steps = np.rint(step * (1 + self.jitter * (2 * rng.random(n) - 1))).astype(np.int64)
+            else:
+                steps = np.full(n, step, dtype=np.int64)
+            offsets = offset + np.cumsum(steps) - steps
+            offset = int(offsets[-1] + steps[-1])
+            yield start + offsets.astype("timedelta64[ns]")
+
+    def _numeric_stream(self, rng, sizes):
+        base = rng.uniform(-20000, 20000)
+        scale = rng.uniform(1, 100)
+        state = np.zeros(1)
+        for n in sizes:
+            walk, state = lfilter([1.0], [1.0, -self.AR], rng.standard_normal(n), zi=state)
+            yield np.round(base + scale * walk, 3)
+
+    def _percent_stream(self, rng, sizes):
+        period = max(rng.uniform(0.05, 0.5) * self.rows, 2.0)
+        phase = rng.random()
+        row = 0
+        for n in sizes:
+            wave = np.sin(2 * np.pi * (np.arange(row, row + n) / period + phase))
+            row += n
+            yield np.round(np.clip(50 + 45 * wave + 2 * rng.standard_normal(n), 0, 100), 2)
+
+    def _flag_stream(self, rng, sizes, dtype):
+        state = bool(rng.random() < 0.5)
+        for n in sizes:
+            toggles = np.cumsum(rng.random(n) < self.toggle_rate) % 2 == 1
+            values = toggles ^ state
+            state = bool(values[-1])
+            yield values.astype(dtype)
+
+    # Куски строк
+
+    def chunk_arrays(self, chunk_rows=None, rows=None):
+        """Куски строк как списки массивов столбцов"""
+        streams = [self.stream(i, chunk_rows or self.default_chunk_rows(), rows) for i in range(len(self.names))]
+        return zip(*streams)
+
+    def chunks(self, chunk_rows=None, rows=None):
+        for arrays in self.chunk_arrays(chunk_rows, rows):
+            yield pd.DataFrame(dict(zip(self.names, arrays)), copy=False)
+
+    def generate_data(self):
+        """Все строки одним DataFrame - только для размеров, которые помещаются в память"""
+        return pd.concat(self.chunks(), ignore_index=True)
+
+    # Запись в файл
+
+    def write(self, path, chunk_rows=None, jobs=1):
+        """
+        Записывает данные в .csv, .xlsx или .npz (формат кэша) по кускам; файл появляется целиком в конце.
+        jobs - число процессов, форматирующих куски CSV
+        """
+        ext = os.path.splitext(path)[1].lower()
+        writers = {".csv": self.write_csv, ".xlsx": self.write_xlsx, ".npz": self.write_npz}
+        if ext not in writers:
+            raise ValueError(f"Unsupported demo file format {ext!r}, use .csv, .xlsx or .npz")
+        chunk_rows = chunk_rows or self.default_chunk_rows()
+        start = time.perf_counter()
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            rows = writers[ext](tmp_path, chunk_rows, jobs) if ext == ".csv" else writers[ext](tmp_path, chunk_rows)
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        elapsed = time.perf_counter() - start
+        print(f"{rows} rows x {len(self.names)} columns (seed {self.seed}) written to {path} in {elapsed:.1f} s: "
+              f"{rows / elapsed:.0f} rows/s, {os.path.getsize(path) / 1024 / 1024:.1f} MB")
+        return rows
+
+    def progress(self, done, total, last):
+        """Печатает ход записи каждые 10%; возвращает последний напечатанный десяток процентов"""
+        tenth = done * 10 // total
+        if tenth > last and done < total:
+            print(f"  {tenth * 10}%")
+        return max(tenth, last)
+
+    def write_csv(self, path, chunk_rows, jobs=1):
+        done, last = 0, 0
+        pool = ProcessPoolExecutor(max_workers=jobs) if jobs > 1 else None
+        try:
+            texts = ordered_map(pool, csv_text, self.chunks(chunk_rows), 2 * jobs) if pool \
+                else map(csv_text, self.chunks(chunk_rows))
+            with open(path, "w", encoding="utf-8", newline="") as f:
+                f.write(",".join(self.names) + "\n")
+                for rows, text in texts:
+                    f.write(text)
+                    done += rows
+                    last = self.progress(done, self.rows, last)
+        finally:
+            if pool is not None:
+                pool.shutdown(cancel_futures=True)
+        return done
+
+    def write_xlsx(self, path, chunk_rows):
+        from openpyxl import Workbook
+
+        rows = self.rows
+        if rows > self.EXCEL_MAX_ROWS:
+            print(f"Excel sheets hold {self.EXCEL_MAX_ROWS} rows, the rest of {rows} rows is not written")
+            rows = self.EXCEL_MAX_ROWS
+        # Режим только записи: строки сразу уходят во временный файл, а не копятся в книге
+        workbook = Workbook(write_only=True)
+        sheet = workbook.create_sheet()
+        sheet.append(self.names)
+        done, last = 0, 0
+        for arrays in self.chunk_arrays(chunk_rows, rows):
+            columns = [arrays[0].astype("datetime64[us]").tolist()] + [values.tolist() for values in arrays[1:]]
+            for row in zip(*columns):
+                sheet.append(row)
+            done += len(columns[0])
+            last = self.progress(done, rows, last)
+        workbook.save(path)
+        return done
+
+    def write_npz(self, path, chunk_rows):
+        """
+        Формат записи кэша (CacheManager): массивы c0..cN и метаданные meta. Столбцы пишутся
+        по одному прямо в архив, поэтому в памяти всегда один кусок одного столбца
+        """
+        kinds = {"numeric": "numeric_columns", "percent": "percent_columns",
+                 "process": "bool_columns", "state": "flag_columns"}
+        columns = {key: [] for key in ("numeric_columns", "percent_columns", "flag_columns", "bool_columns")}
+        for kind, name in zip(self.kinds[1:], self.names[1:]):
+            columns[kinds[kind]].append(name)
+        meta = {
+            "version": CacheManager.FORMAT_VERSION,
+            "source": {"generator": {"rows": self.rows, "seed": self.seed, "toggle_rate": self.toggle_rate,
+                                     "jitter": self.jitter, "interval": self.interval, "mix": self.mix}},
+            "names": self.names,
+            "columns": columns,
+        }
+        dtypes = {"time": np.dtype("datetime64[ns]"), "numeric": np.dtype(float), "percent": np.dtype(float),
+                  "process": np.dtype(bool), "state": np.dtype(bool)}
+
+        with zipfile.ZipFile(path, "w", allowZip64=True) as archive:
+            with archive.open("meta.npy", "w") as f:
+                np.lib.format.write_array(f, np.array(json.dumps(meta)), allow_pickle=False)
+            last = 0
+            for i, kind in enumerate(self.kinds):
+                header = {"descr": np.lib.format.dtype_to_descr(dtypes[kind]), "fortran_order": False,
+                          "shape": (self.rows,)}
+                with archive.open(f"c{i}.npy", "w", force_zip64=True) as f:
+                    np.lib.format.write_array_header_2_0(f, header)
+                    for values in self.stream(i, chunk_rows):
+                        f.write(values.astype(dtypes[kind], copy=False).tobytes())
+                last = self.progress(i + 1, len(self.kinds), last)
+        return self.rows
@@ -4,110 +4,485 @@ import sys
 import tkinter as tk
 from tkinter import filedialog, messagebox
 import argparse
-from demo_generator import DemoGenerator
+import threading
+import time
+from contextlib import nullcontext
+import numpy as np
+from matplotlib.dates import date2num
+from lod_manager import MinMaxPyramid
+from flag_index import FlagRuns
+from stream_reader import get_stream_reader, TimeFilter, ColumnBuffer
+from column_store import ColumnStore
+from cache_manager import CacheManager
+from load_manager import LoadCancelled
 
 
 class DataLoader:
-    def __init__(self, root, file_path=None, demo_mode=None, demo_args=None):
+    DEMO_FORMATS = (".npz", ".csv", ".xlsx")
+
+    def __init__(self, root, file_path=None, demo_mode=None, demo_args=None, demo_save=None, cache=None,
+                 lazy=False, memory_budget=None, time_from=None, time_to=None, source=None, trace=None,
+                 progress=None, follow=False):
         self.root = root
+        self.trace = trace      # TraceManager приложения - замеры стадий загрузки
+        self.progress = progress    # LoadProgress фоновой загрузки - стадии, строки и отмена
         self.file_path = file_path
         self.demo_mode = demo_mode
         self.demo_args = demo_args
-        self.temp_file = None
+        self.demo_save = demo_save  # Файл, в который демо-данные сохраняются в фоне
+        self.save_thread = None
+        self.cache = cache
+        self.source = source    # Потоковый источник (stream_source.StreamSource) вместо файла
+        self.source_total = None
+        self.follow = follow    # Файл дописывается - за ним будет следить TailManager
+        self.tail_position = None   # Где в файле кончились загруженные строки (байт или строка - решает читатель)
+        # Диапазон времени передаётся читателям, чтобы не разбирать лишние строки
+        self.time_range = (time_from, time_to) if time_from is not None or time_to is not None else None
+        self.lazy = False       # Включается, только если источник умеет читать отдельные столбцы
+        self.column_store = None
         self.df = None
         self.timestamps = None
         self.numeric_columns = []
         self.percent_columns = []
         self.flag_columns = []
         self.bool_columns = []
+        self.x_values = None
+        self.x_sorted = True
+        self.lod = {}
+        self.flag_runs = {}     # Серии значений флагов состояния и процессов
+        self.data_version = 0   # Растёт при каждом изменении данных - по ней график решает, что перестроить
+        self.buffers = None     # Растущие буферы столбцов, создаются при первом дописывании строк
+        self.x_buffer = None
+        self.x_search = None    # (версия данных, отсортированные x, порядок) для поиска ближайшего отсчёта
 
         try:
             if demo_mode:
                 self.load_demo_data()
-            else:
+            elif source is not None:
+                self.load_stream()
+            elif not (lazy and self.load_lazy(memory_budget)):
                 self.load_data()
+        except LoadCancelled:
+            self.cleanup()
+            raise
         except Exception as e:
             self.cleanup()
             raise ValueError(f"Data loading error: {str(e)}")
 
+    def span(self, name):
+        if self.progress is not None:
+            self.progress.set_stage(name)
+        return self.trace.span(name) if self.trace is not None else nullcontext()
 
     def load_demo_data(self):
-        if self.demo_mode == 'batt':
-            self.temp_file, self.df = DemoGenerator.generate_demo_data('batt')
-        elif self.demo_mode == 'rand':
-            points, signals = self.demo_args
-            self.temp_file, self.df = DemoGenerator.generate_demo_data('rand', points, signals)
+        # Генераторы тянут scipy - импорт только в демо-режиме
+        from demo_generator import DemoGenerator
+        with self.span("generate"):
+            if self.demo_mode == 'batt':
+                self.df = DemoGenerator.generate_demo_data('batt', *(self.demo_args or ()))
+            elif self.demo_mode == 'rand':
+                points, signals = self.demo_args
+                self.df = DemoGenerator.generate_demo_data('rand', points, signals)
         self.process_data()
+        if self.demo_save:
+            self.save_demo(self.demo_save)
+
+    def save_demo(self, path):
+        """Данные уже в памяти - файл пишется в фоновом потоке, запуск приложения его не ждёт"""
+        self.save_thread = threading.Thread(target=self.write_demo, args=(path,), name="demo-save")
+        self.save_thread.start()
+
+    def write_demo(self, path):
+        start = time.perf_counter()
+        ext = os.path.splitext(path)[1].lower()
+        tmp_path = f"{path}.{os.getpid()}.tmp{ext}"
+        try:
+            if ext == ".npz":
+                # Формат кэша: при открытии файла столбцы не разбираются и не классифицируются заново
+                CacheManager().write(path, self, {"demo": self.demo_mode})
+            elif ext in (".csv", ".xlsx"):
+                # Процессы в df уже булевы - в файл они идут числами 0/1, иначе прочитаются как флаги состояния
+                df = self.df.astype({col: "int8" for col in self.bool_columns})
+                if ext == ".csv":
+                    df.to_csv(tmp_path, index=False)
+                else:
+                    df.to_excel(tmp_path, index=False)
+                os.replace(tmp_path, path)
+            else:
+                raise ValueError(f"unsupported format {ext!r}, use {', '.join(self.DEMO_FORMATS)}")
+            print(f"Demo data saved to {path} in {time.perf_counter() - start:.2f} s")
+        except Exception as e:
+            print(f"Error when saving demo data: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
 
     def load_data(self):
         if not os.path.exists(self.file_path):
             raise FileNotFoundError(f"File not found: {self.file_path}")
-        self.df = pd.read_excel(self.file_path)
-        self.process_data()
+        if self.is_npz():
+            with self.span("parse"):
+                self.set_classified_data(*self.read_npz())
+            return
+        if self.cache:
+            with self.span("cache"):
+                if self.load_cached():
+                    return
+        reader = get_stream_reader(self.file_path, self.time_range)
+        if reader:
+            reader.progress = self.progress
+            reader.follow = self.follow
+            # Типы столбцов определяются по образцу строк, промежуточный object-DataFrame не строится
+            with self.span("parse"):
+                data = reader.read()
+            self.set_classified_data(*data)
+            self.tail_position = reader.end
+        else:
+            with self.span("parse"):
+                self.df = pd.read_excel(self.file_path)
+            self.process_data()
+        # Кэш хранит файл целиком, поэтому урезанные по времени данные в него не пишутся
+        if self.cache and not self.time_range:
+            with self.span("cache"):
+                self.cache.store(self.file_path, self)
+
+    def load_cached(self):
+        """Загружает уже разобранные и классифицированные данные из кэша"""
+        cached = self.cache.load(self.file_path, time_range=self.time_range)
+        if cached is None:
+            return False
+        self.set_classified_data(*cached)
+        return True
+
+    def is_npz(self):
+        return self.file_path.lower().endswith(".npz")
+
+    def read_npz(self, select=None):
+        """Файл уже в формате кэша (например, записанный генератором демо-данных) - читается как есть"""
+        data = CacheManager().read(self.file_path, select=select, time_range=self.time_range)
+        if data is None:
+            raise ValueError(f"Unsupported data file format version: {self.file_path}")
+        return data
+
+    def load_lazy(self, memory_budget=None):
+        """
+        Загружает только метки времени и схему столбцов; данные столбцов
+        подгружаются через ensure_columns. False - источник так читать не умеет
+        """
+        if not os.path.exists(self.file_path):
+            raise FileNotFoundError(f"File not found: {self.file_path}")
+        cached = None
+        if self.cache and not self.is_npz():
+            cached = self.cache.load(self.file_path, select=[], time_range=self.time_range)
+        if self.is_npz():
+            read_columns = self.read_npz
+        elif cached is not None:
+            # Запись проверена один раз, здесь - дальше столбцы читаются из неё как есть
+            entry = self.cache.entry_path(self.file_path)
+            read_columns = lambda select: self.cache.read(entry, select=select, time_range=self.time_range)
+        else:
+            reader = get_stream_reader(self.file_path, self.time_range)
+            if reader is None:
+                return False
+            reader.progress = self.progress
+            read_columns = reader.read
+        self.set_classified_data(*(cached if cached is not None else read_columns([])))
+        self.column_store = ColumnStore(self, read_columns, memory_budget)
+        self.lazy = True
+        return True
+
+    def load_stream(self):
+        """Ждёт первую запись потокового источника и берёт снимок его кольцевого буфера"""
+        with self.span("wait for data"):
+            self.source.start()
+            self.source.wait_ring(progress=self.progress)
+        self.refresh_stream()
+
+    def refresh_stream(self):
+        """Перестраивает данные по свежему снимку кольцевого буфера; False - новых записей не было"""
+        self.source.flush()
+        df, total = self.source.ring.snapshot()
+        if total == self.source_total or df.empty:
+            return False
+        self.source_total = total
+        self.set_classified_data(df, self.source.ring.schema())
+        return True
+
+    def ensure_columns(self, names):
+        """Гарантирует наличие данных столбцов в df (в обычном режиме все столбцы уже загружены)"""
+        if self.column_store:
+            self.column_store.ensure(names)
+
+    def all_columns(self):
+        return self.numeric_columns + self.percent_columns + self.flag_columns + self.bool_columns
+
+    def add_column(self, name, values):
+        """Добавляет данные столбца, загруженного по требованию; возвращает занимаемые байты"""
+        self.df[name] = values
+        nbytes = values.nbytes
+        if name in self.numeric_columns or name in self.percent_columns:
+            self.lod[name] = MinMaxPyramid(values)
+            nbytes += sum(idx_min.nbytes + idx_max.nbytes for _, idx_min, idx_max in self.lod[name].levels)
+        elif name in self.flag_columns or name in self.bool_columns:
+            self.flag_runs[name] = FlagRuns(values)
+            nbytes += self.flag_runs[name].starts.nbytes + self.flag_runs[name].states.nbytes
+        return nbytes
+
+    def drop_column(self, name):
+        if name in self.df.columns:
+            del self.df[name]
+        self.lod.pop(name, None)
+        self.flag_runs.pop(name, None)
+
+    def column_varies(self, name):
+        """Меняется ли значение столбца; None - столбец ещё не загружен"""
+        if name not in self.df.columns:
+            return None
+        return self.df[name].nunique() > 1
+
+    def set_classified_data(self, df, columns):
+        """Принимает уже типизированный DataFrame и списки столбцов (кэш, потоковые читатели)"""
+        self.df = df
+        self.timestamps = self.df.iloc[:, 0]
+        self.numeric_columns = columns["numeric_columns"]
+        self.percent_columns = columns["percent_columns"]
+        self.flag_columns = columns["flag_columns"]
+        self.bool_columns = columns["bool_columns"]
+        self.build_lod()
 
     def process_data(self):
         if self.df is None or self.df.empty:
             raise ValueError("No data for processing")
 
-        self.timestamps = pd.to_datetime(self.df.iloc[:, 0])
+        with self.span("to_datetime"):
+            self.timestamps = pd.to_datetime(self.df.iloc[:, 0])
+        if self.time_range:
+            # Формат без потокового чтения - фильтруем уже разобранные данные
+            start = time.perf_counter()
+            time_filter = TimeFilter(self.time_range)
+            keep, _ = time_filter.apply(self.timestamps.to_numpy(dtype="datetime64[ns]"))
+            self.df = self.df[keep].reset_index(drop=True)
+            self.timestamps = self.timestamps[keep].reset_index(drop=True)
+            time_filter.report(int(self.df.memory_usage(index=False).sum() / max(len(self.df), 1)),
+                               time.perf_counter() - start)
+            if self.df.empty:
+                raise ValueError("No data in the selected time range")
         self.numeric_columns = []
         self.percent_columns = []
         self.flag_columns = []
         self.bool_columns = []
 
-        for col in self.df.columns[1:]:
-            if self.df[col].dtype == bool:
-                self.flag_columns.append(col)
-            elif col.startswith("F-") and pd.api.types.is_numeric_dtype(self.df[col]):
-                self.bool_columns.append(col)
-                self.df[col] = self.df[col].astype(bool)
-            elif '%' in col and pd.api.types.is_numeric_dtype(self.df[col]):  # Процентные данные
-                self.percent_columns.append(col)
-            elif pd.api.types.is_numeric_dtype(self.df[col]):
-                self.numeric_columns.append(col)
+        with self.span("classify"):
+            for col in self.df.columns[1:]:
+                if self.df[col].dtype == bool:
+                    self.flag_columns.append(col)
+                elif col.startswith("F-") and pd.api.types.is_numeric_dtype(self.df[col]):
+                    self.bool_columns.append(col)
+                    self.df[col] = self.df[col].astype(bool)
+                elif '%' in col and pd.api.types.is_numeric_dtype(self.df[col]):  # Процентные данные
+                    self.percent_columns.append(col)
+                elif pd.api.types.is_numeric_dtype(self.df[col]):
+                    self.numeric_columns.append(col)
+
+        self.build_lod()
+
+    def build_lod(self):
+        """
+        Однократно строит пирамиды минимумов/максимумов для числовых и процентных столбцов
+        и индексы серий для флагов состояния и процессов
+        """
+        with self.span("index"):
+            self.x_values = date2num(self.timestamps.to_numpy())
+            self.x_sorted = bool(np.all(np.diff(self.x_values) >= 0))
+            self.data_version += 1
+            self.lod = {
+                col: MinMaxPyramid(self.df[col].to_numpy(dtype=float))
+                for col in self.numeric_columns + self.percent_columns
+                if col in self.df.columns
+            }
+            self.flag_runs = {
+                col: FlagRuns(self.df[col].to_numpy())
+                for col in self.flag_columns + self.bool_columns
+                if col in self.df.columns
+            }
+
+    def sorted_x(self):
+        """(метки времени по возрастанию, их индексы в данных или None, если данные уже упорядочены)"""
+        if self.x_sorted:
+            return self.x_values, None
+        if self.x_search is None or self.x_search[0] != self.data_version:
+            order = np.argsort(self.x_values, kind="stable")
+            self.x_search = (self.data_version, self.x_values[order], order)
+        return self.x_search[1:]
+
+    def nearest_index(self, x):
+        """Индекс отсчёта, ближайшего к x (date2num) - двоичный поиск вместо прохода по всем меткам"""
+        xs, order = self.sorted_x()
+        i = int(np.searchsorted(xs, x))
+        if i == len(xs) or (i > 0 and x - xs[i - 1] <= xs[i] - x):
+            i -= 1
+        return i if order is None else int(order[i])
+
+    def append_rows(self, new_df):
+        """
+        Дописывает строки в конец данных (режим слежения за файлом); new_df должен
+        содержать столбцы df. Стоимость пропорциональна числу новых строк
+        """
+        start = len(self.df)
+        if self.buffers is None:
+            # Запас под рост, чтобы не копировать столбцы при каждом дописывании
+            self.buffers = {}
+            for i, name in enumerate(self.df.columns):
+                values = (self.timestamps.to_numpy(dtype="datetime64[ns]") if i == 0
+                          else self.df[name].to_numpy())
+                self.buffers[name] = ColumnBuffer(values.dtype, 2 * len(values))
+                self.buffers[name].append(values)
+            self.x_buffer = ColumnBuffer(float, 2 * len(self.x_values))
+            self.x_buffer.append(self.x_values)
+
+        for name, buffer in self.buffers.items():
+            buffer.append(new_df[name].to_numpy(dtype=buffer.data.dtype))
+        new_x = date2num(new_df.iloc[:, 0].to_numpy(dtype="datetime64[ns]"))
+        self.x_buffer.append(new_x)
+
+        self.df = pd.DataFrame({name: buffer.view() for name, buffer in self.buffers.items()}, copy=False)
+        self.timestamps = self.df.iloc[:, 0]
+        self.x_values = self.x_buffer.view()
+        self.x_sorted = (self.x_sorted and bool(np.all(np.diff(new_x) >= 0))
+                         and (start == 0 or len(new_x) == 0 or new_x[0] >= self.x_values[start - 1]))
+        for col, pyramid in self.lod.items():
+            pyramid.extend(self.df[col].to_numpy(dtype=float))
+        for col, runs in self.flag_runs.items():
+            runs.extend(self.df[col].to_numpy())
+        self.data_version += 1
+        return start
 
     def cleanup(self):
-        if hasattr(self, 'temp_file') and self.temp_file and os.path.exists(self.temp_file):
-            try:
-                os.remove(self.temp_file)
-            except Exception as e:
-                print(f"Error when deleting a temporary file: {e}")
+        """Дожидается фоновой записи демо-данных, чтобы при выходе не остался недописанный файл"""
+        if self.save_thread is not None and self.save_thread.is_alive():
+            print("Waiting for the demo data to be saved...")
+            self.save_thread.join()
+
+def write_demo_file(rows, cols, args):
+    """Воспроизводимый файл синтетических данных для проверки загрузки больших файлов"""
+    from demo_synth import SyntheticDemoGenerator
+    try:
+        generator = SyntheticDemoGenerator(rows, cols, seed=args.seed, toggle_rate=args.toggle_rate,
+                                           jitter=args.jitter, interval=args.sample_interval or 1.0, mix=args.mix)
+        generator.write(args.demo_out, args.chunk_rows, max(args.jobs or 1, 1))
+    except (ValueError, OSError) as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
 
 def get_file_path():
     parser = argparse.ArgumentParser(description="Data Visualization App")
     parser.add_argument("file_path", nargs="?", default=None, help="Path to the data file")
     parser.add_argument("--demo", nargs='+', help="Demo mode: 'batt' or [points signals]")
+    parser.add_argument("--demo-save", default=None, metavar="FILE",
+                        help="Save the demo data to FILE (.npz, .csv or .xlsx) in the background")
+    parser.add_argument("--cycles", type=int, default=3, help="Charge-discharge cycles generated by --demo batt")
+    parser.add_argument("--sample-interval", type=float, default=None,
+                        help="Time between rows in seconds (default - 10 for --demo batt, 1 for --demo-out)")
+    synth = parser.add_argument_group("synthetic data files", "With --demo-out the random demo is generated "
+                                      "chunk by chunk straight to a file and the application exits")
+    synth.add_argument("--demo-out", default=None, metavar="FILE",
+                       help="Write --demo ROWS COLUMNS data to FILE: .csv, .xlsx or .npz (the cache format)")
+    synth.add_argument("--seed", type=int, default=0, help="Seed of the generated data")
+    synth.add_argument("--toggle-rate", type=float, default=0.001,
+                       help="Probability that a state or process flag changes its value at a row")
+    synth.add_argument("--jitter", type=float, default=0.0,
+                       help="Random deviation of the time between rows, a fraction of --sample-interval (0-1)")
+    synth.add_argument("--mix", type=int, nargs=4, default=[4, 1, 1, 4], metavar=("NUMERIC", "PERCENT", "PROCESS", "STATE"),
+                       help="Proportions of column types: Value_N, PRC N %%, F-Process_N and State_N")
+    synth.add_argument("--chunk-rows", type=int, default=None,
+                       help="Rows generated at once (default - about 4 million values per chunk)")
+    synth.add_argument("--jobs", type=int, default=os.cpu_count(),
+                       help="Processes formatting CSV chunks (1 - format in this process)")
+    parser.add_argument("--no-cache", action="store_true", help="Do not read or write the parsed data cache")
+    parser.add_argument("--purge-cache", action="store_true", help="Remove all cached data before loading")
+    parser.add_argument("--cache-dir", default=None, help="Directory for the parsed data cache")
+    parser.add_argument("--cache-size", type=int, default=None, help="Cache size limit in MB")
+    parser.add_argument("--lazy", action="store_true",
+                        help="Load column data only when the column is selected for display")
+    parser.add_argument("--memory-budget", type=int, default=None,
+                        help="Memory budget for lazily loaded columns in MB")
+    parser.add_argument("--from", dest="time_from", type=pd.Timestamp, default=None,
+                        help="Load only rows at or after this time, e.g. '2025-01-23 10:00'")
+    parser.add_argument("--to", dest="time_to", type=pd.Timestamp, default=None,
+                        help="Load only rows at or before this time")
+    parser.add_argument("--follow", action="store_true",
+                        help="Watch the data file and add rows appended to it")
+    parser.add_argument("--refresh-ms", type=int, default=1000,
+                        help="How often to check the followed file or stream, in milliseconds")
+    parser.add_argument("--autoscroll", action="store_true",
+                        help="In follow mode keep the newest rows in view")
+    parser.add_argument("--count-draws", action="store_true",
+                        help="Print the number of full redraws for every action (extra redraws are always printed)")
+    parser.add_argument("--stats", action="store_true",
+                        help="Show the last redraw time, artists and points under the chart (F2 toggles it)")
+    parser.add_argument("--trace", default=None, metavar="FILE",
+                        help="On exit write timings of load, plot, draw and button actions to FILE")
+    parser.add_argument("--trace-format", choices=("chrome", "json"), default="chrome",
+                        help="chrome - Trace Event format for chrome://tracing or Perfetto, json - spans with a summary")
+    parser.add_argument("--profile-actions", type=int, default=5,
+                        help="Number of redraws profiled with cProfile after pressing F9")
+    parser.add_argument("--profile-startup", action="store_true",
+                        help="Print import time per module and initialization stages once the window is shown")
+    parser.add_argument("--flag-view", choices=("auto", "strips", "matrix"), default="auto",
+                        help="State flags as one axis per flag (strips) or one image (matrix); auto - matrix for many flags")
+    parser.add_argument("--stream", default=None, metavar="ADDRESS",
+                        help="Read live samples instead of a file: '-' (stdin), 'tcp://HOST:PORT' or 'unix://PATH'")
+    parser.add_argument("--ring-size", type=int, default=None,
+                        help="Number of newest samples kept in memory in stream mode")
     args = parser.parse_args()
 
     # Режим демонстрации
+    if args.demo_save and os.path.splitext(args.demo_save)[1].lower() not in DataLoader.DEMO_FORMATS:
+        print(f"Error: demo data can be saved to {', '.join(DataLoader.DEMO_FORMATS)} files")
+        sys.exit(1)
     if args.demo:
         if args.demo[0] == 'batt':
-            return None, 'batt', None
+            if args.demo_out:
+                print("Error: --demo-out writes random data, use '--demo rows columns --demo-out FILE'")
+                sys.exit(1)
+            sample_interval = args.sample_interval or 10
+            if args.cycles < 1 or sample_interval <= 0:
+                print("Error: --cycles and --sample-interval must be positive")
+                sys.exit(1)
+            return None, 'batt', (args.cycles, sample_interval), args
         elif len(args.demo) == 2:
             try:
                 points = int(args.demo[0])
                 signals = int(args.demo[1])
-                return None, 'rand', (points, signals)
             except ValueError:
                 print("Error: For random demo, points and signals must be integers")
                 sys.exit(1)
+            if args.demo_out:
+                write_demo_file(points, signals, args)
+                sys.exit(0)
+            return None, 'rand', (points, signals), args
         else:
             print("Error: Invalid demo arguments. Use '--demo batt' or '--demo points signals'")
             sys.exit(1)
 
+    # Потоковый режим - файл не нужен
+    if args.stream:
+        return None, None, None, args
+
     # Обычный режим с файлом
     if args.file_path and os.path.exists(args.file_path):
-        return args.file_path, None, None
+        return args.file_path, None, None, args
 
     default_file = "data.xls"
     if os.path.exists(default_file):
-        return default_file, None, None
+        return default_file, None, None, args
 
     root = tk.Tk()
     root.withdraw()
     file_path = filedialog.askopenfilename(
         title="Select data-file",
-        filetypes=[("Excel files", "*.xls *.xlsx"), ("All files", "*.*")]
+        filetypes=[("Excel files", "*.xls *.xlsx"), ("CSV files", "*.csv *.tsv *.txt"),
+                   ("PandoRa data", "*.npz"), ("All files", "*.*")]
     )
     root.destroy()
 
@@ -115,4 +490,4 @@ def get_file_path():
         messagebox.showerror("Error", "Data-file not selected.")
         sys.exit(1)
 
-    return file_path, None, None
\ No newline at end of file
+    return file_path, None, None, args
\ No newline at end of file
@@ -0,0 +1,48 @@
+import numpy as np
+
+
+class FlagRuns:
+    """Серии одинаковых значений флага: начала серий и их значения, поиск серии - двоичный"""
+
+    def __init__(self, values):
+        self.starts = np.zeros(0, dtype=np.intp)
+        self.states = np.zeros(0, dtype=bool)
+        self.size = 0
+        self.last = None        # Значение последнего отсчёта - с ним сравнивается первый новый
+        self.extend(values)
+
+    def extend(self, values):
+        """Принимает ряд, дополненный новыми отсчётами в конце; просматриваются только новые отсчёты"""
+        new = np.asarray(values[self.size:], dtype=bool)
+        if not len(new):
+            return
+        if self.last is None:
+            starts = np.concatenate([[0], np.flatnonzero(new[1:] != new[:-1]) + 1])
+        else:
+            starts = np.flatnonzero(np.diff(new, prepend=self.last))
+        self.starts = np.concatenate([self.starts, starts + self.size]).astype(np.intp)
+        self.states = np.concatenate([self.states, new[starts]])
+        self.size += len(new)
+        self.last = bool(new[-1])
+
+    def run(self, i):
+        """(начало, конец, значение) серии, содержащей отсчёт i; конец не включается"""
+        k = int(np.searchsorted(self.starts, i, side="right")) - 1
+        end = int(self.starts[k + 1]) if k + 1 < len(self.starts) else self.size
+        return int(self.starts[k]), end, bool(self.states[k])
+
+    def next_transition(self, i):
+        """Первый отсчёт после i, на котором значение меняется; None - изменений дальше нет"""
+        k = int(np.searchsorted(self.starts, i, side="right"))
+        return int(self.starts[k]) if k < len(self.starts) else None
+
+    def previous_transition(self, i):
+        """Последний отсчёт до i, на котором значение меняется; None - изменений раньше нет"""
+        k = int(np.searchsorted(self.starts, i, side="left")) - 1
+        return int(self.starts[k]) if k > 0 else None
+
+    def intervals(self, state=True):
+        """Начала и концы (не включая) серий с заданным значением"""
+        ends = np.append(self.starts[1:], self.size)
+        mask = self.states == state
+        return self.starts[mask], ends[mask]
@@ -1,35 +1,61 @@
-import numpy as np
-import pandas as pd
-
-
 class FlagManager:
+    NEXT_KEY = "]"          # Следующее/предыдущее изменение флага (стрелки заняты навигацией matplotlib)
+    PREVIOUS_KEY = "["
+
     def __init__(self, app):
         self.app = app
-
-    def on_flag_click(self, event):
+        self.current = None     # Флаг, по которому последний раз кликали
+
+    def connect(self):
+        self.app.canvas.mpl_connect("button_press_event", self.on_flag_click)
+        self.app.canvas.mpl_connect("key_press_event", self.on_key_press)
+
+    def flag_at(self, event):
+        """Столбец флага под мышью или None"""
+        ax = event.inaxes
+        matrix = self.app.flag_matrix
+        if matrix is not None and ax is matrix.ax:
+            return matrix.column_at(event.ydata)
         selected_flags = getattr(self.app, 'selected_columns', {}).get('flags', self.app.data_loader.flag_columns)
-        visible_axes = self.app.flag_axes[:len(selected_flags)]
-
-        for ax, col in zip(visible_axes, selected_flags):
-            if ax == event.inaxes and col in self.app.data_loader.flag_columns:
-                click_time = pd.to_datetime(event.xdata, unit="D", origin="unix")
-                idx = np.abs(self.app.data_loader.timestamps - click_time).argmin()
-                flag_data = self.app.data_loader.df[col].astype(int)
+        for flag_ax, col in zip(self.app.flag_axes, selected_flags):
+            if flag_ax is ax and flag_ax.get_visible() and col in self.app.data_loader.flag_runs:
+                return col
+        return None
 
-                left_idx = idx
-                while left_idx > 0 and flag_data.iloc[left_idx] == flag_data.iloc[idx]:
-                    left_idx -= 1
-
-                right_idx = idx
-                while right_idx < len(flag_data) - 1 and flag_data.iloc[right_idx] == flag_data.iloc[idx]:
-                    right_idx += 1
-
-                left_boundary = self.app.data_loader.timestamps.iloc[left_idx]
-                right_boundary = self.app.data_loader.timestamps.iloc[right_idx]
-
-                self.app.ax_main.set_xlim(left_boundary, right_boundary)
-                for visible_ax in visible_axes:
-                    visible_ax.set_xlim(left_boundary, right_boundary)
-
-                self.app.canvas.draw()
-                break
\ No newline at end of file
+    def on_flag_click(self, event):
+        col = self.flag_at(event)
+        if col is None or event.xdata is None:
+            return
+        self.current = col
+        loader = self.app.data_loader
+        start, end, _ = loader.flag_runs[col].run(loader.nearest_index(event.xdata))
+
+        # Границы - соседние отсчёты с другим значением флага (если они есть)
+        left_idx = max(start - 1, 0)
+        right_idx = min(end, len(loader.x_values) - 1)
+        self.app.ax_main.set_xlim(loader.x_values[left_idx], loader.x_values[right_idx])
+        self.app.render_scheduler.mark("limits")
+
+    def on_key_press(self, event):
+        if event.key not in (self.NEXT_KEY, self.PREVIOUS_KEY):
+            return
+        # Флаг под мышкой, иначе тот, по которому кликали последним
+        col = self.flag_at(event) or self.current
+        if col is None or col not in self.app.data_loader.flag_runs:
+            return
+        self.current = col
+        self.go_to_transition(col, forward=event.key == self.NEXT_KEY)
+
+    def go_to_transition(self, col, forward=True):
+        """Сдвигает вид к следующему/предыдущему изменению флага, сохраняя масштаб"""
+        loader = self.app.data_loader
+        runs = loader.flag_runs[col]
+        x0, x1 = self.app.ax_main.get_xlim()
+        center = loader.nearest_index((x0 + x1) / 2)
+        idx = runs.next_transition(center) if forward else runs.previous_transition(center)
+        if idx is None:
+            print(f"{col}: no {'next' if forward else 'previous'} transition")
+            return
+        x = loader.x_values[idx]
+        self.app.ax_main.set_xlim(x - (x1 - x0) / 2, x + (x1 - x0) / 2)
+        self.app.render_scheduler.mark("limits")
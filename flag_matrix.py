@@ -0,0 +1,110 @@
+import numpy as np
+from matplotlib.colors import to_rgba
+from matplotlib.image import AxesImage
+
+
+class FlagMatrix:
+    """
+    Все выбранные флаги состояния одной картинкой в одной оси: строка - флаг, столбец - пиксель.
+    Картинка пересчитывается под видимый диапазон по сериям флагов (FlagRuns), поэтому стоимость
+    перерисовки - одна картинка ширина x число флагов, а не отдельная ось с полосами на каждый флаг.
+    Метки времени должны идти по возрастанию - как и для прореживания линий
+    """
+    AUTO_FLAGS = 20         # Больше флагов - по умолчанию матрица вместо отдельных осей
+    MAX_HEIGHT_FRAC = 0.4   # Матрица не выше этой доли экрана - строки сжимаются
+    LABEL_PX = 10           # Подписи строк не чаще - при узких строках подписывается каждая k-я
+    MIXED_ALPHA = 0.5       # Прозрачность цвета включённого флага в столбцах, где флаг менялся
+
+    def __init__(self, app, ax):
+        self.app = app
+        self.ax = ax
+        self.columns = []   # Флаги по строкам сверху вниз
+        self.image = AxesImage(ax, interpolation="nearest", origin="upper")
+        ax.add_image(self.image)
+        ax.set_autoscale_on(False)
+        ax.set_navigate(False)
+        ax.tick_params(axis="x", bottom=False, labelbottom=False, top=False, labeltop=False)
+
+    def row_px(self, count):
+        screen_height = self.app.screen_height()
+        return min(self.app.flag_height_px, self.MAX_HEIGHT_FRAC * screen_height / max(count, 1))
+
+    def height_px(self, count):
+        return self.row_px(count) * count
+
+    def label_step(self):
+        """Подписывается каждая label_step-я строка: число подписей не растёт с числом флагов"""
+        return int(np.ceil(self.LABEL_PX / max(self.row_px(len(self.columns)), 1e-9)))
+
+    @property
+    def label_size(self):
+        """Размер подписей строк в пунктах - не больше места, отведённого одной подписи"""
+        label_pt = self.row_px(len(self.columns)) * self.label_step() * 72 / self.app.fig.dpi
+        return min(self.app.font_size, 0.8 * label_pt)
+
+    def column_at(self, y):
+        """Флаг строки по координате y оси или None"""
+        row = int(np.floor(y)) if y is not None else -1
+        return self.columns[row] if 0 <= row < len(self.columns) else None
+
+    def plot(self, columns):
+        loader = self.app.data_loader
+        self.columns = [col for col in columns if col in loader.flag_runs]
+        count = len(self.columns)
+        self.ax.set_visible(count > 0)
+        if not count:
+            return
+
+        # Матрица - от верхнего края окна, основная ось размещается под ней
+        screen_height = self.app.screen_height()
+        height = self.height_px(count) / screen_height
+        self.ax.set_position([self.app.rectangle_left, 1.0 + self.app.rectangle_top - height,
+                              1.0 - self.app.rectangle_right, height])
+
+        # Строка i занимает по y [i, i + 1], первая - сверху
+        self.ax.set_ylim(count, 0)
+        rows = np.arange(0, count, self.label_step())
+        names = [col.replace("F-", "") if col.startswith("F-") else col for col in self.columns]
+        self.ax.set_yticks(rows + 0.5, [names[row] for row in rows],
+                           fontweight="bold" if self.app.legend_bold else "normal")
+        self.refresh()
+
+    def colors(self):
+        """Цвета RGBA (0-255): выключен, менялся в пределах столбца, включён"""
+        on = np.array(to_rgba(self.app.flag_color, self.app.flag_alpha))
+        mixed = on * [1, 1, 1, self.MIXED_ALPHA]
+        if self.app.show_flag_background.get():
+            off = np.array(to_rgba(self.app.flag_bg_color, self.app.flag_bg_alpha))
+        else:
+            off = np.zeros(4)
+        return (np.stack([off, mixed, on]) * 255).round().astype(np.uint8)
+
+    def refresh(self, xlim=None):
+        """Пересчитывает картинку под пределы xlim (по умолчанию - текущие пределы основной оси)"""
+        loader = self.app.data_loader
+        x = loader.x_values
+        if not self.columns or not self.ax.get_visible() or len(x) == 0:
+            return
+        x0, x1 = xlim if xlim is not None else self.app.ax_main.get_xlim()
+        width = max(int(self.ax.bbox.width), 1)
+        edges = np.linspace(x0, x1, width + 1)
+
+        # Отсчёты пиксельного столбца: от действующего на левой границе до последнего внутри (не включая last)
+        first = np.searchsorted(x, edges[:-1], side="right") - 1
+        last = np.maximum(np.searchsorted(x, edges[1:], side="left"), first + 1)
+        outside = (first < 0) | (edges[:-1] > x[-1])
+        first = np.maximum(first, 0)
+
+        codes = np.empty((len(self.columns), width), dtype=np.int8)
+        for row, col in enumerate(self.columns):
+            starts, ends = loader.flag_runs[col].intervals(True)
+            # Серий «включено», пересекающих [first, last): начавшиеся до last минус закончившиеся до first
+            any_on = np.searchsorted(starts, last) > np.searchsorted(ends, first, side="right")
+            # Весь столбец включён - серия, содержащая first, идёт до last
+            k = np.searchsorted(starts, first, side="right") - 1
+            all_on = (k >= 0) & (ends[np.maximum(k, 0)] >= last) if len(starts) else np.zeros(width, dtype=bool)
+            codes[row] = any_on.astype(np.int8) + all_on
+        rgba = self.colors()[codes]
+        rgba[:, outside] = 0
+        self.image.set_data(rgba)
+        self.image.set_extent((x0, x1, len(self.columns), 0))
@@ -10,22 +10,38 @@ from custom_toolbar import CustomToolbar
 from plot_manager import PlotManager
 from time_manager import TimeManager
 from flag_manager import FlagManager
-from settings_window import SettingsWindow
-from column_selector import ColumnSelector
 from theme_manager import ThemeManager
+from lod_manager import LodManager
+from tail_manager import TailManager
+from stream_manager import StreamManager
+from blit_manager import BlitManager
+from cursor_manager import CursorManager
+from flag_matrix import FlagMatrix
+from time_grid import TimeGrid
+from process_spans import ProcessSpans
+from render_scheduler import RenderScheduler
+from trace_manager import TraceManager
+from load_manager import LoadManager
 
 
 class DataVisualizationApp:
-    def __init__(self, root, file_path=None, demo_mode=None, demo_args=None):
+    var_type = tk.BooleanVar    # Тип переключателей настроек
+
+    def __init__(self, root, file_path=None, demo_mode=None, demo_args=None, flag_view="auto", background=False,
+                 config_file="settings.ini", **loader_options):
+        """background - загружать данные в фоновом потоке, показав окно сразу (LoadManager)"""
         self.root = root
+        self.flag_view = flag_view     # auto, strips - ось на каждый флаг, matrix - все флаги одной картинкой
         self.plt = plt
         self.file_path = file_path
         self.demo_mode = demo_mode
         self.demo_args = demo_args
-        self.data_loader = DataLoader(file_path=file_path,
-                                      root=self.root,
-                                      demo_mode=demo_mode,
-                                      demo_args=demo_args)
+        self.loader_options = loader_options
+        self.trace_manager = TraceManager(self)
+        self.data_loader = None
+        if not background:
+            with self.trace_manager.span("load"):
+                self.data_loader = self.new_loader()
         self.ax_percent = None
         self.legend_warning_occurred = False
 
@@ -35,48 +51,116 @@ class DataVisualizationApp:
         self.bool_vars = {}
         self.flags_vars = {}
 
+        if self.data_loader is not None:
+            self.start_selection()
+
         # Загрузка всей конфигурации
-        self.config = ConfigManager()
-        self.config.load_app_config(self)
+        with self.trace_manager.span("init:config"):
+            self.config = ConfigManager(config_file)
+            self.config.load_app_config(self, self.var_type)
 
         # Инициализация менеджеров
         self.theme_manager = ThemeManager(self)
         self.plot_manager = PlotManager(self)
         self.time_manager = TimeManager(self)
         self.flag_manager = FlagManager(self)
+        self.lod_manager = LodManager(self)
+        self.tail_manager = TailManager(self)
+        self.stream_manager = StreamManager(self)
+        self.blit_manager = BlitManager(self)
+        self.cursor_manager = CursorManager(self)
+        self.time_grid = TimeGrid(self)
+        self.process_spans = ProcessSpans(self)
+        self.render_scheduler = RenderScheduler(self)
+        self.load_manager = LoadManager(self)
 
         self.setup_ui()
 
+    def new_loader(self, progress=None):
+        return DataLoader(file_path=self.file_path,
+                          root=self.root,
+                          demo_mode=self.demo_mode,
+                          demo_args=self.demo_args,
+                          trace=self.trace_manager,
+                          progress=progress,
+                          **self.loader_options)
+
+    def start_selection(self):
+        # В ленивом режиме стартуем без выбранных столбцов - данные грузятся при выборе
+        if self.data_loader.lazy:
+            self.selected_columns = {'flags': [], 'numerics': [], 'percents': [], 'bools': []}
+
     def setup_ui(self):
+        # Замеры init:* видны в отчёте --profile-startup
+        span = self.trace_manager.span
         self.root.protocol("WM_DELETE_WINDOW", self.on_close)
-        self.load_icons()
-        self.window_size()
-        self.create_figure()
-        self.create_toolbar()   # need canvas from figure
-        self.theme_manager.apply_window_theme()
-        self.theme_manager.apply_toolbar_theme()
+        with span("init:icons"):
+            self.load_icons()
+        with span("init:window"):
+            self.window_size()
+        with span("init:figure"):
+            self.create_figure()
+        with span("init:toolbar"):
+            self.create_toolbar()   # need canvas from figure
+        with span("init:theme"):
+            self.theme_manager.apply_window_theme()
+            self.theme_manager.apply_toolbar_theme()
+        if self.data_loader is None:
+            # Окно и тулбар уже есть; оси флагов и графики появятся, когда данные загрузятся
+            self.set_toolbar_enabled(False)
+            self.load_manager.start()
+        else:
+            self.show_data()
+
+    def on_data_loaded(self, data_loader):
+        """Данные из фонового потока загрузки - вызывается в потоке Tk"""
+        self.data_loader = data_loader
+        self.start_selection()
+        self.time_format_button.config(text=self.time_manager.format_button_text())
+        self.set_toolbar_enabled(True)
+        self.show_data()
+
+    def show_data(self):
+        """Первое построение: оси флагов (их число зависит от данных), обработчики событий и графики"""
+        self.create_flag_axes()
+        self.connect_events()
         self.plot_manager.plot_data()
 
-    def create_figure(self):
-        self.fig = self.plt.figure(figsize=(10, 8),
-                                   facecolor=self.light_bg_color if self.theme == "light"
-                                   else self.dark_bg_color)
+    def set_toolbar_enabled(self, enabled):
+        """Кнопки тулбара недоступны, пока нет данных"""
+        state = tk.NORMAL if enabled else tk.DISABLED
+        for widget in self.toolbar.winfo_children() + self.button_frame.winfo_children():
+            if isinstance(widget, (tk.Button, tk.Checkbutton, ttk.Button)):
+                widget.configure(state=state)
 
-        screen_height = self.root.winfo_screenheight()
-        num_flags = len(self.data_loader.flag_columns)
-        total_flag_height = self.flag_height_px * num_flags
-        main_height_px = screen_height - total_flag_height
-        total_flag_height_frac = total_flag_height / screen_height
-        self.main_height_frac = main_height_px / screen_height
+    def screen_height(self):
+        """Высота, от которой считаются доли осей флагов и основной оси, в пикселях"""
+        return self.root.winfo_screenheight()
+
+    def new_figure(self):
+        return self.plt.figure(figsize=(10, 8),
+                               facecolor=self.light_bg_color if self.theme == "light" else self.dark_bg_color)
 
-        # Основной график размещаем сразу под флагами
-        rect = [
+    def new_canvas(self):
+        canvas = FigureCanvasTkAgg(self.fig, master=self.root)
+        canvas.get_tk_widget().pack(side=tk.TOP, fill=tk.BOTH, expand=True)
+        return canvas
+
+    def main_axes_rect(self):
+        return [
             self.rectangle_left,
             self.rectangle_bottom + self.rectangle_top,
             (1.0 - self.rectangle_right),
             self.main_height_frac - self.rectangle_bottom - self.rectangle_top
         ]
-        self.ax_main = self.fig.add_axes(rect)
+
+    def create_figure(self):
+        """Фигура, основная и процентная оси и холст - всё, что не зависит от данных"""
+        self.fig = self.new_figure()
+
+        # До загрузки данных основной график занимает всю высоту
+        self.main_height_frac = 1.0
+        self.ax_main = self.fig.add_axes(self.main_axes_rect())
         self.ax_main.set_facecolor(self.light_bg_color if self.theme == "light"
                                    else self.dark_bg_color)
 
@@ -84,9 +168,38 @@ class DataVisualizationApp:
         self.ax_percent = self.ax_main.twinx()
         self.ax_percent.set_ylim(0, 100)  # Начальный диапазон для процентов
 
-        # Создаем оси для флагов, синхронизированные по X с основной осью
         self.flag_axes = []
-        for i, col in enumerate(self.data_loader.flag_columns):
+        self.flag_matrix = None
+        self.lod_manager.views += [self.time_grid, self.process_spans]
+
+        self.canvas = self.new_canvas()
+
+    def create_flag_axes(self):
+        """Оси флагов над основным графиком: их число известно только после загрузки данных"""
+        screen_height = self.screen_height()
+        num_flags = len(self.data_loader.flag_columns)
+        total_flag_height = self.flag_height_px * num_flags
+        if self.use_flag_matrix():
+            # Строки матрицы сжимаются, чтобы она не заняла больше своей доли экрана
+            total_flag_height = min(total_flag_height, FlagMatrix.MAX_HEIGHT_FRAC * screen_height)
+        main_height_px = screen_height - total_flag_height
+        total_flag_height_frac = total_flag_height / screen_height
+        self.main_height_frac = main_height_px / screen_height
+
+        # Основной график размещаем сразу под флагами (процентная ось - двойник, следует за ним)
+        self.ax_main.set_position(self.main_axes_rect())
+
+        # Создаем оси для флагов, синхронизированные по X с основной осью
+        if self.use_flag_matrix():
+            # Одна ось на все флаги; её место и высота задаются при построении
+            self.flag_matrix = FlagMatrix(self, self.fig.add_axes([self.rectangle_left, self.main_height_frac,
+                                                                   1.0 - self.rectangle_right, total_flag_height_frac],
+                                                                  sharex=self.ax_main))
+            self.flag_matrix.ax.set_facecolor(self.light_bg_color if self.theme == "light"
+                                              else self.dark_bg_color)
+            self.flag_axes.append(self.flag_matrix.ax)
+            self.lod_manager.views.insert(0, self.flag_matrix)
+        for i, col in enumerate(self.data_loader.flag_columns if self.flag_matrix is None else []):
             rect = [
                 self.rectangle_left,
                 self.main_height_frac + (num_flags - i - 1) * self.flag_height_px / screen_height + self.rectangle_top,
@@ -107,41 +220,58 @@ class DataVisualizationApp:
             ax.set_xlabel("")
             self.flag_axes.append(ax)
 
-        self.canvas = FigureCanvasTkAgg(self.fig, master=self.root)
-        self.canvas.get_tk_widget().pack(side=tk.TOP, fill=tk.BOTH, expand=True)
+    def connect_events(self):
+        self.trace_manager.connect()
+        self.render_scheduler.connect()
+        self.blit_manager.connect()
+        self.cursor_manager.connect()
+        self.flag_manager.connect()
+
+    def use_flag_matrix(self):
+        if self.flag_view == "auto":
+            return len(self.data_loader.flag_columns) > FlagMatrix.AUTO_FLAGS
+        return self.flag_view == "matrix"
 
     def create_toolbar(self):
-        self.toolbar = CustomToolbar(self.canvas, self.root)
+        self.toolbar = CustomToolbar(self.canvas, self.root, self.blit_manager, self.trace_manager)
         self.toolbar.pack(side=tk.TOP, fill=tk.BOTH, anchor=tk.CENTER)
+        # Строка значений под перекрестием - внизу окна, под графиком
+        self.readout_label = ttk.Label(self.root, anchor="w")
+        self.readout_label.pack(side=tk.BOTTOM, fill=tk.X, padx=5)
         self.canvas.get_tk_widget().pack(side=tk.BOTTOM, fill=tk.BOTH, expand=True)
+        # Замеры последних действий - над строкой значений, показываются по F2
+        self.trace_manager.create_stats_label(self.root)
         self.toolbar.zoom()
         self.toolbar.pan()
 
         self.button_frame = ttk.Frame(self.toolbar)
         self.button_frame.pack(side=tk.LEFT, padx=10)
 
-        first_timestamp = self.data_loader.timestamps.iloc[0]
-        year = first_timestamp.year
-        time_str = first_timestamp.strftime('%H:%M')
-
         self.frame_bar = self.button_frame
         self.background_button = tk.Button(
             self.frame_bar, text="G",
-            command=self.toggle_background, bg="#4CAF50", fg="white"
+            command=self.trace_manager.action("G", self.toggle_background), bg="#4CAF50", fg="white"
         )
         self.background_button.pack(side=tk.LEFT, padx=5)
         self.create_tooltip(self.background_button, "Toggle background color on flag plots")
 
         self.vertical_lines_button = tk.Button(
             self.frame_bar, text="T",
-            command=self.toggle_vertical_lines, bg="#4C50CA", fg="white"
+            command=self.trace_manager.action("T", self.toggle_vertical_lines), bg="#4C50CA", fg="white"
         )
         self.vertical_lines_button.pack(side=tk.LEFT, padx=5)
         self.create_tooltip(self.vertical_lines_button, "Toggle vertical lines on plots")
 
+        self.crosshair_button = tk.Button(
+            self.frame_bar, text="+",
+            command=self.trace_manager.action("+", self.cursor_manager.toggle), bg="#607D8B", fg="white"
+        )
+        self.crosshair_button.pack(side=tk.LEFT, padx=5)
+        self.create_tooltip(self.crosshair_button, "Toggle crosshair with values under the cursor")
+
         self.time_format_button = tk.Button(
-            self.frame_bar, text=str(year) if self.show_time_only.get() else time_str,
-            command=self.time_manager.toggle_time_format, bg="#FF5722", fg="white"
+            self.frame_bar, text=self.time_manager.format_button_text(),
+            command=self.trace_manager.action("time format", self.time_manager.toggle_time_format), bg="#FF5722", fg="white"
         )
         self.time_format_button.pack(side=tk.LEFT, padx=5)
         self.create_tooltip(self.time_format_button, "Toggle time format (Date/Time)")
@@ -151,7 +281,7 @@ class DataVisualizationApp:
 
         self.theme_button = ttk.Button(
             self.frame_bar, image=self.light_icon if self.theme == "light" else self.dark_icon,
-            command=self.theme_manager.toggle_theme
+            command=self.trace_manager.action("theme", self.theme_manager.toggle_theme)
         )
         self.theme_button.pack(side=tk.LEFT, padx=5)
         self.create_tooltip(self.theme_button, "Toggle theme (Light/Dark)")
@@ -192,29 +322,32 @@ class DataVisualizationApp:
         self.ax_percent.set_ylim(self.percent_ylim)
         for ax, ylim in zip(self.flag_axes, self.flag_ylims):
             ax.set_ylim(ylim)
-        self.canvas.draw()
+        self.render_scheduler.mark("limits")
 
     def toggle_background(self):
-        """Переключает фон флагов и перерисовывает график с сохранением масштаба."""
-        self.save_view_limits()  # Сохраняем текущий масштаб
+        """Переключает фон флагов; оси не очищаются, поэтому масштаб сохраняется."""
         self.show_flag_background.set(not self.show_flag_background.get())
         self.plot_manager.plot_data()
-        self.restore_view_limits()  # Восстанавливаем масштаб
 
     def toggle_vertical_lines(self):
-        """Переключает вертикальные линии и перерисовывает график с сохранением масштаба."""
-        self.save_view_limits()  # Сохраняем текущий масштаб
+        """Переключает вертикальные линии; оси не очищаются, поэтому масштаб сохраняется."""
         self.show_vertical_lines.set(not self.show_vertical_lines.get())
         self.plot_manager.plot_data()
-        self.restore_view_limits()  # Восстанавливаем масштаб
 
     def save_settings(self):
         self.config.save_app_config(self)
 
     def on_close(self):
         try:
+            self.load_manager.cancel()
+            self.tail_manager.stop()
+            self.stream_manager.stop()
+            # Источник закрывается и тогда, когда ожидание первой записи отменено
+            if self.loader_options.get("source") is not None:
+                self.loader_options["source"].close()
             self.save_settings()
-            if hasattr(self.data_loader, 'cleanup'):
+            self.trace_manager.export()
+            if self.data_loader is not None:
                 self.data_loader.cleanup()
         except Exception as e:
             print(f"Error when closing the application: {e}")
@@ -232,12 +365,13 @@ class DataVisualizationApp:
         self.create_tooltip(self.column_button, "Column Selector")
 
     def show_column_selector(self):
+        from column_selector import ColumnSelector     # Окна настроек импортируются при первом открытии
         if not hasattr(self, '_column_selector'):
             self._column_selector = ColumnSelector(
                 self.root,
                 self.config,
                 self.data_loader,
-                self.on_apply_callback,
+                self.trace_manager.action("columns", self.on_apply_callback),
                 self.theme
             )
         else:
@@ -249,7 +383,7 @@ class DataVisualizationApp:
                         self.root,
                         self.config,
                         self.data_loader,
-                        self.on_apply_callback,
+                        self.trace_manager.action("columns", self.on_apply_callback),
                         self.theme
                     )
 
@@ -260,9 +394,7 @@ class DataVisualizationApp:
             'percents': selection.get('percents', []),
             'bools': selection['bools']
         }
-        #self.save_view_limits()  # Сохраняем текущий масштаб
         self.plot_manager.plot_data()
-        #self.restore_view_limits()  # Восстанавливаем масштаб
 
     def create_application_settings_button(self):
         self.settings_button = ttk.Button(
@@ -274,12 +406,13 @@ class DataVisualizationApp:
         self.create_tooltip(self.settings_button, "Application Settings")
 
     def show_application_settings(self):
+        from settings_window import SettingsWindow
         self.save_settings()
         if not hasattr(self, '_settings_window'):
             self._settings_window = SettingsWindow(
                 self.root,
                 self.config,
-                self.on_apply_settings_callback,
+                self.trace_manager.action("settings", self.on_apply_settings_callback),
                 self.theme
             )
         else:
@@ -290,12 +423,12 @@ class DataVisualizationApp:
                     self._settings_window = SettingsWindow(
                         self.root,
                         self.config,
-                        self.on_apply_settings_callback,
+                        self.trace_manager.action("settings", self.on_apply_settings_callback),
                         self.theme
                     )
 
     def on_apply_settings_callback(self):
-        self.config.load_app_config(self)
+        self.config.load_app_config(self, self.var_type)
         self.theme_manager.apply_window_theme()
         self.theme_manager.apply_toolbar_theme()
         self.plot_manager.plot_data()
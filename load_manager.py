@@ -0,0 +1,176 @@
+import os
+import threading
+import time
+import tkinter as tk
+from tkinter import ttk, messagebox
+
+
+class LoadCancelled(Exception):
+    """Загрузка прервана кнопкой Cancel или закрытием окна"""
+
+
+class LoadProgress:
+    """
+    Ход загрузки: стадия, обработанные строки и их ожидаемое число. Пишет поток загрузки, читает
+    поток Tk - только присваивания, блокировка не нужна. Отмена срабатывает исключением LoadCancelled
+    в потоке загрузки при следующей отметке стадии или строк
+    """
+
+    def __init__(self):
+        self.stage = None
+        self.rows = 0
+        self.total = None       # Ожидаемое число строк, если читатель может его оценить
+        self.started = time.perf_counter()
+        self.stage_started = self.started
+        self.cancelled = threading.Event()
+
+    def set_stage(self, stage):
+        self.check()
+        self.stage, self.rows, self.total = stage, 0, None
+        self.stage_started = time.perf_counter()
+
+    def update(self, rows, total=None):
+        self.check()
+        self.rows, self.total = rows, total
+
+    def check(self):
+        if self.cancelled.is_set():
+            raise LoadCancelled("Loading cancelled")
+
+    def cancel(self):
+        self.cancelled.set()
+
+    def fraction(self):
+        """Доля стадии или None, если число строк неизвестно (оценка числа строк может быть занижена)"""
+        return min(self.rows / self.total, 1.0) if self.total else None
+
+    def eta(self):
+        fraction = self.fraction()
+        if not fraction:
+            return None
+        return (time.perf_counter() - self.stage_started) * (1 - fraction) / fraction
+
+    def text(self):
+        parts = [self.stage or "start"]
+        if self.rows:
+            parts.append(f"{self.rows:,} of ~{self.total:,} rows" if self.total else f"{self.rows:,} rows")
+        eta = self.eta()
+        if eta is not None:
+            parts.append(f"~{eta:.0f} s left")
+        parts.append(f"{time.perf_counter() - self.started:.0f} s")
+        return " | ".join(parts)
+
+
+class LoadManager:
+    """
+    Загрузка данных в фоновом потоке: окно и тулбар появляются сразу, поверх графика - ход загрузки
+    (стадия, строки, оставшееся время) и кнопка Cancel. Tk нельзя вызывать из других потоков,
+    поэтому результат забирается опросом через after, и первое построение идёт уже в потоке Tk
+    """
+    POLL_MS = 100
+
+    def __init__(self, app):
+        self.app = app
+        self.progress = None
+        self.thread = None
+        self.result = None
+        self.error = None
+        self.after_id = None
+        self.callbacks = []     # Что выполнить после первого построения (например, включить слежение)
+        self.frame = None
+        self.label = None
+        self.bar = None
+        self.indeterminate = False
+
+    def start(self):
+        self.progress = LoadProgress()
+        self.create_panel()
+        # Демон: закрытие окна не ждёт стадий без отметок хода (например, pandas.read_excel)
+        self.thread = threading.Thread(target=self.run, name="data-load", daemon=True)
+        self.thread.start()
+        self.schedule()
+
+    def run(self):
+        try:
+            with self.app.trace_manager.span("load"):
+                self.result = self.app.new_loader(self.progress)
+        except Exception as e:
+            self.error = e
+
+    def when_loaded(self, func):
+        if self.app.data_loader is not None:
+            func()
+        else:
+            self.callbacks.append(func)
+
+    def cancel(self):
+        if self.progress is not None:
+            self.progress.cancel()
+        if self.after_id is not None:
+            self.app.root.after_cancel(self.after_id)
+            self.after_id = None
+
+    def schedule(self):
+        self.after_id = self.app.root.after(self.POLL_MS, self.poll)
+
+    def poll(self):
+        self.after_id = None
+        if self.thread.is_alive():
+            self.update_panel()
+            self.schedule()
+            return
+        self.close_panel()
+        if isinstance(self.error, LoadCancelled):
+            print("Loading cancelled")
+            self.app.on_close()
+        elif self.error is not None:
+            messagebox.showerror("Application Error", str(self.error))
+            self.app.on_close()
+        else:
+            self.app.on_data_loaded(self.result)
+            for func in self.callbacks:
+                func()
+            self.callbacks = []
+
+    # Панель хода загрузки
+
+    def create_panel(self):
+        app = self.app
+        source = app.loader_options.get("source")
+        if source is not None:
+            name = source.address
+        else:
+            name = os.path.basename(app.file_path) if app.file_path else f"{app.demo_mode} demo data"
+        self.frame = ttk.Frame(app.root, padding=20, relief="ridge")
+        ttk.Label(self.frame, text=f"Loading {name}").pack(side=tk.TOP, anchor="w")
+        self.bar = ttk.Progressbar(self.frame, length=360, maximum=100)
+        self.bar.pack(side=tk.TOP, fill=tk.X, pady=10)
+        self.label = ttk.Label(self.frame)
+        self.label.pack(side=tk.TOP, anchor="w")
+        ttk.Button(self.frame, text="Cancel", command=self.on_cancel).pack(side=tk.TOP, anchor="e", pady=(10, 0))
+        self.frame.place(in_=app.canvas.get_tk_widget(), relx=0.5, rely=0.5, anchor="center")
+        self.update_panel()
+
+    def update_panel(self):
+        fraction = self.progress.fraction()
+        if fraction is None and not self.indeterminate:
+            self.bar.config(mode="indeterminate")
+            self.bar.start(20)
+            self.indeterminate = True
+        elif fraction is not None:
+            if self.indeterminate:
+                self.bar.stop()
+                self.bar.config(mode="determinate")
+                self.indeterminate = False
+            self.bar.config(value=fraction * 100)
+        self.label.config(text="Cancelling..." if self.progress.cancelled.is_set() else self.progress.text())
+
+    def on_cancel(self):
+        self.progress.cancel()
+        self.update_panel()
+
+    def close_panel(self):
+        if self.frame is not None:
+            self.bar.stop()
+            self.frame.destroy()
+            self.frame = None
@@ -0,0 +1,181 @@
+import numpy as np
+from stream_reader import ColumnBuffer
+
+
+class MinMaxPyramid:
+    """Пирамида индексов минимумов/максимумов для прореживания ряда без потери экстремумов"""
+    BRANCH = 4              # Сколько блоков уровня k объединяется в один блок уровня k+1
+    MIN_LEVEL_SIZE = 64     # Дальше огрублять нет смысла
+
+    def __init__(self, values):
+        self.values = np.asarray(values, dtype=float)
+        self.levels = []    # [(размер блока, индексы минимумов, индексы максимумов)]
+        self._buffers = []  # Растущие массивы уровней, чтобы дописывать новые отсчёты
+        self._update(0)
+
+    def extend(self, values):
+        """Принимает ряд, дополненный новыми отсчётами в конце, и пересчитывает только хвосты уровней"""
+        first = len(self.values)
+        self.values = np.asarray(values, dtype=float)
+        self._update(first)
+
+    def _update(self, first):
+        """Пересчитывает блоки всех уровней, затронутые отсчётами начиная с first"""
+        n = len(self.values)
+        size = 1
+        prev_min = prev_max = None      # Предыдущий уровень; None - сырые отсчёты
+        level = 0
+        while -(-n // size) > self.MIN_LEVEL_SIZE:
+            start = first // (size * self.BRANCH) if level < len(self._buffers) else 0
+            if prev_min is None:
+                src_min = src_max = np.arange(start * self.BRANCH, n)
+            else:
+                src_min = prev_min[start * self.BRANCH:]
+                src_max = prev_max[start * self.BRANCH:]
+            idx_min = self._select(src_min, self.BRANCH, np.inf, np.argmin)
+            idx_max = self._select(src_max, self.BRANCH, -np.inf, np.argmax)
+            size *= self.BRANCH
+
+            if level == len(self._buffers):
+                self._buffers.append((size, ColumnBuffer(np.intp, len(idx_min)), ColumnBuffer(np.intp, len(idx_max))))
+            _, buf_min, buf_max = self._buffers[level]
+            buf_min.truncate(start)
+            buf_min.append(idx_min)
+            buf_max.truncate(start)
+            buf_max.append(idx_max)
+            prev_min, prev_max = buf_min.view(), buf_max.view()
+            level += 1
+        self.levels = [(size, buf_min.view(), buf_max.view()) for size, buf_min, buf_max in self._buffers]
+
+    def _keys(self, idx, fill):
+        """Значения по индексам, NaN заменяются на fill, чтобы не участвовать в сравнении"""
+        keys = self.values[idx]
+        keys[np.isnan(keys)] = fill
+        return keys
+
+    def _select(self, idx, per, fill, func):
+        """Выбирает экстремум в каждой группе из per соседних блоков"""
+        keys = self._keys(idx, fill)
+        pad = -len(keys) % per
+        if pad:
+            keys = np.concatenate([keys, np.full(pad, fill)])
+            idx = np.concatenate([idx, np.full(pad, idx[-1])])
+        pos = func(keys.reshape(-1, per), axis=1)
+        return idx.reshape(-1, per)[np.arange(len(pos)), pos]
+
+    def extent(self):
+        """(минимум, максимум) всего ряда по самому грубому уровню; None - все значения NaN"""
+        if self.levels:
+            _, idx_min, idx_max = self.levels[-1]
+            lows, highs = self.values[idx_min], self.values[idx_max]
+        else:
+            lows = highs = self.values
+        if np.isnan(lows).all():
+            return None
+        return float(np.nanmin(lows)), float(np.nanmax(highs))
+
+    def query(self, i0, i1, buckets):
+        """
+        Возвращает отсортированные индексы отсчётов диапазона [i0, i1),
+        достаточные для отрисовки в buckets пиксельных столбцов:
+        в каждом столбце сохраняются точные минимум и максимум
+        """
+        n = i1 - i0
+        if n <= 0:
+            return np.empty(0, dtype=np.intp)
+        buckets = max(int(buckets), 1)
+        if n <= 2 * buckets:
+            return np.arange(i0, i1)
+
+        # Самый грубый уровень, на котором на один столбец приходится хотя бы один блок
+        size, idx_min, idx_max = 1, None, None
+        for level in reversed(self.levels):
+            if n // level[0] >= buckets:
+                size, idx_min, idx_max = level
+                break
+
+        # Пирамида - только для целых блоков внутри диапазона: крайние блоки выходят за [i0, i1),
+        # и их экстремум вне экрана подменил бы настоящий. Неполные края - по сырым отсчётам
+        b0 = -(-i0 // size)
+        b1 = max(i1 // size, b0)
+        parts = [[i0, i1 - 1], self._extremes(i0, min(b0 * size, i1)), self._extremes(max(b1 * size, i0), i1)]
+        if b1 > b0:
+            per = -(-(b1 - b0) // buckets)
+            if idx_min is None:
+                blocks_min = blocks_max = np.arange(b0, b1)
+            else:
+                blocks_min = idx_min[b0:b1]
+                blocks_max = idx_max[b0:b1]
+            parts += [self._select(blocks_min, per, np.inf, np.argmin),
+                      self._select(blocks_max, per, -np.inf, np.argmax)]
+        return np.unique(np.concatenate(parts).astype(np.intp))
+
+    def _extremes(self, i0, i1):
+        """Индексы минимума и максимума сырых отсчётов [i0, i1)"""
+        if i1 <= i0:
+            return np.empty(0, dtype=np.intp)
+        idx = np.arange(i0, i1)
+        return np.array([idx[np.argmin(self._keys(idx, np.inf))], idx[np.argmax(self._keys(idx, -np.inf))]])
+
+
+class LodManager:
+    """Подменяет данные линий на прореженные под текущий видимый диапазон и ширину холста"""
+
+    def __init__(self, app):
+        self.app = app
+        self.lines = []     # [(line, имя столбца)]
+        self._cids = {}
+        self.suspended = False  # Во время быстрого перетаскивания линии не пересчитываются
+        self.views = []         # Прочие представления с методом refresh(xlim), например матрица флагов
+
+    def reset(self):
+        self.lines = []
+
+    def remove(self, line):
+        self.lines = [(l, col) for l, col in self.lines if l is not line]
+
+    def plot(self, ax, col, **kwargs):
+        """Строит линию столбца, отдавая в matplotlib не больше точек, чем пикселей по ширине"""
+        ax.xaxis_date()
+        x, y = self.visible_data(ax, col, None)
+        line, = ax.plot(x, y, **kwargs)
+        self.lines.append((line, col))
+        return line
+
+    def connect(self, ax):
+        """Подписывается на изменение xlim (после clear() подписки оси сбрасываются)"""
+        if ax in self._cids:
+            ax.callbacks.disconnect(self._cids[ax])
+        self._cids[ax] = ax.callbacks.connect('xlim_changed', self.on_xlim_changed)
+
+    def visible_range(self, xlim):
+        """Диапазон индексов, попадающих в xlim, с одним отсчётом запаса с каждой стороны"""
+        loader = self.app.data_loader
+        n = len(loader.x_values)
+        if xlim is None or not loader.x_sorted:
+            return 0, n
+        i0 = max(int(np.searchsorted(loader.x_values, xlim[0], side='left')) - 1, 0)
+        i1 = min(int(np.searchsorted(loader.x_values, xlim[1], side='right')) + 1, n)
+        return i0, i1
+
+    def visible_data(self, ax, col, xlim):
+        loader = self.app.data_loader
+        i0, i1 = self.visible_range(xlim)
+        buckets = max(int(ax.bbox.width), 1)
+        idx = loader.lod[col].query(i0, i1, buckets)
+        return loader.x_values[idx], loader.lod[col].values[idx]
+
+    def refresh(self, xlim=None):
+        with self.app.trace_manager.span("lod"):
+            if xlim is None:
+                xlim = self.app.ax_main.get_xlim()
+            for line, col in self.lines:
+                x, y = self.visible_data(line.axes, col, xlim)
+                line.set_data(x, y)
+            for view in self.views:
+                view.refresh(xlim)
+
+    def on_xlim_changed(self, ax):
+        if self.suspended:
+            return
+        self.refresh(ax.get_xlim())
@@ -1,11 +1,22 @@
 import warnings
-import pandas as pd
+import numpy as np
+from matplotlib.collections import PolyCollection
 from matplotlib.dates import AutoDateLocator
 
 
 class PlotManager:
+    """
+    Построение графиков без очистки осей: артисты каждого столбца хранятся в реестре,
+    при смене выбора добавляются или удаляются только затронутые, стили меняются на месте,
+    а данные передаются заново только после их изменения (DataLoader.data_version)
+    """
+
     def __init__(self, app):
         self.app = app
+        self.artists = {}       # (вид, столбец или номер оси флага) -> {"col", "version", "artists"}
+        self.detached = {}      # Снятые с осей области: повторное включение столбца не строит их заново
+        self.data_version = None
+        self.y_key = None       # Для чего рассчитаны пределы по Y
 
     def safe_add_legend(self, ax):
         """Безопасное добавление легенды с обработкой предупреждений"""
@@ -29,188 +40,330 @@ class PlotManager:
         except Exception:
             return ax.legend(lines, labels, loc='upper right', fontsize=self.app.font_size)
 
-    def plot_data(self):
-        self.app.ax_main.clear()
-        if self.app.ax_percent:
-            self.app.ax_percent.clear()
+    def get_entry(self, key, col, versioned=True):
+        """Запись реестра, если она построена для того же столбца (и той же версии данных), иначе удаляет её"""
+        entry = self.artists.get(key)
+        if entry is None:
+            entry = self.attach(key)
+        if entry is None:
+            return None
+        if entry["col"] == col and (not versioned or entry["version"] == self.app.data_loader.data_version):
+            return entry
+        self.remove_entry(key)
+        return None
+
+    def add_entry(self, key, col, artists):
+        self.artists[key] = {"col": col, "version": self.app.data_loader.data_version, "artists": list(artists),
+                             "axes": [artist.axes for artist in artists]}
+        return self.artists[key]
+
+    def remove_entry(self, key, detach=False):
+        entry = self.artists.pop(key, None)
+        if entry is None:
+            return
+        for artist in entry["artists"]:
+            if key[0] in ("line", "percent"):
+                self.app.lod_manager.remove(artist)
+            artist.remove()
+        if detach:
+            self.detached[key] = entry
+
+    def attach(self, key):
+        """Возвращает на оси снятые ранее области, если данные с тех пор не менялись"""
+        entry = self.detached.pop(key, None)
+        if entry is None or entry["version"] != self.app.data_loader.data_version:
+            return None
+        for artist, ax in zip(entry["artists"], entry["axes"]):
+            ax.add_collection(artist, autolim=False)
+        self.artists[key] = entry
+        return entry
+
+    def prune(self, keep):
+        """Снимает с осей артистов столбцов, которые больше не отображаются"""
+        version = self.app.data_loader.data_version
+        self.detached = {key: entry for key, entry in self.detached.items() if entry["version"] == version}
+        for key in [key for key in self.artists if key not in keep]:
+            # Построение областей процессов и флагов - самое дорогое, их сохраняем до изменения данных
+            self.remove_entry(key, detach=key[0] in ("process", "flag"))
 
-        self.plot_data_main()
-        self.plot_data_flags()
-        self.plot_data_time_lines()
+    def plot_data(self):
+        with self.app.trace_manager.span("plot"):
+            self._plot_data()
+
+    def _plot_data(self):
+        loader = self.app.data_loader
+        trace = self.app.trace_manager
+        first = self.data_version is None
+
+        with trace.span("artists"):
+            keep = self.plot_data_main() | self.plot_data_flags() | self.plot_data_time_lines()
+            self.prune(keep)
+
+        if self.data_version != loader.data_version:
+            self.app.render_scheduler.mark("data")
+            self.data_version = loader.data_version
+        with trace.span("styles"):
+            self.apply_styles()
+            self.rescale_y()
+        if first:
+            self.reset_x_view()
 
         self.app.time_manager.update_time_format()
-        self.safe_add_legend(self.app.ax_main)
+        with trace.span("legend"):
+            legend = self.safe_add_legend(self.app.ax_main)
+        if legend is not None:
+            # Легенда не двигается вместе с данными - в сдвигаемую при перетаскивании картинку она не входит
+            self.app.blit_manager.add_animated("legend", legend)
         self.app.fig.autofmt_xdate()
         self.app.theme_manager.apply_theme()
-        self.app.canvas.draw()
+        self.app.render_scheduler.mark("style", "layout")
+
+    def reset_x_view(self):
+        """Показать весь диапазон данных (с обычным запасом по краям)"""
+        x = self.app.data_loader.x_values
+        if len(x) == 0:
+            return
+        lo, hi = (x[0], x[-1]) if self.app.data_loader.x_sorted else (np.nanmin(x), np.nanmax(x))
+        margin = (hi - lo) * self.app.ax_main.margins()[0]
+        self.app.ax_main.set_xlim(*self.app.ax_main.xaxis.get_major_locator().nonsingular(lo - margin, hi + margin))
+
+    def data_extent(self, ax, cols):
+        """Пределы по Y для столбцов по их пирамидам (без прохода по всем данным) с обычным запасом"""
+        extents = [self.app.data_loader.lod[col].extent() for col in cols if col in self.app.data_loader.lod]
+        extents = [extent for extent in extents if extent is not None]
+        if not extents:
+            return 0.0, 1.0
+        lo = min(extent[0] for extent in extents)
+        hi = max(extent[1] for extent in extents)
+        margin = (hi - lo) * ax.margins()[1]
+        return ax.yaxis.get_major_locator().nonsingular(lo - margin, hi + margin)
+
+    def rescale_y(self):
+        """Пересчитывает пределы по Y, только если изменился набор линий или данные"""
+        main_cols = tuple(entry["col"] for key, entry in self.artists.items() if key[0] == "line")
+        percent_cols = tuple(entry["col"] for key, entry in self.artists.items() if key[0] == "percent")
+        y_key = (main_cols, percent_cols, self.data_version, self.app.lock_percent_scale.get())
+        if y_key == self.y_key:
+            return
+        self.y_key = y_key
+
+        # Запас 5% сверху и снизу под области процессов и подписи
+        y_min, y_max = self.data_extent(self.app.ax_main, main_cols)
+        y_range = y_max - y_min
+        self.app.ax_main.set_ylim(y_min - 0.05 * y_range, y_max + 0.05 * y_range)
+
+        # Настройка оси процентов
+        if self.app.lock_percent_scale.get():
+            self.app.ax_percent.set_ylim(0, 100)
+        else:
+            self.app.ax_percent.set_ylim(*self.data_extent(self.app.ax_percent, percent_cols))
+        self.app.ax_percent.set_autoscale_on(False)
 
     def plot_data_main(self):
+        loader = self.app.data_loader
+        keep = set()
         # Получаем выбранные столбцы (если выбор не сделан, используем все)
         selected = getattr(self.app, 'selected_columns', {})
 
-        # Построение числовых данных (только выбранные)
-        numeric_cols = selected.get('numerics', self.app.data_loader.numeric_columns)
-        for col in numeric_cols:
-            if col in self.app.data_loader.numeric_columns:
-                self.app.ax_main.plot(self.app.data_loader.timestamps,
-                                      self.app.data_loader.df[col],
-                                      label=col)
-
-        y_min, y_max = self.app.ax_main.get_ylim()
-        y_range = y_max - y_min
-        y_min_extended = y_min - 0.05 * y_range
-        y_max_extended = y_max + 0.05 * y_range
-        self.app.ax_main.set_ylim(y_min_extended, y_max_extended)
-
-        # Построение процентных данных (только выбранные)
-        if hasattr(self.app.data_loader, 'percent_columns'):
-            percent_cols = selected.get('percents', self.app.data_loader.percent_columns)
-            for col in percent_cols:
-                if col in self.app.data_loader.percent_columns:
-                    self.app.ax_percent.plot(
-                        self.app.data_loader.timestamps,
-                        self.app.data_loader.df[col],
-                        linestyle='--',
-                        alpha=0.7,
-                        label=col
-                    )
-
-        # Настройка оси процентов после построения графиков
-        if self.app.lock_percent_scale.get():
-            self.app.ax_percent.set_ylim(0, 100)
-            self.app.ax_percent.set_autoscale_on(False)
-        else:
-            self.app.ax_percent.set_autoscale_on(True)
-            self.app.ax_percent.relim()
-            self.app.ax_percent.autoscale_view(scaley=True)
+        # Числовые и процентные данные (только выбранные)
+        numeric_cols = [col for col in selected.get('numerics', loader.numeric_columns)
+                        if col in loader.numeric_columns]
+        percent_cols = [col for col in selected.get('percents', loader.percent_columns)
+                        if col in loader.percent_columns]
+        for kind, ax, cols, style in (("line", self.app.ax_main, numeric_cols, {}),
+                                      ("percent", self.app.ax_percent, percent_cols,
+                                       {"linestyle": '--', "alpha": 0.7})):
+            for col in cols:
+                key = (kind, col)
+                keep.add(key)
+                # Линии не пересоздаются при изменении данных - их прореживает LodManager
+                if self.get_entry(key, col, versioned=False) is None:
+                    self.add_entry(key, col, [self.app.lod_manager.plot(ax, col, label=col, **style)])
+
+        # Прореженные линии пересчитываются при каждом изменении видимого диапазона
+        self.app.lod_manager.connect(self.app.ax_main)
 
         # Построение булевых данных (только выбранные)
-        bool_cols = selected.get('bools', self.app.data_loader.bool_columns)
-        for i, col in enumerate(bool_cols):
-            if col in self.app.data_loader.bool_columns:
-                color = self.app.bool_colors[i] if i < len(self.app.bool_colors) else f"C{i}"
-                alpha = self.app.bool_alphas[i] if i < len(self.app.bool_alphas) else 0.2
-                mask = self.app.data_loader.df[col].astype(bool)
-
-                self.app.ax_main.fill_between(
-                    self.app.data_loader.timestamps,
-                    y_min_extended,
-                    y_max_extended,
-                    where=mask,
-                    color=color,
-                    alpha=alpha,
-                    step="pre",
-                    label=f'[{col}]'
-                )
-
-                if self.app.show_processes_labels and mask.any():
-                    first_true_idx = mask.idxmax()
-                    middle_x = self.app.data_loader.timestamps[first_true_idx]
-                    xlim = self.app.ax_main.get_xlim()
-                    xmin = pd.to_datetime(xlim[0], unit='D')
-                    xmax = pd.to_datetime(xlim[1], unit='D')
-
-                    if xmin <= middle_x <= xmax:
-                        label_y = y_min_extended + 0.02 * y_range
-                        label_x = middle_x
-                        self.app.ax_main.text(
-                            label_x, label_y, col,
-                            color='black', ha='left', va='bottom',
-                            bbox=dict(facecolor='white', alpha=0.7, edgecolor='none'),
-                            fontsize=self.app.font_size - 2,
-                            rotation=0
-                        )
+        bool_cols = [col for col in selected.get('bools', loader.bool_columns) if col in loader.bool_columns]
+        for col in bool_cols:
+            keep.add(("process", col))
+            if self.get_entry(("process", col), col) is None:
+                self.add_entry(("process", col), col, [self.fill_process(col)])
+
+        # Области и подписи серий пересчитываются под видимый диапазон вместе с линиями
+        self.app.process_spans.plot(bool_cols if self.app.show_processes_labels else [])
+        return keep
+
+    def apply_styles(self):
+        """Цвета и прозрачность из настроек - меняются у существующих артистов на месте"""
+        loader = self.app.data_loader
+        selected = getattr(self.app, 'selected_columns', {})
 
+        # Цвет линий по порядку выбора, как после очистки оси
+        for kind, cols in (("line", selected.get('numerics', loader.numeric_columns)),
+                           ("percent", selected.get('percents', loader.percent_columns))):
+            entries = [self.artists[(kind, col)] for col in cols if (kind, col) in self.artists]
+            for i, entry in enumerate(entries):
+                entry["artists"][0].set_color(f"C{i}")
+
+        for i, col in enumerate(selected.get('bools', loader.bool_columns)):
+            color = self.app.bool_colors[i] if i < len(self.app.bool_colors) else f"C{i}"
+            alpha = self.app.bool_alphas[i] if i < len(self.app.bool_alphas) else 0.2
+            for artist in self.artists.get(("process", col), {}).get("artists", []):
+                artist.set_color(color)
+                artist.set_alpha(alpha)
+
+        for key, entry in self.artists.items():
+            if key[0] in ("flag", "flag_bg"):
+                color, alpha = ((self.app.flag_color, self.app.flag_alpha) if key[0] == "flag"
+                                else (self.app.flag_bg_color, self.app.flag_bg_alpha))
+                for artist in entry["artists"]:
+                    artist.set_color(color)
+                    artist.set_alpha(alpha)
+
+    def fill_process(self, col):
+        """
+        Область процесса - прямоугольники по видимым сериям, их пересчитывает ProcessSpans.
+        По Y занимает всю высоту оси (координаты оси), поэтому не зависит от масштаба и выбора числовых столбцов
+        """
+        return self.app.ax_main.add_collection(PolyCollection(self.app.process_spans.polygons(col), label=f'[{col}]',
+                                                              transform=self.app.ax_main.get_xaxis_transform()),
+                                               autolim=False)
 
     def plot_data_flags(self):
+        loader = self.app.data_loader
+        keep = set()
         # Получаем выбранные столбцы (если выбор не сделан, используем все)
         selected = getattr(self.app, 'selected_columns', {})
 
-        # Построение флагов (только выбранные)
-        flag_cols = selected.get('flags', self.app.data_loader.flag_columns)
-        for ax, col in zip(self.app.flag_axes[:len(flag_cols)], flag_cols):
-            if col in self.app.data_loader.flag_columns:
-                ax.clear()
-
-                # Показать график
-                ax.set_visible(True)
-
-                # Добавить обработчик клика (один раз на ось)
-                # Отключаем предыдущие обработчики, чтобы избежать дублирования
-                if hasattr(ax, 'flag_click_cid'):
-                    ax.figure.canvas.mpl_disconnect(ax.flag_click_cid)
-                cid = ax.figure.canvas.mpl_connect("button_press_event", self.app.flag_manager.on_flag_click)
-                ax.flag_click_cid = cid  # Сохраняем CID для последующего отключения
-
-                # Рисовать ли фон?
-                if self.app.show_flag_background.get():
-                    ax.fill_between(
-                        self.app.data_loader.timestamps,
-                        0,
-                        1,
-                        color=self.app.flag_bg_color,
-                        alpha=self.app.flag_bg_alpha,
-                    )
-
-                # Закрасить область между двумя кривыми
-                ax.fill_between(
-                    self.app.data_loader.timestamps,
-                    0,
-                    self.app.data_loader.df[col].astype(int),
-                    color=self.app.flag_color,
-                    alpha=self.app.flag_alpha,
-                )
-
-                # Название флага слева
-                ax.set_ylim(0, 1)
-                ax.set_yticks([])
-                display_name = col.replace("F-", "") if col.startswith("F-") else col
-                ax.set_ylabel(display_name, rotation=0, ha="right", va="center",
-                              fontsize=self.app.font_size, fontweight="bold" if self.app.legend_bold else "normal")
-
-                # Спрятать легенду оси времени
-                ax.set_xticks([])
-                ax.set_xlabel("")
-                ax.tick_params(axis="x", labelsize=1, pad=1200, bottom=False, labelbottom=False,
-                               top=True, labeltop=True, labelcolor=(0, 0, 0, 0))
-
-            # Скрываем неиспользуемые оси флагов
-            for ax in self.app.flag_axes[len(flag_cols):]:
-                ax.set_visible(False)
-                # Снимаем обработчик клика
-                if hasattr(ax, 'flag_click_cid'):
-                    ax.figure.canvas.mpl_disconnect(ax.flag_click_cid)
-                    delattr(ax, 'flag_click_cid')
-
+        # Построение флагов (только выбранные); оси флагов заняты по порядку выбора
+        flag_cols = selected.get('flags', loader.flag_columns)
+        if self.app.flag_matrix is not None:
+            self.app.flag_matrix.plot(flag_cols)
+            return keep
+        for k, (ax, col) in enumerate(zip(self.app.flag_axes[:len(flag_cols)], flag_cols)):
+            if col not in loader.flag_columns:
+                continue
+
+            # Показать график
+            ax.set_visible(True)
+
+            # Рисовать ли фон?
+            if self.app.show_flag_background.get():
+                keep.add(("flag_bg", k))
+                if self.get_entry(("flag_bg", k), col) is None:
+                    self.add_entry(("flag_bg", k), col, [self.fill_flag_background(ax)])
+
+            # Закрасить область между двумя кривыми
+            keep.add(("flag", k))
+            if self.get_entry(("flag", k), col) is None:
+                self.add_entry(("flag", k), col, [self.fill_flag(ax, col)])
+
+            # Название флага слева
+            ax.set_ylim(0, 1)
+            ax.set_yticks([])
+            display_name = col.replace("F-", "") if col.startswith("F-") else col
+            ax.set_ylabel(display_name, rotation=0, ha="right", va="center",
+                          fontsize=self.app.font_size, fontweight="bold" if self.app.legend_bold else "normal")
+
+            # Спрятать легенду оси времени
+            ax.set_xticks([])
+            ax.set_xlabel("")
+            ax.tick_params(axis="x", labelsize=1, pad=1200, bottom=False, labelbottom=False,
+                           top=True, labeltop=True, labelcolor=(0, 0, 0, 0))
+
+        # Скрываем неиспользуемые оси флагов
+        for ax in self.app.flag_axes[len(flag_cols):]:
+            ax.set_visible(False)
+        return keep
+
+    def fill_flag_background(self, ax):
+        timestamps = self.app.data_loader.timestamps
+        return ax.axvspan(timestamps.min(), timestamps.max(), 0, 1)
+
+    def fill_flag(self, ax, col):
+        """
+        Полоса флага - прямоугольники по сериям включённого состояния: число вершин
+        зависит от числа переключений, а не от числа строк. Серия длится до следующего отсчёта
+        """
+        loader = self.app.data_loader
+        starts, ends = loader.flag_runs[col].intervals(True)
+        x = loader.x_values
+        left = x[starts]
+        right = x[np.minimum(ends, len(x) - 1)]
+        bottom, top = np.zeros_like(left), np.ones_like(left)
+        # Вершины всех прямоугольников одним массивом - без построения каждого по отдельности
+        verts = np.stack([np.column_stack(corner) for corner in
+                          ((left, bottom), (left, top), (right, top), (right, bottom))], axis=1)
+        return ax.add_collection(PolyCollection(verts), autolim=False)
+
+    def plot_appended_data(self, start, follow=False):
+        """
+        Перестраивает полосы флагов после дописывания строк с номера start (режим слежения).
+        Области процессов пересчитывает ProcessSpans вместе с линиями. Пределы по Y пересчитываются
+        при автопрокрутке (follow) или если новые значения вышли за видимые пределы - иначе масштаб,
+        выбранный пользователем, не сбивается. Возвращает, изменились ли пределы
+        """
+        version = self.app.data_loader.data_version
+        for key, entry in list(self.artists.items()):
+            if key[0] in ("flag", "flag_bg"):
+                # Полоса - прямоугольники по сериям (последняя могла продлиться), фон - один прямоугольник:
+                # проще построить заново
+                ax = self.app.flag_axes[key[1]]
+                self.remove_entry(key)
+                self.add_entry(key, entry["col"], [self.fill_flag(ax, entry["col"]) if key[0] == "flag"
+                                                   else self.fill_flag_background(ax)])
+                continue
+            entry["version"] = version
+        self.data_version = version
+        self.apply_styles()
+        if not follow and not self.appended_outside(start):
+            return False
+        self.rescale_y()
+        return True
+
+    def appended_outside(self, start):
+        """Есть ли среди строк с номера start значения линий вне видимых пределов своей оси"""
+        df = self.app.data_loader.df
+        for ax, kind in ((self.app.ax_main, "line"), (self.app.ax_percent, "percent")):
+            lo, hi = sorted(ax.get_ylim())
+            for key, entry in self.artists.items():
+                if key[0] != kind:
+                    continue
+                values = df[entry["col"]].to_numpy(dtype=float)[start:]
+                values = values[np.isfinite(values)]
+                if len(values) and (values.min() < lo or values.max() > hi):
+                    return True
+        return False
 
     def plot_data_time_lines(self):
+        keep = set()
         # Получаем выбранные столбцы (если выбор не сделан, используем все)
         selected = getattr(self.app, 'selected_columns', {})
         flag_cols = selected.get('flags', self.app.data_loader.flag_columns)
 
         # Прорисовка вертикальных линий по меткам времени
         if self.app.show_vertical_lines.get():
-            for timestamp in self.app.data_loader.timestamps:
-                # Прорисовка линий на основном графике
-                self.app.ax_main.axvline(timestamp, color="gray", linestyle="--", alpha=0.3)
-                # Прорисовка линий на графиках флагов
-                for ax in self.app.flag_axes[:len(flag_cols)]:
-                    ax.axvline(timestamp, color="gray", linestyle="--", alpha=0.3)
+            self.app.time_grid.plot([self.app.ax_main] + [ax for ax in self.app.flag_axes if ax.get_visible()])
 
             # Настройка оси времени
             self.app.ax_main.xaxis.set_minor_locator(AutoDateLocator())
             self.app.ax_main.tick_params(axis="x", rotation=0)
         else:
+            self.app.time_grid.clear()
             # Настройка без линий
             self.app.ax_main.xaxis.set_major_locator(AutoDateLocator())
             self.app.ax_main.tick_params(axis="x", rotation=0)
 
         # Обновляем позицию основного графика с учетом текущего количества флагов
         num_active_flags = len(flag_cols)
-        screen_height = self.app.root.winfo_screenheight()
+        screen_height = self.app.screen_height()
 
         # Вычисляем суммарную высоту флагов в долях от экрана
-        total_flag_height = num_active_flags * self.app.flag_height_px / screen_height
+        if self.app.flag_matrix is not None:
+            total_flag_height = self.app.flag_matrix.height_px(len(self.app.flag_matrix.columns)) / screen_height
+        else:
+            total_flag_height = num_active_flags * self.app.flag_height_px / screen_height
 
         # Добавляем отступ между флагами и основным графиком (32 пикселей)
         gap = 32 / screen_height
@@ -226,3 +379,4 @@ class PlotManager:
             1.0 - self.app.rectangle_right,
             max(0.1, main_height)  # Защита от отрицательной высоты
         ])
+        return keep
@@ -0,0 +1,117 @@
+import numpy as np
+
+
+class ProcessSpans:
+    """
+    Области и подписи процессов (F- столбцов) на основной оси под видимый диапазон. Берутся
+    готовые серии «включено» (FlagRuns): в область попадают только видимые серии, а серии,
+    между которыми меньше пикселя, сливаются - прямоугольников не больше, чем пикселей по ширине.
+    Подписывается каждая видимая серия, у левого края серии или оси; подписи, которые налезли бы
+    на предыдущую, пропускаются. Текстовые артисты переиспользуются
+    """
+    Y = 0.07 / 1.1          # Как и раньше: на 2% диапазона данных выше нижней границы (которая ниже данных на 5%)
+    GAP_PX = 4              # Минимальный зазор между подписями
+
+    def __init__(self, app):
+        self.app = app
+        self.columns = []       # Столбцы с подписями
+        self.texts = []         # Пул подписей; лишние скрыты
+        self.spans = {}         # столбец -> (версия данных, x начал серий, x концов серий)
+        self.widths = {}        # (столбец, размер шрифта) -> ширина подписи с зазором, пиксели
+
+    def plot(self, label_columns):
+        self.columns = [col for col in label_columns if col in self.app.data_loader.flag_runs]
+        self.refresh()
+
+    def run_spans(self, col):
+        """Начала и концы серий «включено» по оси времени, кэш до изменения данных. Серия длится до следующего отсчёта"""
+        loader = self.app.data_loader
+        cached = self.spans.get(col)
+        if cached is None or cached[0] != loader.data_version:
+            starts, ends = loader.flag_runs[col].intervals(True)
+            x = loader.x_values
+            cached = (loader.data_version, x[starts], x[np.minimum(ends, len(x) - 1)])
+            self.spans[col] = cached
+        return cached[1:]
+
+    def view(self, xlim=None):
+        """Пределы по X и число пикселей на единицу X основной оси"""
+        x0, x1 = xlim if xlim is not None else self.app.ax_main.get_xlim()
+        return x0, x1, self.app.ax_main.bbox.width / (x1 - x0) if x1 > x0 else 0
+
+    def visible_spans(self, col, x0, x1, scale):
+        xs, xe = self.run_spans(col)
+        k0 = int(np.searchsorted(xe, x0, side="right"))
+        k1 = int(np.searchsorted(xs, x1, side="left"))
+        xs, xe = xs[k0:k1], xe[k0:k1]
+        if len(xs) < 2:
+            return xs, xe
+        # Промежуток меньше пикселя на экране не виден - соседние серии сливаются в одну
+        first = np.concatenate([[True], (xs[1:] - xe[:-1]) * scale >= 1])
+        last = np.append(first[1:], True)
+        return xs[first], xe[last]
+
+    def polygons(self, col, xlim=None):
+        """Прямоугольники высотой 0-1 по видимым сериям - для PolyCollection"""
+        left, right = self.visible_spans(col, *self.view(xlim))
+        bottom, top = np.zeros_like(left), np.ones_like(left)
+        return np.stack([np.column_stack(corner) for corner in
+                         ((left, bottom), (left, top), (right, top), (right, bottom))], axis=1)
+
+    def collections(self):
+        """Области отображаемых процессов из реестра PlotManager"""
+        return {entry["col"]: entry["artists"][0]
+                for key, entry in self.app.plot_manager.artists.items() if key[0] == "process"}
+
+    def text(self, i):
+        if i == len(self.texts):
+            ax = self.app.ax_main
+            self.texts.append(ax.text(0, self.Y, "", transform=ax.get_xaxis_transform(),
+                                      color='black', ha='left', va='bottom',
+                                      bbox=dict(facecolor='white', alpha=0.7, edgecolor='none'), rotation=0))
+        return self.texts[i]
+
+    def label_width(self, col):
+        key = (col, self.app.font_size)
+        if key not in self.widths:
+            label = self.text(len(self.texts))
+            label.set_text(col)
+            label.set_fontsize(self.app.font_size - 2)
+            self.widths[key] = label.get_window_extent(self.app.canvas.get_renderer()).width + self.GAP_PX
+            label.set_visible(False)
+        return self.widths[key]
+
+    def label_positions(self, x0, x1, scale):
+        """(пиксель от левого края оси, столбец) подписей, которые не налезают друг на друга"""
+        candidates = []
+        for col in self.columns:
+            xs, _ = self.visible_spans(col, x0, x1, scale)
+            px = (np.maximum(xs, x0) - x0) * scale
+            width = self.label_width(col)
+            # Не больше двух кандидатов на ширину подписи - остальные всё равно налезли бы на них
+            _, first = np.unique(np.floor(2 * px / width), return_index=True)
+            candidates += [(p, width, col) for p in px[first]]
+        shown = []
+        right = -np.inf
+        for p, width, col in sorted(candidates):
+            if p >= right:
+                shown.append((p, col))
+                right = p + width
+        return shown
+
+    def refresh(self, xlim=None):
+        x0, x1, scale = self.view(xlim)
+        if not scale:
+            return
+        for col, collection in self.collections().items():
+            collection.set_verts(self.polygons(col, (x0, x1)))
+
+        shown = self.label_positions(x0, x1, scale) if self.columns else []
+        for i, (p, col) in enumerate(shown):
+            label = self.text(i)
+            label.set_position((x0 + p / scale, self.Y))
+            label.set_text(col)
+            label.set_fontsize(self.app.font_size - 2)
+            label.set_visible(True)
+        for label in self.texts[len(shown):]:
+            label.set_visible(False)
@@ -0,0 +1,59 @@
+import time
+
+
+class RenderScheduler:
+    """
+    Единая точка перерисовки. Менеджеры не вызывают canvas.draw(), а отмечают, что изменилось
+    (данные, стиль, раскладка, пределы); все отметки за один цикл событий Tk собираются
+    в одну полную отрисовку. Счётчик отрисовок показывает, сколько их пришлось на одно действие.
+    Без окна Tk (пакетная отрисовка) отметки копятся до явного prepare() перед сохранением в файл
+    """
+    KINDS = ("data", "style", "layout", "limits")
+
+    def __init__(self, app):
+        self.app = app
+        self.dirty = set()
+        self.scheduled = False
+        self.verbose = False    # Печатать каждое действие, а не только с лишними отрисовками
+        self.draws = 0          # Все полные отрисовки холста, включая вызванные самим matplotlib
+        self.marked = 0         # Значение draws при первой отметке действия
+
+    def connect(self):
+        self.app.canvas.mpl_connect("draw_event", self.on_draw)
+
+    def on_draw(self, event):
+        self.draws += 1
+
+    def mark(self, *kinds):
+        """Отмечает изменения; отрисовка - когда Tk закончит обработку текущих событий"""
+        unknown = set(kinds) - set(self.KINDS)
+        if unknown:
+            raise ValueError(f"Unknown render change: {', '.join(sorted(unknown))}")
+        self.dirty.update(kinds)
+        if not self.scheduled and self.app.root is not None:
+            self.scheduled = True
+            # Отрисовки до отметки (кнопки навигации matplotlib) к действию не относятся
+            self.marked = self.draws
+            self.app.root.after_idle(self.flush)
+
+    def prepare(self):
+        """Применяет отмеченные изменения, кроме самой отрисовки; возвращает их"""
+        dirty, self.dirty = self.dirty, set()
+        # Прореженные линии и представления по видимому диапазону - один раз на все изменения данных
+        if "data" in dirty:
+            self.app.lod_manager.refresh()
+        return dirty
+
+    def flush(self):
+        self.scheduled = False
+        start = time.perf_counter()
+        dirty = self.prepare()
+        if not dirty:
+            return
+        self.app.canvas.draw()
+
+        # Отрисовки действия: эта и те, что обработчики сделали сами после первой отметки
+        count = self.draws - self.marked
+        if self.verbose or count != 1:
+            print(f"Render: {', '.join(kind for kind in self.KINDS if kind in dirty)} -> "
+                  f"{count} draw(s), {(time.perf_counter() - start) * 1000:.0f} ms")
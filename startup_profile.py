@@ -0,0 +1,111 @@
+import sys
+import time
+from contextlib import contextmanager
+
+
+class StartupProfile:
+    """
+    Замеры запуска (--profile-startup): время импорта каждого модуля - собственное и вместе
+    с вложенными импортами, как в python -X importtime, но и в собранном PyInstaller приложении, -
+    и стадии инициализации до первого простоя цикла событий Tk (окно показано).
+    Импорты замеряются на выполнении кода модуля его загрузчиком, поэтому install() нужно
+    вызвать до импорта остальных модулей приложения
+    """
+    TOP = 25
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.enabled = False
+        self.modules = []   # (имя, всего, собственное время, вложенность)
+        self.stack = []     # Время вложенных импортов выполняющихся сейчас модулей
+        self.stages = []    # (имя, начало от старта, длительность)
+
+    def install(self):
+        self.enabled = True
+        sys.meta_path.insert(0, self)
+
+    def uninstall(self):
+        if self in sys.meta_path:
+            sys.meta_path.remove(self)
+
+    # Поиск модуля - остальными искателями, загрузчик найденного модуля замеряется
+
+    def find_spec(self, fullname, path, target=None):
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, "find_spec"):
+                continue
+            spec = finder.find_spec(fullname, path, target)
+            if spec is not None:
+                self.wrap(spec.loader)
+                return spec
+        return None
+
+    def wrap(self, loader):
+        # Встроенные модули загружает сам класс-загрузчик - их не трогаем, они и так быстрые
+        if loader is None or isinstance(loader, type) or getattr(loader, "_startup_timed", False):
+            return
+        exec_module = getattr(loader, "exec_module", None)
+        if exec_module is None:
+            return
+
+        def timed_exec_module(module):
+            self.stack.append(0.0)
+            start = time.perf_counter()
+            try:
+                exec_module(module)
+            finally:
+                total = time.perf_counter() - start
+                nested = self.stack.pop()
+                if self.stack:
+                    self.stack[-1] += total
+                self.modules.append((module.__name__, total, total - nested, len(self.stack)))
+        try:
+            loader.exec_module = timed_exec_module
+            loader._startup_timed = True
+        except AttributeError:
+            pass
+
+    # Стадии инициализации
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages.append((name, start - self.started, time.perf_counter() - start))
+
+    def packages(self):
+        """Собственное время импорта, сложенное по пакетам верхнего уровня"""
+        result = {}
+        for name, _, own, _ in self.modules:
+            package = name.split(".")[0]
+            count, total = result.get(package, (0, 0.0))
+            result[package] = (count + 1, total + own)
+        return sorted(result.items(), key=lambda item: item[1][1], reverse=True)
+
+    def report(self, trace=None):
+        """Печатает замеры; trace - TraceManager приложения с замерами его инициализации (init:*)"""
+        if not self.enabled:
+            return
+        self.uninstall()
+        total = time.perf_counter() - self.started
+        imports = sum(module_total for _, module_total, _, depth in self.modules if depth == 0)
+        print(f"Startup: {total:.3f} s until the window is idle, "
+              f"{imports:.3f} s importing {len(self.modules)} modules")
+
+        print(f"\n{'stage':<28}{'start, ms':>10}{'time, ms':>10}")
+        stages = list(self.stages)
+        if trace is not None:
+            stages += [(name, start - self.started, duration) for name, start, duration, *_ in
+                       sorted(trace.spans, key=lambda span: span[1]) if name.startswith("init:")]
+        for name, start, duration in sorted(stages, key=lambda stage: stage[1]):
+            print(f"{name:<28}{start * 1000:>10.0f}{duration * 1000:>10.1f}")
+
+        print(f"\n{'package':<28}{'modules':>10}{'self, ms':>10}")
+        for package, (count, own) in self.packages()[:self.TOP]:
+            print(f"{package:<28}{count:>10}{own * 1000:>10.1f}")
+
+        print(f"\n{'module':<40}{'self, ms':>10}{'total, ms':>10}")
+        for name, module_total, own, _ in sorted(self.modules, key=lambda module: module[2], reverse=True)[:self.TOP]:
+            print(f"{name:<40}{own * 1000:>10.1f}{module_total * 1000:>10.1f}")
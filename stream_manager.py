@@ -0,0 +1,59 @@
+import time
+
+
+class StreamManager:
+    """Перерисовка данных потокового источника (--stream) с ограниченной частотой"""
+    MIN_REFRESH_MS = 100
+    REPORT_SECONDS = 10
+
+    def __init__(self, app):
+        self.app = app
+        self.refresh_ms = 1000
+        self.after_id = None
+        self.last_report = None
+
+    def start(self, refresh_ms=1000):
+        if self.app.data_loader.source is None:
+            return False
+        self.refresh_ms = max(int(refresh_ms), self.MIN_REFRESH_MS)
+        self.last_report = time.perf_counter()
+        self.schedule()
+        return True
+
+    def stop(self):
+        if self.after_id is not None:
+            self.app.root.after_cancel(self.after_id)
+            self.after_id = None
+
+    def schedule(self):
+        self.after_id = self.app.root.after(self.refresh_ms, self.poll)
+
+    def poll(self):
+        if self.app.blit_manager.drag is not None:
+            self.schedule()
+            return
+        try:
+            self.update()
+        except Exception as e:
+            print(f"Stream update error: {e}")
+        if time.perf_counter() - self.last_report >= self.REPORT_SECONDS:
+            self.report()
+        self.schedule()
+
+    def update(self):
+        loader = self.app.data_loader
+        xlim = self.app.ax_main.get_xlim()
+        # Буфер сдвигается целиком, поэтому данные графика передаются заново; масштаб пользователя
+        # сохраняется, если конец данных не был виден
+        keep_view = len(loader.x_values) and xlim[1] < loader.x_values[-1]
+        if not loader.refresh_stream():
+            return
+        if not keep_view:
+            self.app.plot_manager.reset_x_view()
+        self.app.plot_manager.plot_data()
+
+    def report(self):
+        self.last_report = time.perf_counter()
+        stats = self.app.data_loader.source.stats()
+        print(f"Stream: {stats['received']} samples ({stats['samples_per_s']:.0f} samples/s), "
+              f"{stats['overwritten']} overwritten, {stats['malformed']} malformed")
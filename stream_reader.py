@@ -0,0 +1,548 @@
+import csv
+import io
+import os
+import time
+from itertools import islice
+import numpy as np
+import pandas as pd
+
+
+SAMPLE_ROWS = 50        # Сколько строк просматривается для определения типа столбца
+
+XLSX_EXTENSIONS = ('.xlsx', '.xlsm')
+DELIMITED_EXTENSIONS = ('.csv', '.tsv', '.txt')
+PANDAS_EXTENSIONS = ('.xls', '.xlsb', '.odf', '.ods', '.odt')
+
+# Тип столбца -> (список DataLoader, dtype буфера)
+COLUMN_KINDS = {
+    "flag": ("flag_columns", bool),         # Флаги состояния (булевы значения)
+    "bool": ("bool_columns", bool),         # Флаги процессов (столбцы "F-")
+    "percent": ("percent_columns", float),  # Процентные данные ("%" в имени)
+    "numeric": ("numeric_columns", float),
+}
+
+
+def classify_column(name, sample):
+    """
+    Определяет тип столбца по имени и образцу значений так же, как DataLoader.process_data.
+    Возвращает ключ COLUMN_KINDS или None для столбцов, которые не отображаются
+    """
+    values = [v for v in sample if v is not None]
+    if values and all(isinstance(v, (bool, np.bool_)) for v in values):
+        return "flag"
+    if not all(isinstance(v, (int, float, np.number)) and not isinstance(v, (bool, np.bool_))
+               for v in values):
+        return None
+    name = str(name)
+    if name.startswith("F-"):
+        return "bool"
+    if '%' in name:
+        return "percent"
+    return "numeric"
+
+
+class FilePrefix(io.RawIOBase):
+    """Первые size байт открытого файла - строки, дописанные во время чтения, не видны"""
+
+    def __init__(self, f, size):
+        self.f = f
+        self.left = size
+
+    def readable(self):
+        return True
+
+    def readinto(self, b):
+        if self.left <= 0:
+            return 0
+        n = self.f.readinto(memoryview(b)[:self.left])
+        self.left -= n
+        return n
+
+
+class ColumnBuffer:
+    """Растущий типизированный буфер одного столбца"""
+
+    def __init__(self, dtype, capacity=1024):
+        self.data = np.empty(max(int(capacity), 1), dtype=dtype)
+        self.size = 0
+
+    def append(self, values):
+        end = self.size + len(values)
+        if end > len(self.data):
+            # Новый массив вместо resize: выданные ранее view() остаются корректными
+            grown = np.empty(max(end, 2 * len(self.data)), dtype=self.data.dtype)
+            grown[:self.size] = self.data[:self.size]
+            self.data = grown
+        self.data[self.size:end] = values
+        self.size = end
+
+    def truncate(self, size):
+        """Отбрасывает значения после size (буфер дописывается заново с этого места)"""
+        self.size = min(size, self.size)
+
+    def finish(self):
+        """
+        Отдаёт неиспользованный запас памяти. Копия, а не resize на месте: выданные раньше view()
+        остаются корректными, а запас освобождается, когда их больше никто не держит
+        """
+        if len(self.data) > self.size:
+            self.data = self.data[:self.size].copy()
+
+    def view(self):
+        return self.data[:self.size]
+
+
+def convert_values(values, kind):
+    """Переводит значения ячеек в массив dtype, соответствующий типу столбца"""
+    if kind == "time":
+        return pd.to_datetime(pd.Series(values, dtype=object), errors="coerce").to_numpy(dtype="datetime64[ns]")
+    if kind == "flag":
+        return np.array([bool(v) if v is not None else False for v in values], dtype=bool)
+    try:
+        result = np.array(values, dtype=float)
+    except (TypeError, ValueError):
+        result = pd.to_numeric(pd.Series(values, dtype=object), errors="coerce").to_numpy(dtype=float)
+    if kind == "bool":
+        return result.astype(bool)
+    return result
+
+
+class TimeFilter:
+    """
+    Отбор строк по диапазону времени [start, end].
+    Логи упорядочены по времени, поэтому строка после end означает, что дальше читать не нужно
+    """
+
+    def __init__(self, time_range):
+        start, end = time_range
+        self.start = np.datetime64(pd.Timestamp(start), "ns") if start is not None else None
+        self.end = np.datetime64(pd.Timestamp(end), "ns") if end is not None else None
+        self.scanned = 0
+        self.kept = 0
+        self.skipped = 0        # Строки до начала диапазона, найденные по одному столбцу времени
+        self.scan_seconds = 0.0     # Время этого просмотра столбца времени
+        self.stopped = False
+
+    def apply(self, times):
+        """Возвращает (маска строк в диапазоне, можно ли прекратить чтение)"""
+        keep = np.ones(len(times), dtype=bool)
+        done = False
+        if self.start is not None:
+            keep &= times >= self.start
+        if self.end is not None:
+            keep &= times <= self.end
+            done = len(times) > 0 and times[-1] > self.end
+        self.scanned += len(times)
+        self.kept += int(keep.sum())
+        self.stopped = self.stopped or done
+        return keep, done
+
+    def report(self, row_bytes, elapsed, total_rows=None):
+        """
+        Печатает, сколько строк, памяти и времени сэкономил фильтр (непрочитанное - оценка).
+        Время: пропущенные и непрочитанные строки по цене строки полного разбора (без просмотра
+        столбца времени) минус сам просмотр - может выйти и отрицательным
+        """
+        unread = max(total_rows - self.skipped - self.scanned, 0) if total_rows and self.stopped else 0
+        saved_bytes = (self.scanned - self.kept + self.skipped + unread) * row_bytes
+        row_seconds = (elapsed - self.scan_seconds) / self.scanned if self.scanned else 0.0
+        saved_seconds = (self.skipped + unread) * row_seconds - self.scan_seconds
+        skipped = f", {self.skipped} skipped by the time column" if self.skipped else ""
+        print(f"Time filter: kept {self.kept} of {self.scanned} scanned rows{skipped}, "
+              f"~{unread} rows not read; saved ~{saved_bytes / 1024 / 1024:.1f} MB, ~{saved_seconds:.2f} s")
+
+
+def get_stream_reader(file_path, time_range=None):
+    """Подбирает потоковый читатель по расширению (и содержимому) файла; None - читать через pandas"""
+    ext = os.path.splitext(file_path)[1].lower()
+    if ext in XLSX_EXTENSIONS:
+        return XlsxStreamReader(file_path, time_range)
+    if ext in DELIMITED_EXTENSIONS:
+        return CsvStreamReader(file_path, time_range)
+    if ext not in PANDAS_EXTENSIONS and CsvStreamReader.looks_like_text(file_path):
+        return CsvStreamReader(file_path, time_range)
+    return None
+
+
+class StreamReader:
+    """Общая часть потоковых читателей: схема столбцов, буферы и сборка результата"""
+
+    def __init__(self, file_path, time_range=None):
+        self.file_path = file_path
+        self.time_range = time_range    # (начало, конец), любая граница может быть None
+        self.time_filter = None
+        self.kinds = None       # [(тип, номер столбца в файле)], первым идёт время
+        self.names = None
+        self.capacity = 1024
+        self.stats = {}
+        self.progress = None    # LoadProgress фоновой загрузки: прочитанные строки и отмена
+        self.follow = False     # Файл дописывается: недописанная последняя строка не читается
+        self.end = None         # Где кончились прочитанные данные - с этого места read_appended
+
+    def report(self, rows):
+        """Отметка хода чтения; при отмене загрузки отсюда вылетает LoadCancelled"""
+        if self.progress is not None:
+            self.progress.update(rows, self.capacity)
+
+    def sniff(self):
+        """Определяет self.kinds, self.names и оценку числа строк self.capacity"""
+        raise NotImplementedError
+
+    def tail_position(self):
+        """Текущий конец данных файла - с него read_appended начнёт читать дописанные строки"""
+        raise NotImplementedError
+
+    def read_appended(self, position):
+        """Возвращает (df дописанных после position строк или None, новая позиция)"""
+        raise NotImplementedError
+
+    def schema(self):
+        """Списки numeric/percent/flag/bool столбцов файла"""
+        if self.kinds is None:
+            self.sniff()
+        columns = {attr: [] for attr, _ in COLUMN_KINDS.values()}
+        for (kind, _), name in zip(self.kinds[1:], self.names[1:]):
+            columns[COLUMN_KINDS[kind][0]].append(name)
+        return columns
+
+    def selected(self, select):
+        """Пары (тип, номер) и имена для времени и выбранных столбцов (select=None - все)"""
+        if self.kinds is None:
+            self.sniff()
+        pairs = [(self.kinds[0], self.names[0])]
+        pairs += [(kind, name) for kind, name in zip(self.kinds[1:], self.names[1:])
+                  if select is None or name in select]
+        return [kind for kind, _ in pairs], [name for _, name in pairs]
+
+    def make_time_filter(self):
+        self.time_filter = TimeFilter(self.time_range) if self.time_range else None
+        return self.time_filter
+
+    @staticmethod
+    def make_buffers(kinds, capacity):
+        return [ColumnBuffer("datetime64[ns]" if kind == "time" else COLUMN_KINDS[kind][1], capacity)
+                for kind, _ in kinds]
+
+    @staticmethod
+    def make_frame(names, buffers):
+        return pd.DataFrame({name: buffer.view() for name, buffer in zip(names, buffers)}, copy=False)
+
+    def build_result(self, names, buffers, start):
+        """Собирает (df, columns) из заполненных буферов и сообщает скорость разбора"""
+        for buffer in buffers:
+            buffer.finish()
+
+        df = self.make_frame(names, buffers)
+        if df.empty:
+            raise ValueError("No data in the selected time range" if self.time_filter else "No data for processing")
+
+        elapsed = time.perf_counter() - start
+        self.stats = {
+            "rows": len(df),
+            "columns": len(names),
+            "seconds": elapsed,
+            "rows_per_s": len(df) / elapsed if elapsed > 0 else float("inf"),
+        }
+        print(f"{os.path.basename(self.file_path)}: {self.stats['rows']} rows x {len(names)} columns in "
+              f"{elapsed:.2f} s ({self.stats['rows_per_s']:.0f} rows/s)")
+        if self.time_filter:
+            row_bytes = sum(buffer.data.itemsize for buffer in buffers)
+            self.time_filter.report(row_bytes, elapsed, self.capacity)
+        return df, self.schema()
+
+
+class XlsxStreamReader(StreamReader):
+    """Потоковое чтение .xlsx (openpyxl read-only) прямо в типизированные буферы NumPy"""
+    CHUNK_ROWS = 4096
+
+    def _open(self):
+        from openpyxl import load_workbook
+        return load_workbook(self.file_path, read_only=True, data_only=True)
+
+    def sniff(self):
+        workbook = self._open()
+        try:
+            sheet = workbook.active
+            rows = sheet.iter_rows(values_only=True)
+            header = next(rows, None)
+            if not header:
+                raise ValueError("No data for processing")
+            sample = [row for row in islice(rows, SAMPLE_ROWS) if any(v is not None for v in row)]
+            self.capacity = (sheet.max_row or SAMPLE_ROWS + 1) - 1
+        finally:
+            workbook.close()
+
+        self.kinds = [("time", 0)]
+        for i in range(1, len(header)):
+            kind = classify_column(header[i], [row[i] if i < len(row) else None for row in sample])
+            if kind:
+                self.kinds.append((kind, i))
+        self.names = [self._column_name(header, i) for _, i in self.kinds]
+
+    def read(self, select=None):
+        """Возвращает (df, columns) - как CacheManager.load; select - читать только эти столбцы"""
+        start = time.perf_counter()
+        kinds, names = self.selected(select)
+        buffers = self.make_buffers(kinds, self.capacity)
+        self.end = self._read_rows(kinds, buffers, 0, self.make_time_filter())
+        return self.build_result(names, buffers, start)
+
+    def tail_position(self):
+        """Число строк данных на листе"""
+        workbook = self._open()
+        try:
+            return sum(1 for _ in workbook.active.iter_rows(min_row=2, values_only=True))
+        finally:
+            workbook.close()
+
+    def read_appended(self, position):
+        """
+        Читает строки после первых position строк данных. Формат не позволяет
+        перейти к концу листа, поэтому openpyxl всё равно просматривает весь лист
+        """
+        kinds, names = self.selected(None)
+        buffers = self.make_buffers(kinds, self.CHUNK_ROWS)
+        position += self._read_rows(kinds, buffers, position)
+        df = self.make_frame(names, buffers)
+        return (df if not df.empty else None), position
+
+    def _read_rows(self, kinds, buffers, skip_rows, time_filter=None):
+        """Дописывает в буферы строки листа после первых skip_rows; возвращает число просмотренных строк"""
+        scanned = 0
+        workbook = self._open()
+        try:
+            rows = workbook.active.iter_rows(min_row=2 + skip_rows, values_only=True)
+            while True:
+                chunk = list(islice(rows, self.CHUNK_ROWS))
+                if not chunk:
+                    break
+                scanned += len(chunk)
+                self.report(skip_rows + scanned)
+                chunk = [row for row in chunk if any(v is not None for v in row)]
+                if not chunk:
+                    continue
+                times, done = None, False
+                if time_filter:
+                    # Остальные столбцы строк вне диапазона не конвертируются
+                    times = convert_values([row[0] for row in chunk], "time")
+                    keep, done = time_filter.apply(times)
+                    chunk = [row for row, flag in zip(chunk, keep) if flag]
+                    times = times[keep]
+                self._append_rows(chunk, kinds, buffers, times)
+                if done:
+                    break
+        finally:
+            workbook.close()
+        return scanned
+
+    @staticmethod
+    def _column_name(header, i):
+        # Безымянный первый столбец (дата и время у KNN) получает имя как в pandas
+        return header[i] if header[i] is not None else f"Unnamed: {i}"
+
+    @staticmethod
+    def _append_rows(chunk, kinds, buffers, times=None):
+        for (kind, i), buffer in zip(kinds, buffers):
+            if kind == "time" and times is not None:
+                buffer.append(times)
+                continue
+            values = [row[i] if i < len(row) else None for row in chunk]
+            buffer.append(convert_values(values, kind))
+
+
+class CsvStreamReader(StreamReader):
+    """Чтение CSV/TSV кусками с явными типами столбцов - файл может быть больше оперативной памяти"""
+    CHUNK_ROWS = 200_000
+    CHUNK_CELLS = 2_000_000     # Широкие файлы читаются куском поменьше - ход загрузки обновляется чаще
+    SCAN_BYTES = 8 * 1024 * 1024    # Кусок поиска начала строки (row_offset)
+    SNIFF_BYTES = 64 * 1024
+    ENCODINGS = ("utf-8-sig", "cp1251")
+
+    @classmethod
+    def looks_like_text(cls, file_path):
+        with open(file_path, "rb") as f:
+            head = f.read(4096)
+        if not head or b"\0" in head:
+            return False
+        return cls._decode(head) is not None
+
+    @classmethod
+    def _decode(cls, data):
+        for encoding in cls.ENCODINGS:
+            try:
+                return encoding, data.decode(encoding)
+            except UnicodeDecodeError:
+                continue
+        return None
+
+    def sniff(self):
+        """Определяет кодировку, разделитель и типы столбцов по началу файла"""
+        with open(self.file_path, "rb") as f:
+            head = f.read(self.SNIFF_BYTES)
+        decoded = self._decode(head)
+        if decoded is None:
+            raise ValueError(f"Unsupported text encoding: {self.file_path}")
+        self.encoding, text = decoded
+
+        if self.file_path.lower().endswith(".tsv"):
+            self.delimiter = "\t"
+        else:
+            try:
+                self.delimiter = csv.Sniffer().sniff(text.split("\n", 1)[0], delimiters=",;\t").delimiter
+            except csv.Error:
+                self.delimiter = ","
+        # Для ";" принята десятичная запятая (региональный формат Excel)
+        self.decimal = "," if self.delimiter == ";" else "."
+
+        sample = pd.read_csv(self.file_path, sep=self.delimiter, decimal=self.decimal,
+                             encoding=self.encoding, nrows=SAMPLE_ROWS)
+        self.kinds = [("time", 0)]
+        for i, col in enumerate(sample.columns[1:], start=1):
+            kind = classify_column(col, sample[col].tolist())
+            if kind:
+                self.kinds.append((kind, i))
+        self.names = [sample.columns[i] for _, i in self.kinds]
+        self.columns = list(sample.columns)     # Заголовок целиком - для чтения с середины файла
+
+        # Оценка числа строк для предварительного выделения буферов
+        lines = max(text.count("\n"), 1)
+        self.capacity = int(os.path.getsize(self.file_path) / (len(head) / lines)) + 1
+
+    def read(self, select=None):
+        """Возвращает (df, columns) - как CacheManager.load; select - читать только эти столбцы"""
+        start = time.perf_counter()
+        kinds, names = self.selected(select)
+        buffers = self.make_buffers(kinds, self.capacity)
+
+        # Флаги читаются как nullable boolean, флаги процессов - как числа (как в process_data)
+        dtypes = {name: "boolean" if kind == "flag" else "float64"
+                  for (kind, _), name in zip(kinds[1:], names[1:])}
+        # Файл читается до конца, каким он был при первом чтении: при слежении - до последней
+        # полной строки, дальше продолжает read_appended; столбцы ленивой загрузки - той же длины
+        if self.end is None:
+            self.end = self.tail_position() if self.follow else os.path.getsize(self.file_path)
+        time_filter = self.make_time_filter()
+        first, last, position, header = 0, None, 0, {}
+        if time_filter and time_filter.start is not None:
+            # Сначала только столбец времени: строки до начала диапазона и после его конца
+            # остальные столбцы потом не разбирают вовсе - чтение начинается с байта первой
+            # строки диапазона, как продолжение при слежении, и останавливается через nrows
+            scan_start = time.perf_counter()
+            first, last, position, stopped = self.time_rows()
+            time_filter.scan_seconds = time.perf_counter() - scan_start
+            if first is None:
+                return self.build_result(names, buffers, start)
+            time_filter.skipped = first
+            time_filter.stopped = stopped
+            header = {"header": None, "names": self.columns}
+        rows = first
+        with open(self.file_path, "rb") as f:
+            f.seek(position)
+            with pd.read_csv(io.BufferedReader(FilePrefix(f, self.end - position)), sep=self.delimiter,
+                             decimal=self.decimal, encoding=self.encoding, usecols=[i for _, i in kinds],
+                             dtype=dtypes, nrows=None if last is None else last - first,
+                             chunksize=self.chunk_rows(len(kinds)), **header) as reader:
+                for chunk in reader:
+                    rows += len(chunk)
+                    self.report(rows)
+                    times, done = None, False
+                    if time_filter:
+                        # Строки внутри прочитанного отрезка, но вне диапазона (журнал не по порядку)
+                        times = self._to_times(chunk[names[0]])
+                        keep, done = time_filter.apply(times)
+                        chunk = chunk[keep]
+                        times = times[keep]
+                    self._append_chunk(chunk, kinds, names, buffers, times)
+                    if done:
+                        break
+
+        return self.build_result(names, buffers, start)
+
+    def time_rows(self):
+        """
+        Просматривает только столбец времени: (первая строка в диапазоне или None, строка после последней
+        в диапазоне, смещение первой строки в байтах, остановлен ли просмотр на конце диапазона).
+        Номера - среди строк данных без заголовка, по одной строке данных на строку файла (как и при слежении)
+        """
+        time_filter = TimeFilter(self.time_range)
+        first = last = None
+        rows = 0
+        with open(self.file_path, "rb") as f, \
+                pd.read_csv(io.BufferedReader(FilePrefix(f, self.end)), sep=self.delimiter, encoding=self.encoding,
+                            usecols=[0], skip_blank_lines=False, chunksize=self.CHUNK_ROWS) as reader:
+            for chunk in reader:
+                if self.progress is not None:
+                    self.progress.check()
+                keep, done = time_filter.apply(self._to_times(chunk.iloc[:, 0]))
+                hits = np.flatnonzero(keep)
+                if len(hits):
+                    first = rows + int(hits[0]) if first is None else first
+                    last = rows + int(hits[-1]) + 1
+                rows += len(chunk)
+                if done:
+                    break
+        position = None if first is None else self.row_offset(first)
+        return first, last, position, time_filter.stopped
+
+    def row_offset(self, row):
+        """Смещение в байтах начала строки данных row (0 - первая после заголовка)"""
+        with open(self.file_path, "rb") as f:
+            offset = len(f.readline())
+            while row:
+                block = f.read(self.SCAN_BYTES)
+                if not block:
+                    break
+                lines = block.count(b"\n")
+                if lines >= row:
+                    ends = np.flatnonzero(np.frombuffer(block, dtype=np.uint8) == ord("\n"))
+                    return offset + int(ends[row - 1]) + 1
+                row -= lines
+                offset += len(block)
+        return offset
+
+    def chunk_rows(self, columns):
+        return max(1000, min(self.CHUNK_ROWS, self.CHUNK_CELLS // columns))
+
+    def tail_position(self):
+        """Смещение в байтах сразу за последней полной строкой файла"""
+        size = os.path.getsize(self.file_path)
+        with open(self.file_path, "rb") as f:
+            f.seek(max(size - self.SNIFF_BYTES, 0))
+            tail = f.read()
+        return size - len(tail) + tail.rfind(b"\n") + 1
+
+    def read_appended(self, position):
+        """Разбирает только полные строки, дописанные после смещения position"""
+        kinds, names = self.selected(None)
+        with open(self.file_path, "rb") as f:
+            f.seek(position)
+            data = f.read()
+        end = data.rfind(b"\n") + 1     # Недописанная последняя строка подождёт следующего раза
+        if not data[:end].strip():
+            return None, position + end
+
+        dtypes = {i: "boolean" if kind == "flag" else "float64" for kind, i in kinds[1:]}
+        chunk = pd.read_csv(io.StringIO(data[:end].decode(self.encoding)), sep=self.delimiter,
+                            decimal=self.decimal, header=None, usecols=[i for _, i in kinds], dtype=dtypes)
+        chunk = chunk.rename(columns={i: name for (_, i), name in zip(kinds, names)})
+        buffers = self.make_buffers(kinds, len(chunk))
+        self._append_chunk(chunk, kinds, names, buffers)
+        return self.make_frame(names, buffers), position + end
+
+    @staticmethod
+    def _to_times(column):
+        return pd.to_datetime(column, errors="coerce").to_numpy(dtype="datetime64[ns]")
+
+    @classmethod
+    def _append_chunk(cls, chunk, kinds, names, buffers, times=None):
+        for (kind, _), name, buffer in zip(kinds, names, buffers):
+            column = chunk[name]
+            if kind == "time":
+                values = times if times is not None else cls._to_times(column)
+            elif kind == "flag":
+                values = column.to_numpy(dtype=bool, na_value=False)
+            elif kind == "bool":
+                values = column.to_numpy(dtype=float).astype(bool)
+            else:
+                values = column.to_numpy(dtype=float)
+            buffer.append(values)
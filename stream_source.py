@@ -0,0 +1,279 @@
+import os
+import socket
+import sys
+import threading
+import time
+import numpy as np
+import pandas as pd
+from stream_reader import COLUMN_KINDS, classify_column
+
+
+class LineProtocol:
+    """
+    Одна строка - одна запись: метка времени и именованные значения через запятую
+        2025-01-23 10:00:00.500,Voltage=12040.5,Current=-1500,FC=false,Health %=87.1
+    Метка времени - ISO 8601 (местное время, как в файлах) или секунды Unix, флаги - true/false.
+    Имена не должны содержать ',' и '='
+    """
+    TRUE_VALUES = ("true", "1")
+    FLAG_VALUES = ("true", "false")
+
+    @staticmethod
+    def split(line):
+        """(текст метки времени, {имя: текст значения}) или None для пустой/битой строки"""
+        parts = line.strip().split(",")
+        if len(parts) < 2 or not parts[0]:
+            return None
+        fields = {}
+        for part in parts[1:]:
+            name, sep, value = part.partition("=")
+            if not sep:
+                return None
+            fields[name.strip()] = value.strip()
+        return parts[0], fields
+
+    @staticmethod
+    def format(timestamp, fields):
+        return ",".join([str(timestamp)] + [f"{name}={value}" for name, value in fields]) + "\n"
+
+    @classmethod
+    def classify(cls, name, text):
+        """Тип столбца по имени и первому значению - по тем же правилам, что и для файлов"""
+        if text.lower() in cls.FLAG_VALUES:
+            return "flag"
+        try:
+            value = float(text)
+        except ValueError:
+            return None
+        return classify_column(name, [value])
+
+    @staticmethod
+    def to_times(texts):
+        """Метки времени пачки строк: секунды Unix или ISO 8601 (нераспознанные - NaT)"""
+        try:
+            seconds = np.array(texts, dtype=float)
+        except ValueError:
+            return pd.to_datetime(pd.Series(texts), errors="coerce").to_numpy(dtype="datetime64[ns]")
+        # Секунды Unix - момент в UTC; на графике, как и в файлах, местное время без часового пояса.
+        # Смещение пояса одно на пачку, если она не захватывает переход на летнее время
+        finite = seconds[np.isfinite(seconds)]
+        offsets = {time.localtime(t).tm_gmtoff for t in finite[[0, -1]]} if len(finite) else {0}
+        if len(offsets) == 1:
+            offset = offsets.pop()
+        else:
+            offset = np.array([time.localtime(t).tm_gmtoff if np.isfinite(t) else 0 for t in seconds])
+        return ((seconds + offset) * 1e9).astype("datetime64[ns]")
+
+    @classmethod
+    def to_values(cls, texts, kind):
+        if kind == "flag":
+            return np.array([text is not None and text.lower() in cls.TRUE_VALUES for text in texts], dtype=bool)
+        values = pd.to_numeric(pd.Series(texts, dtype=object), errors="coerce").to_numpy(dtype=float)
+        if kind == "bool":
+            return np.nan_to_num(values) != 0
+        return values
+
+
+class RingBuffer:
+    """Кольцевой буфер фиксированного размера: новые записи вытесняют самые старые"""
+
+    def __init__(self, names, kinds, capacity):
+        self.names = names      # Первым идёт столбец времени
+        self.kinds = kinds
+        self.capacity = int(capacity)
+        self.arrays = [np.zeros(self.capacity, dtype="datetime64[ns]" if kind == "time" else COLUMN_KINDS[kind][1])
+                       for kind in kinds]
+        self.head = 0           # Куда будет записана следующая запись
+        self.size = 0
+        self.total = 0          # Сколько записей принято за всё время
+        self.overwritten = 0    # Сколько записей вытеснено новыми
+        self.lock = threading.Lock()
+
+    def append(self, columns):
+        """Дописывает пачку записей: columns - массивы в порядке self.names"""
+        n = len(columns[0])
+        skipped = max(n - self.capacity, 0)
+        if skipped:
+            columns = [values[skipped:] for values in columns]
+        count = n - skipped
+        with self.lock:
+            first = min(count, self.capacity - self.head)
+            for array, values in zip(self.arrays, columns):
+                array[self.head:self.head + first] = values[:first]
+                array[:count - first] = values[first:]
+            self.overwritten += skipped + max(self.size + count - self.capacity, 0)
+            self.size = min(self.size + count, self.capacity)
+            self.head = (self.head + count) % self.capacity
+            self.total += n
+
+    def snapshot(self):
+        """(df записей в порядке поступления, total) - копия, буфер можно продолжать заполнять"""
+        with self.lock:
+            if self.size < self.capacity:
+                arrays = [array[:self.size].copy() for array in self.arrays]
+            else:
+                arrays = [np.concatenate([array[self.head:], array[:self.head]]) for array in self.arrays]
+            total = self.total
+        return pd.DataFrame(dict(zip(self.names, arrays)), copy=False), total
+
+    def schema(self):
+        columns = {attr: [] for attr, _ in COLUMN_KINDS.values()}
+        for kind, name in zip(self.kinds[1:], self.names[1:]):
+            columns[COLUMN_KINDS[kind][0]].append(name)
+        return columns
+
+    def memory_usage(self):
+        return sum(array.nbytes for array in self.arrays)
+
+
+class StreamSource:
+    """
+    Приём записей построчного протокола из stdin или локального сокета в кольцевой буфер.
+    Адрес: '-' (stdin), 'tcp://HOST:PORT' или 'unix:///path/to/socket' - источник слушает,
+    а отправитель подключается (подключения обслуживаются по очереди).
+    Состав столбцов определяется первой записью, незнакомые имена в дальнейшем пропускаются
+    """
+    DEFAULT_CAPACITY = 100_000
+    BATCH_LINES = 1000      # Разбор пачками: строки копятся до пачки или до flush() из GUI
+    WAIT_STEP = 0.1         # Как часто ожидание первой записи проверяет отмену загрузки, секунды
+
+    def __init__(self, address, capacity=None):
+        self.address = address
+        self.capacity = int(capacity or self.DEFAULT_CAPACITY)
+        self.ring = None
+        self.ready = threading.Event()
+        self.pending = []
+        self.lock = threading.Lock()
+        self.flush_lock = threading.Lock()  # flush() зовут и поток приёма, и GUI - порядок пачек сохраняется
+        self.server = None
+        self.thread = None
+        self.closed = False
+        self.malformed = 0
+        self.started = None
+
+    def open(self):
+        """Открывает слушающий сокет (для stdin ничего не нужно); возвращает фактический адрес"""
+        if self.address == "-":
+            return self.address
+        if self.address.startswith("tcp://"):
+            host, _, port = self.address[len("tcp://"):].rpartition(":")
+            self.server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            self.server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            self.server.bind((host or "127.0.0.1", int(port)))
+            host, port = self.server.getsockname()
+            self.address = f"tcp://{host}:{port}"
+        elif self.address.startswith("unix://"):
+            if not hasattr(socket, "AF_UNIX"):
+                raise ValueError("Unix sockets are not supported on this platform")
+            path = self.address[len("unix://"):]
+            if os.path.exists(path):
+                os.remove(path)
+            self.server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self.server.bind(path)
+        else:
+            raise ValueError(f"Unknown stream address: {self.address}. Use '-', 'tcp://HOST:PORT' or 'unix://PATH'")
+        self.server.listen(1)
+        return self.address
+
+    def start(self):
+        if self.server is None and self.address != "-":
+            self.open()
+        self.started = time.perf_counter()
+        self.thread = threading.Thread(target=self.run, name="stream-source", daemon=True)
+        self.thread.start()
+
+    def wait_ring(self, timeout=None, progress=None):
+        """
+        Ждёт первую запись, по которой строится схема и кольцевой буфер; progress - LoadProgress
+        фоновой загрузки, ожидание прерывается её отменой
+        """
+        print(f"Waiting for data on {self.address}")
+        start = time.perf_counter()
+        while not self.ready.wait(self.WAIT_STEP):
+            if progress is not None:
+                progress.check()
+            if timeout is not None and time.perf_counter() - start >= timeout:
+                raise TimeoutError(f"No data received on {self.address}")
+        return self.ring
+
+    def close(self):
+        self.closed = True
+        if self.server is not None:
+            self.server.close()
+            if self.address.startswith("unix://") and os.path.exists(self.address[len("unix://"):]):
+                os.remove(self.address[len("unix://"):])
+
+    def run(self):
+        try:
+            if self.server is None:
+                self.consume(sys.stdin)
+                return
+            while not self.closed:
+                connection, _ = self.server.accept()
+                with connection, connection.makefile("r", encoding="utf-8", errors="replace") as stream:
+                    self.consume(stream)
+        except OSError:
+            if not self.closed:
+                raise
+        finally:
+            self.flush()
+
+    def consume(self, stream):
+        for line in stream:
+            with self.lock:
+                self.pending.append(line)
+                full = len(self.pending) >= self.BATCH_LINES
+            if full:
+                self.flush()
+        self.flush()
+
+    def flush(self):
+        """Разбирает накопившиеся строки и переносит их в кольцевой буфер"""
+        with self.flush_lock:
+            with self.lock:
+                lines, self.pending = self.pending, []
+            records = []
+            for line in lines:
+                record = LineProtocol.split(line)
+                if record is not None:
+                    records.append(record)
+                elif line.strip():
+                    self.malformed += 1
+            if records:
+                self.append_records(records)
+
+    def append_records(self, records):
+        if self.ring is None:
+            self.create_ring(records[0][1])
+
+        times = LineProtocol.to_times([text for text, _ in records])
+        columns = [times]
+        for kind, name in zip(self.ring.kinds[1:], self.ring.names[1:]):
+            columns.append(LineProtocol.to_values([fields.get(name) for _, fields in records], kind))
+        valid = ~np.isnat(times)
+        if not valid.all():
+            self.malformed += int((~valid).sum())
+            columns = [values[valid] for values in columns]
+        self.ring.append(columns)
+
+    def create_ring(self, fields):
+        names, kinds = ["Timestamp"], ["time"]
+        for name, text in fields.items():
+            kind = LineProtocol.classify(name, text)
+            if kind:
+                names.append(name)
+                kinds.append(kind)
+        self.ring = RingBuffer(names, kinds, self.capacity)
+        self.ready.set()
+
+    def stats(self):
+        """Счётчики приёма: принято, вытеснено из буфера, битых строк и средняя скорость"""
+        elapsed = time.perf_counter() - self.started if self.started else 0.0
+        total = self.ring.total if self.ring else 0
+        return {
+            "received": total,
+            "overwritten": self.ring.overwritten if self.ring else 0,
+            "malformed": self.malformed,
+            "seconds": elapsed,
+            "samples_per_s": total / elapsed if elapsed > 0 else 0.0,
+        }
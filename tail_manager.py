@@ -0,0 +1,97 @@
+import os
+import time
+from stream_reader import get_stream_reader, TimeFilter
+
+
+class TailManager:
+    """Слежение за дописываемым файлом данных: читает только новые строки и дорисовывает график"""
+    MIN_REFRESH_MS = 100
+
+    def __init__(self, app):
+        self.app = app
+        self.reader = None
+        self.position = None    # Где закончились уже прочитанные данные (байт или строка - решает читатель)
+        self.refresh_ms = 1000
+        self.autoscroll = False
+        self.after_id = None
+        self.last_stat = None
+        self.time_filter = None
+
+    def start(self, refresh_ms=1000, autoscroll=False):
+        loader = self.app.data_loader
+        if not loader.file_path:
+            print("Follow mode needs a data file")
+            return False
+        self.reader = get_stream_reader(loader.file_path)
+        if self.reader is None:
+            print(f"Follow mode is not supported for {os.path.basename(loader.file_path)}")
+            return False
+        self.refresh_ms = max(int(refresh_ms), self.MIN_REFRESH_MS)
+        self.autoscroll = autoscroll
+        self.time_filter = TimeFilter(loader.time_range) if loader.time_range else None
+        # С того места, где остановилось первое чтение: строки, дописанные во время загрузки,
+        # прочитаются при первой проверке
+        self.position = loader.tail_position
+        if self.position is None:
+            self.position = self.reader.tail_position()
+        self.last_stat = None
+        self.schedule()
+        return True
+
+    def stop(self):
+        if self.after_id is not None:
+            self.app.root.after_cancel(self.after_id)
+            self.after_id = None
+
+    def schedule(self):
+        self.after_id = self.app.root.after(self.refresh_ms, self.poll)
+
+    def _stat(self):
+        stat = os.stat(self.app.data_loader.file_path)
+        return stat.st_size, stat.st_mtime_ns
+
+    def poll(self):
+        """Проверка файла не чаще refresh_ms - частота перерисовки ограничена сверху"""
+        if self.app.blit_manager.drag is not None:
+            # Во время перетаскивания график не перерисовываем - новые строки подождут отпускания кнопки
+            self.schedule()
+            return
+        try:
+            stat = self._stat()
+            if stat != self.last_stat:
+                if self.last_stat is not None and stat[0] < self.last_stat[0]:
+                    # Файл перезаписан заново - дописанными такие строки не считаются
+                    print("Followed file was truncated; restart to reload it")
+                    return
+                self.last_stat = stat
+                self.update()
+        except Exception as e:
+            # Файл может быть прочитан в момент записи - повторим в следующий раз
+            print(f"Follow mode error: {e}")
+        self.schedule()
+
+    def update(self):
+        start_time = time.perf_counter()
+        new_df, self.position = self.reader.read_appended(self.position)
+        if new_df is not None and self.time_filter:
+            keep, _ = self.time_filter.apply(new_df.iloc[:, 0].to_numpy(dtype="datetime64[ns]"))
+            new_df = new_df[keep]
+        if new_df is None or new_df.empty:
+            return
+
+        loader = self.app.data_loader
+        ax = self.app.ax_main
+        xlim = ax.get_xlim()
+        # Автопрокрутка, только если конец данных был виден - иначе не мешаем разглядывать историю
+        follow_end = self.autoscroll and len(loader.x_values) and xlim[1] >= loader.x_values[-1]
+        old_end = loader.x_values[-1] if len(loader.x_values) else None
+
+        start = loader.append_rows(new_df)
+        rescaled = self.app.plot_manager.plot_appended_data(start, follow=bool(follow_end))
+        if follow_end:
+            shift = loader.x_values[-1] - old_end
+            ax.set_xlim(xlim[0] + shift, xlim[1] + shift)   # Линии пересчитает подписка на xlim_changed
+            self.app.render_scheduler.mark("limits")
+        else:
+            self.app.render_scheduler.mark(*(("data", "limits") if rescaled else ("data",)))
+        print(f"Follow: +{len(new_df)} rows in {time.perf_counter() - start_time:.3f} s")
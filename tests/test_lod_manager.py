@@ -0,0 +1,37 @@
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lod_manager import MinMaxPyramid
+
+
+def test_query_ignores_extremes_just_outside_window():
+    # Экстремум в соседнем отсчёте до окна попадает в тот же блок пирамиды, что и начало окна
+    values = np.random.default_rng(1).standard_normal(10_000_000)
+    i0 = 1001
+    i1 = i0 + 4_000_000
+    values[i0 - 2] = 20
+    values[i0 + 1] = 10
+    values[i1] = -20
+    values[i1 - 2] = -10
+    idx = MinMaxPyramid(values).query(i0, i1, 1000)
+    assert idx.min() >= i0 and idx.max() < i1
+    assert values[idx].max() == 10 and i0 + 1 in idx
+    assert values[idx].min() == -10 and i1 - 2 in idx
+
+
+def test_query_keeps_exact_extremes():
+    rng = np.random.default_rng(2)
+    values = rng.standard_normal(1_000_000)
+    values[rng.integers(0, len(values), 1000)] = np.nan
+    pyramid = MinMaxPyramid(values)
+    for _ in range(200):
+        i0 = int(rng.integers(0, len(values) - 2))
+        i1 = int(rng.integers(i0 + 1, len(values) + 1))
+        idx = pyramid.query(i0, i1, int(rng.integers(1, 2000)))
+        assert idx.min() >= i0 and idx.max() < i1
+        assert np.nanmax(values[idx]) == np.nanmax(values[i0:i1])
+        assert np.nanmin(values[idx]) == np.nanmin(values[i0:i1])
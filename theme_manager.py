@@ -24,6 +24,10 @@ class ThemeManager:
             ax.set_facecolor(bg_color)
 
     def apply_theme(self):
+        with self.app.trace_manager.span("theme"):
+            self._apply_theme()
+
+    def _apply_theme(self):
         # Определение цветов
         bg_color = self.app.light_bg_color if self.app.theme == "light" else self.app.dark_bg_color
         font_color = self.app.light_font_color if self.app.theme == "light" else self.app.dark_font_color
@@ -39,6 +43,9 @@ class ThemeManager:
             ax.xaxis.label.set_color(font_color)
             ax.yaxis.label.set_color(font_color)
             ax.title.set_color(font_color)
+        if self.app.flag_matrix is not None:
+            # Подписи строк матрицы - по высоте строки, а не общим размером шрифта
+            self.app.flag_matrix.ax.tick_params(axis="y", labelsize=self.app.flag_matrix.label_size)
 
         if self.app.ax_percent:
             self.app.ax_percent.set_facecolor(bg_color)
@@ -46,7 +53,7 @@ class ThemeManager:
             self.app.ax_percent.yaxis.label.set_color(font_color)
             self.app.ax_percent.tick_params(axis='y', colors=font_color, labelsize=self.app.font_size)
 
-        self.app.canvas.draw()
+        self.app.render_scheduler.mark("style")
 
     def toggle_theme(self):
         self.app.theme = "dark" if self.app.theme == "light" else "light"
@@ -0,0 +1,52 @@
+import numpy as np
+from matplotlib.collections import LineCollection
+
+
+class TimeGrid:
+    """
+    Вертикальные линии по меткам времени (кнопка T): одна коллекция линий на ось вместо axvline
+    на каждую метку. Линии пересчитываются под видимый диапазон: если меток больше, чем помещается
+    с шагом MIN_SPACING_PX, в каждом таком промежутке остаётся одна - первая метка
+    """
+    MIN_SPACING_PX = 4
+
+    def __init__(self, app):
+        self.app = app
+        self.collections = {}   # ось -> LineCollection
+
+    def plot(self, axes):
+        """Линии на осях axes (коллекции с других осей снимаются), сразу под текущие пределы"""
+        for ax in [ax for ax in self.collections if ax not in axes]:
+            self.collections.pop(ax).remove()
+        for ax in axes:
+            if ax not in self.collections:
+                # По X - данные, по Y - вся высота оси
+                lines = LineCollection([], transform=ax.get_xaxis_transform(),
+                                       colors="gray", linestyles="--", alpha=0.3)
+                self.collections[ax] = ax.add_collection(lines, autolim=False)
+        self.refresh()
+
+    def clear(self):
+        self.plot([])
+
+    def visible(self, xlim):
+        """Метки времени в пределах xlim, не чаще одной на MIN_SPACING_PX пикселей"""
+        xs, _ = self.app.data_loader.sorted_x()
+        x0, x1 = xlim
+        i0 = int(np.searchsorted(xs, x0, side="left"))
+        i1 = int(np.searchsorted(xs, x1, side="right"))
+        slots = max(int(self.app.ax_main.bbox.width / self.MIN_SPACING_PX), 1)
+        if i1 - i0 <= slots:
+            return xs[i0:i1]
+        # Первая метка каждого промежутка; пустой промежуток даёт метку следующего - её убирает unique
+        idx = np.unique(np.searchsorted(xs, np.linspace(x0, x1, slots + 1)[:-1], side="left"))
+        return xs[idx[idx < i1]]
+
+    def refresh(self, xlim=None):
+        if not self.collections:
+            return
+        x = self.visible(xlim if xlim is not None else self.app.ax_main.get_xlim())
+        segments = np.stack([np.column_stack([x, np.zeros_like(x)]),
+                             np.column_stack([x, np.ones_like(x)])], axis=1)
+        for lines in self.collections.values():
+            lines.set_segments(segments)
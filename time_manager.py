@@ -14,12 +14,16 @@ class TimeManager:
         for ax in self.app.flag_axes:
             ax.xaxis.set_major_locator(AutoDateLocator())
 
-        self.app.canvas.draw()
+        self.app.render_scheduler.mark("style")
 
     def toggle_time_format(self):
         self.app.show_time_only.set(not self.app.show_time_only.get())
         self.update_time_format()
+        self.app.time_format_button.config(text=self.format_button_text())
+
+    def format_button_text(self):
+        """Год или время первого отсчёта - подпись кнопки формата времени; пусто, пока данных нет"""
+        if self.app.data_loader is None:
+            return ""
         first_timestamp = self.app.data_loader.timestamps.iloc[0]
-        year = first_timestamp.year
-        time_str = first_timestamp.strftime('%H:%M')
-        self.app.time_format_button.config(text=str(year) if self.app.show_time_only.get() else time_str)
\ No newline at end of file
+        return str(first_timestamp.year) if self.app.show_time_only.get() else first_timestamp.strftime('%H:%M')
\ No newline at end of file
@@ -0,0 +1,183 @@
+import cProfile
+import json
+import os
+import pstats
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from tkinter import ttk
+
+
+class TraceManager:
+    """
+    Замеры стадий: загрузка, разбор, классификация, построение, тема, отрисовка и действия кнопок
+    записываются как вложенные интервалы времени. Последние замеры показываются в строке состояния
+    (F2), все - выгружаются в JSON или в формате Chrome trace (chrome://tracing, Perfetto).
+    F9 включает cProfile на следующие profile_actions перерисовок, то есть действий пользователя
+    """
+    MAX_SPANS = 100000      # Старые замеры вытесняются - в режиме слежения их число не ограничено
+    STATS_KEY = "f2"
+    PROFILE_KEY = "f9"
+
+    def __init__(self, app):
+        self.app = app
+        self.spans = deque(maxlen=self.MAX_SPANS)  # (имя, начало, длительность, вложенность, поток, параметры)
+        self.depth = {}             # поток -> текущая вложенность
+        self.origin = time.perf_counter()
+        self.last = {}              # имя -> последний замер с этим именем
+        self.last_action = None
+        self.stats_label = None
+        self.show_stats = False
+        self.profile = None
+        self.profile_left = 0
+        self.profile_actions = 5
+        self.export_path = None
+        self.export_format = "chrome"
+
+    @contextmanager
+    def span(self, name, **args):
+        thread = threading.get_ident()
+        depth = self.depth.get(thread, 0)
+        self.depth[thread] = depth + 1
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            record = (name, start, time.perf_counter() - start, depth, thread, args)
+            self.depth[thread] = depth
+            self.spans.append(record)
+            self.last[name] = record
+
+    def action(self, name, func):
+        """Обработчик кнопки, замеряемый как действие action:name"""
+        def run(*args, **kwargs):
+            with self.span(f"action:{name}"):
+                result = func(*args, **kwargs)
+            self.last_action = self.last[f"action:{name}"]
+            self.update_stats()
+            return result
+        return run
+
+    def connect(self):
+        """Замер всех полных отрисовок холста, в том числе вызванных кнопками навигации matplotlib"""
+        canvas = self.app.canvas
+        draw = canvas.draw
+
+        def traced_draw(*args, **kwargs):
+            with self.span("draw"):
+                result = draw(*args, **kwargs)
+            self.after_draw()
+            return result
+        canvas.draw = traced_draw
+        canvas.mpl_connect("key_press_event", self.on_key_press)
+
+    def on_key_press(self, event):
+        if event.key == self.STATS_KEY:
+            self.set_stats_visible(not self.show_stats)
+        elif event.key == self.PROFILE_KEY:
+            if self.profile is None:
+                self.start_profile()
+            else:
+                self.stop_profile()
+
+    def after_draw(self):
+        if self.profile is not None:
+            self.profile_left -= 1
+            if self.profile_left <= 0:
+                self.stop_profile()
+        self.update_stats()
+
+    # Строка состояния
+
+    def create_stats_label(self, parent):
+        self.stats_label = ttk.Label(parent, anchor="e")
+        self.set_stats_visible(self.show_stats)
+
+    def set_stats_visible(self, visible):
+        self.show_stats = visible
+        if self.stats_label is None:
+            return
+        if visible:
+            self.stats_label.pack(side="bottom", fill="x", padx=5, before=self.app.canvas.get_tk_widget())
+            self.update_stats()
+        else:
+            self.stats_label.pack_forget()
+
+    def stats_text(self):
+        app = self.app
+        parts = []
+        draw = self.last.get("draw")
+        if draw is not None:
+            parts.append(f"draw {draw[2] * 1000:.0f} ms")
+        artists = sum(len(ax.get_children()) for ax in app.fig.axes) + len(app.fig.get_children())
+        points = sum(len(line.get_xdata()) for line, _ in app.lod_manager.lines)
+        parts += [f"artists {artists}", f"points {points}"]
+        if self.last_action is not None:
+            parts.append(f"{self.last_action[0][len('action:'):]} {self.last_action[2] * 1000:.0f} ms")
+        if self.profile is not None:
+            parts.append(f"profiling, {self.profile_left} redraw(s) left")
+        return " | ".join(parts)
+
+    def update_stats(self):
+        if self.show_stats and self.stats_label is not None:
+            self.stats_label.config(text=self.stats_text())
+
+    # Профилирование
+
+    def start_profile(self):
+        self.profile = cProfile.Profile()
+        self.profile_left = self.profile_actions
+        print(f"Profiling the next {self.profile_actions} redraw(s)")
+        self.update_stats()
+        self.profile.enable()
+
+    def stop_profile(self):
+        profile, self.profile = self.profile, None
+        profile.disable()
+        path = f"pandora_{time.strftime('%Y%m%d_%H%M%S')}.prof"
+        try:
+            profile.dump_stats(path)
+            print(f"Profile saved to {os.path.abspath(path)}")
+        except OSError as e:
+            print(f"Error when saving the profile: {e}")
+        pstats.Stats(profile).sort_stats("cumulative").print_stats(20)
+        self.update_stats()
+
+    # Выгрузка
+
+    def summary(self):
+        """Имя -> число, суммарное и наибольшее время замеров, мс"""
+        result = {}
+        for name, _, duration, *_ in self.spans:
+            stats = result.setdefault(name, {"count": 0, "total_ms": 0.0, "max_ms": 0.0})
+            stats["count"] += 1
+            stats["total_ms"] += duration * 1000
+            stats["max_ms"] = max(stats["max_ms"], duration * 1000)
+        return result
+
+    def to_json(self):
+        spans = [{"name": name, "start_ms": (start - self.origin) * 1000, "duration_ms": duration * 1000,
+                  "depth": depth, "thread": thread, "args": args}
+                 for name, start, duration, depth, thread, args in sorted(self.spans, key=lambda span: span[1])]
+        return {"spans": spans, "summary": self.summary()}
+
+    def to_chrome_trace(self):
+        """Полные события ("ph": "X") формата Trace Event: время в микросекундах от начала замеров"""
+        pid = os.getpid()
+        events = [{"name": name, "cat": name.split(":")[0], "ph": "X", "ts": (start - self.origin) * 1e6,
+                   "dur": duration * 1e6, "pid": pid, "tid": thread, "args": args}
+                  for name, start, duration, depth, thread, args in self.spans]
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def export(self, path=None, fmt=None):
+        path = path or self.export_path
+        if path is None:
+            return
+        data = self.to_chrome_trace() if (fmt or self.export_format) == "chrome" else self.to_json()
+        try:
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(data, f, default=str)
+            print(f"{len(self.spans)} timing span(s) written to {path}")
+        except OSError as e:
+            print(f"Error when writing timings: {e}")